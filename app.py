@@ -14,13 +14,16 @@ from dotenv import load_dotenv
 load_dotenv()
 
 import dash
-from dash import dcc, html, Input, Output, State, callback_context
+from dash import dcc, html, Input, Output, State, Patch, callback_context
 import dash_bootstrap_components as dbc
 from datetime import datetime
 import uuid
 import asyncio
+import atexit
 import json
 import logging
+import re
+import time
 
 # Configure logging to see agent actions
 logging.basicConfig(
@@ -43,18 +46,41 @@ print("🔍 LOGGING ENABLED - You should see agent actions below")
 print("="*60 + "\n")
 
 # ICC Agent imports - Using Staged Router
-from src.ai.router import handle_turn, Memory
+from src.ai.router import handle_turn_stream, VersionConflictError, build_memory_store, build_turn_store
+from src.utils.http_client import shutdown_http_client
+from src.utils.event_loop import get_background_loop, KeyedLocks
 
 # Initialize the Dash app with a nice theme
 app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP])
 app.title = "ICC Agent Chat"
 
-# Session memory storage (in production, use Redis or DB)
-session_memories = {}
+# Session memory storage, shared by all worker processes (see MEMORY_STORE_* settings)
+memory_store = build_memory_store()
+
+# All turns run on one long-lived event loop so pooled connections and background
+# tasks (e.g. write-behind flushes) survive between requests
+background_loop = get_background_loop()
+
+# Turns of one session run one at a time; different sessions run concurrently
+session_locks = KeyedLocks()
+
+# Turns currently streaming, per session, in the same backend as the memory store so that
+# a poll answered by another worker process still sees the streamed text and the result
+turn_store = build_turn_store()
+
+# How often the browser polls for streamed tokens (ms)
+STREAM_POLL_INTERVAL_MS = 250
+
+# Messages kept in the browser's chat store; older ones are dropped
+CHAT_HISTORY_LIMIT = 500
+# Messages rendered at once; older ones are removed from the page and lazy-loaded on scroll
+CHAT_RENDER_LIMIT = 50
+# Messages added per lazy load
+CHAT_PAGE_SIZE = 20
 
 
 # App layout
-app.layout = dbc.Container([
+chat_layout = dbc.Container([
     dbc.Row([
         dbc.Col([
             html.H1("🤖 ICC Agent Chat Interface", className="text-center mt-4 mb-4"),
@@ -68,11 +94,25 @@ app.layout = dbc.Container([
     
     dbc.Row([
         dbc.Col([
-            # Chat history display
+            # Chat history display: messages are only ever appended (or prepended when
+            # loading older ones); the reply being streamed lives in its own bubble below
             dbc.Card([
                 dbc.CardBody([
                     html.Div(
-                        id="chat-history",
+                        [
+                            dbc.Button(
+                                "⬆️ Load earlier messages",
+                                id="load-older",
+                                color="link",
+                                size="sm",
+                                n_clicks=0,
+                                className="d-block mx-auto mb-2",
+                                style={"display": "none"}
+                            ),
+                            html.Div(id="chat-history"),
+                            html.Div(id="stream-bubble")
+                        ],
+                        id="chat-scroll",
                         style={
                             "height": "500px",
                             "overflowY": "auto",
@@ -114,9 +154,18 @@ app.layout = dbc.Container([
         ])
     ]),
     
-    # Hidden div to store chat messages
+    # Hidden div to store chat messages (capped at CHAT_HISTORY_LIMIT)
     dcc.Store(id="chat-store", data=[]),
     
+    # How many stored messages exist and how many of the newest are rendered
+    dcc.Store(id="chat-window", data={"total": 0, "rendered": 0}),
+    
+    # Older messages picked from chat-store by the browser, waiting to be rendered
+    dcc.Store(id="older-page", data=[]),
+    
+    # Polls streamed tokens while a turn is running
+    dcc.Interval(id="stream-poll", interval=STREAM_POLL_INTERVAL_MS, disabled=True),
+    
     # Example queries
     dbc.Row([
         dbc.Col([
@@ -134,6 +183,18 @@ app.layout = dbc.Container([
 ], fluid=True, style={"maxWidth": "1000px"})
 
 
+def serve_layout():
+    """Build the page for a new browser tab"""
+    return html.Div([
+        # Per-tab session id; sessionStorage keeps it across reloads, so the fresh id is only used once
+        dcc.Store(id="session-id", storage_type="session", data=str(uuid.uuid4())),
+        chat_layout,
+    ])
+
+
+app.layout = serve_layout
+
+
 def format_message(role, content, timestamp=None):
     """Format a chat message for display"""
     if timestamp is None:
@@ -187,8 +248,16 @@ def format_message(role, content, timestamp=None):
         ], className="mb-3")
 
 
-async def invoke_router_async(user_message, session_id="default-session"):
-    """Invoke the staged router with memory"""
+def preview_stream_text(text):
+    """Show the SQL being generated rather than the raw JSON envelope around it."""
+    match = re.search(r'"sql"\s*:\s*"((?:[^"\\]|\\.)*)', text)
+    if not match:
+        return text
+    return match.group(1).replace('\\n', '\n').replace('\\"', '"')
+
+
+async def stream_router_async(user_message, turn_id, session_id="default-session"):
+    """Invoke the staged router with memory, publishing streamed tokens to the turn store"""
     try:
         # Use both print and logging for maximum visibility
         print("\n" + "="*60)
@@ -199,23 +268,37 @@ async def invoke_router_async(user_message, session_id="default-session"):
         logger.info(f"🔵 User query: {user_message}")
         logger.info(f"🧵 Session ID: {session_id}")
         
-        # Get or create memory for this session
-        if session_id not in session_memories:
-            session_memories[session_id] = Memory()
-            # TODO: In production, set connection from UI selection:
-            # session_memories[session_id].connection = selected_connection_from_ui
-            logger.info(f"🆕 Created new memory for session: {session_id}")
-            logger.info(f"🔌 Using connection: {session_memories[session_id].connection}")
-        
-        memory = session_memories[session_id]
-        
-        logger.info(f"📍 Current stage: {memory.stage.value}")
-        
-        # Call the router
-        updated_memory, response_text = await handle_turn(memory, user_message)
-        
-        # Update session memory
-        session_memories[session_id] = updated_memory
+        async with session_locks.hold(session_id):
+            # Load memory for this session (version 0 = new session)
+            stored = await memory_store.load_or_create(session_id)
+            memory = stored.memory
+            if stored.version == 0:
+                # TODO: In production, set connection from UI selection:
+                # memory.connection = selected_connection_from_ui
+                logger.info(f"🆕 Created new memory for session: {session_id}")
+                logger.info(f"🔌 Using connection: {memory.connection}")
+            
+            logger.info(f"📍 Current stage: {memory.stage.value}")
+            
+            # Call the router, forwarding tokens as they are generated
+            updated_memory, response_text = memory, ""
+            streamed, published_at = "", 0.0
+            async for event in handle_turn_stream(memory, user_message):
+                if event.kind == "token":
+                    streamed += event.text
+                    # Publish at most once per poll interval; the store may be a file shared with other workers
+                    if time.monotonic() - published_at >= STREAM_POLL_INTERVAL_MS / 1000:
+                        published_at = time.monotonic()
+                        await asyncio.to_thread(turn_store.update_text, session_id, turn_id, streamed)
+                else:
+                    updated_memory, response_text = event.memory, event.text
+            
+            # Update session memory, unless another worker process changed it meanwhile
+            try:
+                await memory_store.save(session_id, updated_memory, expected_version=stored.version)
+            except VersionConflictError as e:
+                logger.warning(f"⚠️ {e}")
+                return {"error": "This conversation was updated from another window. Please send your message again."}
         
         print("\n✅ ROUTER RESPONSE:")
         print(f"� New stage: {updated_memory.stage.value}")
@@ -235,31 +318,92 @@ async def invoke_router_async(user_message, session_id="default-session"):
         return {"error": str(e)}
 
 
+async def run_turn(user_message, session_id, turn_id):
+    """Run one streamed turn and store its result for the poll callback"""
+    try:
+        result = await stream_router_async(user_message, turn_id, session_id=session_id)
+    except Exception as e:
+        result = {"error": f"Failed to process request: {str(e)}"}
+    await asyncio.to_thread(turn_store.finish, session_id, turn_id, result)
+
+
+def run_turn_in_background(user_message, session_id, turn_id):
+    """Start one streamed turn on the background loop; the poll callback renders it"""
+    background_loop.submit(run_turn(user_message, session_id, turn_id))
+
+
+async def shutdown_background_resources():
+    """Persist pending session writes and close pooled connections before the loop stops"""
+    await memory_store.close()
+    turn_store.close()
+    await shutdown_http_client()
+
+
+atexit.register(background_loop.stop, shutdown_background_resources)
+
+
+def render_stream_bubble(partial_text):
+    """The agent's in-progress reply while a turn is streaming"""
+    return format_message("agent", (preview_stream_text(partial_text) or "…") + " ▌")
+
+
+def append_messages(chat_window, messages):
+    """
+    Append messages without resending the conversation.
+    
+    Returns Patch updates for chat-history and chat-store plus the new chat-window.
+    The store keeps at most CHAT_HISTORY_LIMIT messages and the page renders at most
+    CHAT_RENDER_LIMIT; messages trimmed from the page can be lazy-loaded back from the store.
+    """
+    history, store = Patch(), Patch()
+    total, rendered = chat_window["total"], chat_window["rendered"]
+    for message in messages:
+        history.append(format_message(**message))
+        store.append(message)
+        total += 1
+        rendered += 1
+    
+    while total > CHAT_HISTORY_LIMIT:
+        del store[0]
+        total -= 1
+    while rendered > CHAT_RENDER_LIMIT:
+        del history[0]
+        rendered -= 1
+    return history, store, {"total": total, "rendered": rendered}
+
+
+def chat_message(role, content):
+    return {"role": role, "content": content, "timestamp": datetime.now().strftime("%H:%M:%S")}
+
+
 @app.callback(
     [Output("chat-history", "children"),
      Output("chat-store", "data"),
+     Output("chat-window", "data"),
+     Output("stream-bubble", "children"),
      Output("user-input", "value"),
-     Output("status-indicator", "children")],
+     Output("status-indicator", "children"),
+     Output("stream-poll", "disabled")],
     [Input("send-button", "n_clicks"),
      Input("example-1", "n_clicks"),
      Input("example-2", "n_clicks"),
      Input("example-3", "n_clicks"),
      Input("user-input", "n_submit")],
     [State("user-input", "value"),
-     State("chat-store", "data")]
+     State("chat-window", "data"),
+     State("session-id", "data")]
 )
-def update_chat(send_clicks, ex1_clicks, ex2_clicks, ex3_clicks, submit, user_input, chat_data):
-    """Handle chat interactions"""
+def update_chat(send_clicks, ex1_clicks, ex2_clicks, ex3_clicks, submit, user_input, chat_window, session_id):
+    """Handle chat interactions: record the user message and start a streamed turn"""
     ctx = callback_context
     
     if not ctx.triggered:
         # Initial load - start the conversation
-        welcome_message = {
-            "role": "agent",
-            "content": "👋 Hello! I'm the ICC Agent with staged conversation flow.\n\nI'll guide you through:\n1️⃣ Creating SQL queries\n2️⃣ Executing them\n3️⃣ Writing results or sending emails\n\nWhat SQL query would you like to execute?",
-            "timestamp": datetime.now().strftime("%H:%M:%S")
-        }
-        return [format_message(**welcome_message)], [welcome_message], "", ""
+        welcome_message = chat_message(
+            "agent",
+            "👋 Hello! I'm the ICC Agent with staged conversation flow.\n\nI'll guide you through:\n1️⃣ Creating SQL queries\n2️⃣ Executing them\n3️⃣ Writing results or sending emails\n\nWhat SQL query would you like to execute?"
+        )
+        return [format_message(**welcome_message)], [welcome_message], {"total": 1, "rendered": 1}, None, "", "", True
     
     # Determine which button was clicked
     button_id = ctx.triggered[0]["prop_id"].split(".")[0]
@@ -272,71 +416,148 @@ def update_chat(send_clicks, ex1_clicks, ex2_clicks, ex3_clicks, submit, user_in
     elif button_id == "example-3":
         user_input = "Email data to test@example.com"
     
-    # If no input, return current state
+    # If no input, leave the conversation as it is
     if not user_input or user_input.strip() == "":
-        chat_display = [format_message(**msg) for msg in chat_data]
-        return chat_display, chat_data, "", ""
+        return dash.no_update, dash.no_update, dash.no_update, dash.no_update, "", "", dash.no_update
+    
+    # One turn at a time per session
+    turn_id = turn_store.start(session_id)
+    if turn_id is None:
+        return dash.no_update, dash.no_update, dash.no_update, dash.no_update, user_input, "⏳ Still working on your previous message...", dash.no_update
     
     # Add user message
-    timestamp = datetime.now().strftime("%H:%M:%S")
-    user_message = {
-        "role": "user",
-        "content": user_input,
-        "timestamp": timestamp
-    }
-    chat_data.append(user_message)
+    history, store, chat_window = append_messages(chat_window, [chat_message("user", user_input)])
     
-    # Show "thinking" status
-    chat_display = [format_message(**msg) for msg in chat_data]
+    logger.info(f"💬 Processing user input: {user_input}")
+    run_turn_in_background(user_input, session_id, turn_id)
     
-    try:
-        logger.info(f"💬 Processing user input: {user_input}")
+    # Show "thinking" status; the poll callback renders tokens as they stream in
+    return history, store, chat_window, render_stream_bubble(""), "", "⏳ Thinking...", False
+
+
+@app.callback(
+    [Output("chat-history", "children", allow_duplicate=True),
+     Output("chat-store", "data", allow_duplicate=True),
+     Output("chat-window", "data", allow_duplicate=True),
+     Output("stream-bubble", "children", allow_duplicate=True),
+     Output("status-indicator", "children", allow_duplicate=True),
+     Output("stream-poll", "disabled", allow_duplicate=True)],
+    Input("stream-poll", "n_intervals"),
+    [State("chat-window", "data"),
+     State("session-id", "data")],
+    prevent_initial_call=True
+)
+def poll_stream(n_intervals, chat_window, session_id):
+    """Render streamed tokens; apply the final response once the turn completes"""
+    turn_state = turn_store.get(session_id)
+    if turn_state is None:
+        return dash.no_update, dash.no_update, dash.no_update, None, "", True
+    
+    if not turn_state.done:
+        return dash.no_update, dash.no_update, dash.no_update, render_stream_bubble(turn_state.text), "⏳ Generating...", False
+    
+    # Overlapping polls may both see the finished turn; only one renders it
+    if not turn_store.take(session_id, turn_state.turn_id):
+        return dash.no_update, dash.no_update, dash.no_update, None, "", True
+    response = turn_state.result or {"error": "No response from router"}
+    
+    if "error" in response:
+        # Error response
+        message = chat_message("error", response["error"])
+    else:
+        # Router returns a simple text response
+        response_text = response.get("response", "")
+        current_stage = response.get("stage", "unknown")
         
-        # Invoke router with session memory
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        response = loop.run_until_complete(invoke_router_async(user_input, session_id="web-chat-session"))
-        loop.close()
+        print(f"\n� Router response: {response_text[:200]}...")
+        print(f"📍 Current stage: {current_stage}")
         
-        if "error" in response:
-            # Error response
-            error_message = {
-                "role": "error",
-                "content": response["error"],
-                "timestamp": datetime.now().strftime("%H:%M:%S")
-            }
-            chat_data.append(error_message)
-        else:
-            # Router returns a simple text response
-            response_text = response.get("response", "")
-            current_stage = response.get("stage", "unknown")
-            
-            print(f"\n� Router response: {response_text[:200]}...")
-            print(f"📍 Current stage: {current_stage}")
-            
-            logger.info(f"💬 Router response: {response_text[:100]}...")
-            logger.info(f"� Current stage: {current_stage}")
-            
-            # Add agent response
-            agent_message = {
-                "role": "agent",
-                "content": response_text,
-                "timestamp": datetime.now().strftime("%H:%M:%S")
-            }
-            chat_data.append(agent_message)
+        logger.info(f"💬 Router response: {response_text[:100]}...")
+        logger.info(f"� Current stage: {current_stage}")
+        
+        # Add agent response
+        message = chat_message("agent", response_text)
     
-    except Exception as e:
-        error_message = {
-            "role": "error",
-            "content": f"Failed to process request: {str(e)}",
-            "timestamp": datetime.now().strftime("%H:%M:%S")
+    history, store, chat_window = append_messages(chat_window, [message])
+    return history, store, chat_window, None, "", True
+
+
+@app.callback(
+    Output("chat-history", "children", allow_duplicate=True),
+    Input("older-page", "data"),
+    prevent_initial_call=True
+)
+def prepend_older_messages(older_messages):
+    """Render a page of older messages picked by the browser and put it above the history"""
+    if not older_messages:
+        return dash.no_update
+    history = Patch()
+    for message in reversed(older_messages):
+        history.prepend(format_message(**message))
+    return history
+
+
+# Pick the next page of older messages from the browser-side store; only that page
+# goes to the server to be rendered, never the whole conversation
+app.clientside_callback(
+    """
+    function(n_clicks, chatStore, chatWindow) {
+        const total = chatStore.length;
+        const rendered = Math.min(chatWindow.rendered, total);
+        if (!n_clicks || rendered >= total) {
+            return [window.dash_clientside.no_update, window.dash_clientside.no_update];
         }
-        chat_data.append(error_message)
-    
-    # Update chat display
-    chat_display = [format_message(**msg) for msg in chat_data]
-    
-    return chat_display, chat_data, "", ""
+        const end = total - rendered;
+        const start = Math.max(0, end - %d);
+        const scroller = document.getElementById("chat-scroll");
+        if (scroller) {
+            scroller.dataset.prependHeight = scroller.scrollHeight;
+        }
+        return [chatStore.slice(start, end), {total: total, rendered: rendered + (end - start)}];
+    }
+    """ % CHAT_PAGE_SIZE,
+    [Output("older-page", "data"),
+     Output("chat-window", "data", allow_duplicate=True)],
+    Input("load-older", "n_clicks"),
+    [State("chat-store", "data"),
+     State("chat-window", "data")],
+    prevent_initial_call=True
+)
+
+
+# Show the "load earlier" button while messages are hidden, and wire up the scroll
+# container once: reaching the top loads older messages, new messages keep the view
+# pinned to the bottom, and prepending keeps the reader's position
+app.clientside_callback(
+    """
+    function(chatWindow) {
+        const scroller = document.getElementById("chat-scroll");
+        if (scroller && !scroller.dataset.wired) {
+            scroller.dataset.wired = "1";
+            let pinned = true;
+            scroller.addEventListener("scroll", function() {
+                pinned = scroller.scrollHeight - scroller.scrollTop - scroller.clientHeight < 40;
+                const button = document.getElementById("load-older");
+                if (scroller.scrollTop < 40 && button && button.style.display !== "none" && !scroller.dataset.prependHeight) {
+                    button.click();
+                }
+            });
+            new MutationObserver(function() {
+                if (scroller.dataset.prependHeight) {
+                    scroller.scrollTop += scroller.scrollHeight - Number(scroller.dataset.prependHeight);
+                    delete scroller.dataset.prependHeight;
+                } else if (pinned) {
+                    scroller.scrollTop = scroller.scrollHeight;
+                }
+            }).observe(scroller, {childList: true, subtree: true});
+        }
+        const hidden = chatWindow && chatWindow.rendered < chatWindow.total;
+        return hidden ? {} : {display: "none"};
+    }
+    """,
+    Output("load-older", "style"),
+    Input("chat-window", "data")
+)
 
 
 if __name__ == "__main__":
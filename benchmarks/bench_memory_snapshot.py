@@ -0,0 +1,105 @@
+"""
+Benchmark Memory serialization: JSON (to_dict) vs. the binary snapshot format.
+
+Reports encoded size and encode/decode time per session for result sets of
+different widths, plus the resident size of many live sessions that ran the
+same query (interned, shared column tuples).
+
+Run from the repository root:
+    PYTHONPATH=. python benchmarks/bench_memory_snapshot.py
+    PYTHONPATH=. python benchmarks/bench_memory_snapshot.py --columns 10 200 --sessions 5000
+"""
+import argparse
+import json
+import time
+import tracemalloc
+from typing import Callable, List
+
+from src.ai.router.memory import Memory, Stage
+
+
+def make_memory(n_columns: int) -> Memory:
+    """A session that has run a query and is gathering write parameters."""
+    columns = [f"COLUMN_NAME_{i:04d}" for i in range(n_columns)]
+    memory = Memory(
+        stage=Stage.NEED_WRITE_OR_EMAIL,
+        last_sql=f"SELECT {', '.join(columns[:20])} FROM customers WHERE country = 'USA'",
+        last_job_id="4f6c2a9e-1b7d-4c3e-9a51-7e2d8b0c6f13",
+        last_preview={"columns": columns[:10], "rows": [[f"value_{r}_{c}" for c in range(10)] for r in range(5)]},
+        gathered_params={"table": "CUSTOMERS_USA", "connection": "oracle_10"},
+        pending_tool="write_data",
+    )
+    memory.set_columns(columns)
+    return memory
+
+
+def encode_json(memory: Memory) -> bytes:
+    return json.dumps(memory.to_dict(), separators=(",", ":")).encode("utf-8")
+
+
+def decode_json(data: bytes) -> Memory:
+    return Memory.from_dict(json.loads(data))
+
+
+def per_call_us(fn: Callable, arg, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn(arg)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def bench_codecs(widths: List[int], iterations: int) -> None:
+    print(f"{'columns':>8} {'json B':>8} {'snap B':>8} {'ratio':>6} "
+          f"{'json enc':>9} {'snap enc':>9} {'json dec':>9} {'snap dec':>9}  (µs/op)")
+    for width in widths:
+        memory = make_memory(width)
+        json_data, snap_data = encode_json(memory), memory.to_snapshot()
+        assert Memory.from_snapshot(snap_data) == memory, "snapshot round-trip mismatch"
+        print(
+            f"{width:>8} {len(json_data):>8} {len(snap_data):>8} {len(snap_data) / len(json_data):>6.2f} "
+            f"{per_call_us(encode_json, memory, iterations):>9.1f} "
+            f"{per_call_us(Memory.to_snapshot, memory, iterations):>9.1f} "
+            f"{per_call_us(decode_json, json_data, iterations):>9.1f} "
+            f"{per_call_us(Memory.from_snapshot, snap_data, iterations):>9.1f}"
+        )
+
+
+def decode_json_uninterned(data: bytes) -> Memory:
+    """How sessions were held before interning: a private list of fresh strings each."""
+    raw = json.loads(data)
+    memory = Memory.from_dict(raw)
+    memory.last_columns = raw["last_columns"]
+    return memory
+
+
+def bench_resident(width: int, sessions: int) -> None:
+    """Memory held by ``sessions`` live sessions that ran the same query."""
+    snap_data = make_memory(width).to_snapshot()
+    json_data = encode_json(make_memory(width))
+    for label, decode, data in (
+        ("list", decode_json_uninterned, json_data),
+        ("interned", Memory.from_snapshot, snap_data),
+    ):
+        tracemalloc.start()
+        live = [decode(data) for _ in range(sessions)]
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{label:>9}: {sessions} sessions x {width} columns -> {current / sessions:,.0f} B/session")
+        del live
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--columns", type=int, nargs="+", default=[10, 100, 500], help="result set widths")
+    parser.add_argument("--iterations", type=int, default=2000, help="encode/decode calls per measurement")
+    parser.add_argument("--sessions", type=int, default=2000, help="live sessions for the resident-size check")
+    args = parser.parse_args()
+
+    print("== Encoded size and codec speed ==")
+    bench_codecs(args.columns, args.iterations)
+    print("\n== Resident size of decoded sessions ==")
+    bench_resident(max(args.columns), args.sessions)
+
+
+if __name__ == "__main__":
+    main()
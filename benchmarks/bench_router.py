@@ -0,0 +1,359 @@
+"""
+Router micro-benchmarks: per-stage overhead of handle_turn without Ollama or ICC.
+
+Both LLM agents are swapped for a deterministic in-process chat model and
+the pooled HTTP client is backed by an httpx.MockTransport, so the numbers
+are the router's own cost: stage logic, validation, pydantic models,
+build_wire_payload, the repository/HTTP stack and logging.
+
+A scripted conversation walks every Stage (write and email included) and
+each turn is timed twice per iteration, with logging silenced and with
+logging enabled into a null sink; the difference is the logging overhead.
+Component timings cover model construction, build_wire_payload, SQL
+validation, schema selection and one fake LLM call.
+
+Medians are compared with a stored baseline and the script exits with
+status 1 if any metric regressed by more than the tolerance, or if there
+is no baseline to compare with:
+
+    PYTHONPATH=. python benchmarks/bench_router.py --save-baseline   # on the reference machine
+    PYTHONPATH=. python benchmarks/bench_router.py                   # compare, fail on regression
+
+Baselines are machine-specific; regenerate them when the hardware changes.
+"""
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import httpx
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from loguru import logger as loguru_logger
+
+from src.ai.router import handle_turn, Memory
+from src.ai.router import job_agent as job_agent_module
+from src.ai.router import sql_agent as sql_agent_module
+from src.ai.router.schema_catalog import schema_catalog
+from src.ai.router.sql_validator import validate_sql
+from src.models.natural_language import (
+    ColumnSchema,
+    ReadSqlLLMRequest,
+    ReadSqlVariables,
+    SendEmailLLMRequest,
+    SendEmailVariables,
+    WriteDataLLMRequest,
+    WriteDataVariables,
+)
+from src.payload_builders.wire_builder import build_wire_payload
+from src.utils.http_client import shutdown_http_client, startup_http_client
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "bench_router.json")
+
+SQL = "SELECT c.first_name, c.country FROM customers c WHERE c.country = 'USA'"
+COLUMNS = ["FIRST_NAME", "COUNTRY"]
+
+# (label, utterance, text the response must contain)
+CONVERSATION: List[Tuple[str, str, str]] = [
+    ("start", "hi", "What SQL query"),
+    ("need_query", "get customers from USA", "Shall I execute it?"),
+    ("have_sql", "yes", "Query executed successfully"),
+    ("show_results", "ok", "What would you like to do next?"),
+    ("write", "write to table SALES_2024 on oracle_prod and truncate it", "Data written successfully"),
+    ("email", "email bob@example.com with subject: Weekly sales", "Email sent"),
+    ("done", "done", "All done"),
+    ("restart", "new query", "Starting fresh"),
+]
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Deterministic chat model that answers in-process (no executor hop) and streams one chunk."""
+
+    responses: List[str]
+    position: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def _next(self) -> str:
+        response = self.responses[self.position % len(self.responses)]
+        self.position += 1
+        return response
+
+    def _generate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self._next()))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        return self._generate(messages)
+
+    def _stream(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs) -> Iterator[ChatGenerationChunk]:
+        yield ChatGenerationChunk(message=AIMessageChunk(content=self._next()))
+
+    async def _astream(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs):
+        yield ChatGenerationChunk(message=AIMessageChunk(content=self._next()))
+
+
+def icc_handler(request: httpx.Request) -> httpx.Response:
+    """Fake ICC: utility/query returns columns, job/save returns a job id."""
+    if request.url.path.rstrip("/").endswith("utility/query"):
+        return httpx.Response(200, json={"object": {"columns": COLUMNS}})
+    return httpx.Response(200, json={"object": "bench-job-1"})
+
+
+def install_fakes() -> None:
+    sql_agent_module.sql_agent.llm = ScriptedChatModel(responses=[json.dumps({"sql": SQL, "reasoning": "bench"})])
+    # Generation cache off: every NEED_QUERY turn goes through prompt building and the (fake) model
+    sql_agent_module.sql_agent.cache = None
+    job_agent_module.job_agent.llm = ScriptedChatModel(
+        responses=[json.dumps({"action": "ASK", "question": "Which table?", "params": {}})]
+    )
+
+
+class NullWriter:
+    def write(self, message: str) -> None:
+        pass
+
+    def flush(self) -> None:
+        pass
+
+
+class LoggingMode:
+    """Switch stdlib logging and loguru between silenced and enabled-into-a-null-sink."""
+
+    def __init__(self):
+        self._handler = logging.StreamHandler(NullWriter())
+        self._handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+        root = logging.getLogger()
+        root.handlers[:] = [self._handler]
+        root.setLevel(logging.INFO)
+        loguru_logger.remove()
+        self._loguru_sink: Optional[int] = None
+
+    def quiet(self) -> None:
+        logging.disable(logging.CRITICAL)
+        if self._loguru_sink is not None:
+            loguru_logger.remove(self._loguru_sink)
+            self._loguru_sink = None
+
+    def logged(self) -> None:
+        logging.disable(logging.NOTSET)
+        if self._loguru_sink is None:
+            self._loguru_sink = loguru_logger.add(NullWriter(), level="DEBUG")
+
+
+async def run_conversation(timings: Dict[str, List[float]], suffix: str, check: bool) -> None:
+    memory = Memory()
+    for label, utterance, expected in CONVERSATION:
+        start = time.perf_counter_ns()
+        memory, response = await handle_turn(memory, utterance)
+        elapsed = (time.perf_counter_ns() - start) / 1000
+        if check and expected not in response:
+            raise RuntimeError(f"Turn '{label}' returned an unexpected response: {response!r}")
+        timings[f"turn.{label}.{suffix}"].append(elapsed)
+
+
+def build_read_sql() -> ReadSqlLLMRequest:
+    return ReadSqlLLMRequest(
+        rights={"owner": "184431757886694"},
+        props={"active": "true", "name": f"Query_{SQL[:20]}", "description": ""},
+        variables=[ReadSqlVariables(query=SQL, connection="oracle_10", execute_query=True)],
+    )
+
+
+def build_write_data() -> WriteDataLLMRequest:
+    return WriteDataLLMRequest(
+        rights={"owner": "184431757886694"},
+        props={"active": "true", "name": "Write_SALES_2024", "description": ""},
+        variables=[WriteDataVariables(
+            connection="oracle_prod",
+            table="SALES_2024",
+            data_set="bench-job-1",
+            columns=[ColumnSchema(columnName=column) for column in COLUMNS],
+            drop_or_truncate="truncate",
+            only_dataset_columns=True,
+        )],
+    )
+
+
+def build_send_email() -> SendEmailLLMRequest:
+    return SendEmailLLMRequest(
+        rights={"owner": "184431757886694"},
+        props={"active": "true", "name": "Email_Results", "description": ""},
+        variables=[SendEmailVariables(
+            query=SQL,
+            to="bob@example.com",
+            subject="Weekly sales",
+            text="Please find the query results attached.",
+            connection="oracle_10",
+            attachment=True,
+        )],
+    )
+
+
+# The same requests the router builds in HAVE_SQL and NEED_WRITE_OR_EMAIL
+REQUEST_BUILDERS: Dict[str, Callable[[], Any]] = {
+    "read_sql": build_read_sql,
+    "write_data": build_write_data,
+    "send_email": build_send_email,
+}
+
+
+def time_call(fn: Callable[[], Any], repeat: int, samples: List[float]) -> None:
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        fn()
+        samples.append((time.perf_counter_ns() - start) / 1000)
+
+
+def wire_call(request: Any, column_names: Any) -> Callable[[], Any]:
+    return lambda: build_wire_payload(request, column_names=column_names).model_dump(exclude_none=True, by_alias=True)
+
+
+async def bench_components(timings: Dict[str, List[float]], repeat: int, rounds: int = 5) -> None:
+    tables = schema_catalog.tables("oracle_10")
+    index = await schema_catalog.get_index("oracle_10")
+    components: Dict[str, Callable[[], Any]] = {}
+    for name, builder in REQUEST_BUILDERS.items():
+        components[f"pydantic.{name}"] = builder
+        components[f"wire.{name}"] = wire_call(builder(), COLUMNS if name == "read_sql" else "")
+    components["validate_sql"] = lambda: validate_sql(SQL, tables, "oracle_10")
+    components["schema_select"] = lambda: index.select("get customers from USA", top_k=5)
+
+    # Interleave components across rounds so machine noise spreads evenly over them
+    llm = sql_agent_module.sql_agent.llm
+    per_round = max(1, repeat // rounds)
+    for _ in range(rounds):
+        for name, fn in components.items():
+            time_call(fn, per_round, timings[name])
+        for _ in range(per_round):
+            start = time.perf_counter_ns()
+            await llm.ainvoke("bench")
+            timings["llm_call.fake"].append((time.perf_counter_ns() - start) / 1000)
+
+
+async def run(iterations: int, warmup: int, component_repeat: int) -> Dict[str, Dict[str, float]]:
+    install_fakes()
+    logging_mode = LoggingMode()
+    await startup_http_client(httpx.MockTransport(icc_handler))
+    timings: Dict[str, List[float]] = defaultdict(list)
+    try:
+        warm: Dict[str, List[float]] = defaultdict(list)
+        for i in range(warmup):
+            logging_mode.quiet()
+            await run_conversation(warm, "quiet", check=(i == 0))
+
+        # Collector pauses would land on whichever sample happens to trigger them
+        gc.collect()
+        gc.disable()
+        for _ in range(iterations):
+            logging_mode.quiet()
+            await run_conversation(timings, "quiet", check=False)
+            logging_mode.logged()
+            await run_conversation(timings, "logged", check=False)
+
+        logging_mode.quiet()
+        await bench_components(timings, component_repeat)
+    finally:
+        gc.enable()
+        await shutdown_http_client()
+        logging_mode.logged()
+
+    return {
+        name: {
+            "median_us": statistics.median(samples),
+            "p95_us": sorted(samples)[int(0.95 * (len(samples) - 1))],
+            "n": len(samples),
+        }
+        for name, samples in timings.items()
+    }
+
+
+def report(results: Dict[str, Dict[str, float]], baseline: Optional[Dict[str, Any]]) -> None:
+    base = (baseline or {}).get("metrics", {})
+    print(f"{'metric':<34} {'median µs':>10} {'p95 µs':>10} {'baseline':>10} {'change':>8}")
+    for name in sorted(results):
+        stats = results[name]
+        line = f"{name:<34} {stats['median_us']:>10.1f} {stats['p95_us']:>10.1f}"
+        if name in base:
+            previous = base[name]["median_us"]
+            line += f" {previous:>10.1f} {(stats['median_us'] / previous - 1) * 100 if previous else 0:>+7.1f}%"
+        print(line)
+
+    print("\nLogging overhead per turn (logged - quiet medians):")
+    for label, _, _ in CONVERSATION:
+        quiet, logged = results[f"turn.{label}.quiet"], results[f"turn.{label}.logged"]
+        print(f"  {label:<14} {logged['median_us'] - quiet['median_us']:>+9.1f} µs")
+
+
+def regressions(
+    results: Dict[str, Dict[str, float]], baseline: Dict[str, Any], tolerance: float, min_delta_us: float
+) -> List[str]:
+    """Metrics whose median grew by more than ``tolerance`` (relative) and ``min_delta_us`` (absolute)."""
+    found = []
+    for name, previous in baseline.get("metrics", {}).items():
+        current = results.get(name)
+        if current is None:
+            continue
+        before, after = previous["median_us"], current["median_us"]
+        if after > before * (1 + tolerance) and after - before > min_delta_us:
+            found.append(f"{name}: {before:.1f} µs -> {after:.1f} µs ({(after / before - 1) * 100:+.0f}%)")
+    return found
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200, help="timed conversations per logging mode")
+    parser.add_argument("--warmup", type=int, default=20, help="untimed conversations first")
+    parser.add_argument("--component-repeat", type=int, default=2000, help="calls per component timing")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON path")
+    parser.add_argument("--save-baseline", action="store_true", help="write results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.30, help="allowed relative slowdown of a median")
+    parser.add_argument("--min-delta-us", type=float, default=5.0, help="ignore slowdowns smaller than this")
+    args = parser.parse_args()
+
+    baseline = None
+    if not args.save_baseline:
+        # Comparing against nothing must not pass as "no regressions"
+        if not os.path.exists(args.baseline):
+            print(f"❌ No baseline at {args.baseline}; run with --save-baseline on the reference machine first")
+            return 1
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    results = asyncio.run(run(args.iterations, args.warmup, args.component_repeat))
+    report(results, baseline)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({
+                "python": sys.version.split()[0],
+                "platform": platform.platform(),
+                "iterations": args.iterations,
+                "metrics": results,
+            }, f, indent=2, sort_keys=True)
+        print(f"\nSaved baseline to {args.baseline}")
+        return 0
+
+    found = regressions(results, baseline, args.tolerance, args.min_delta_us)
+    if found:
+        print(f"\n❌ {len(found)} regression(s) beyond {args.tolerance:.0%}:")
+        for line in found:
+            print(f"  {line}")
+        return 1
+    print(f"\n✅ No regressions beyond {args.tolerance:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,344 @@
+"""
+Local stand-in for the ICC API, for offline throughput and failure testing.
+
+Implements the three contracts the agent depends on:
+
+    POST /job/save          -> JobResponse    {"object": "<job id>", "errorCode": null, "errorMessage": null}
+    POST /utility/query     -> QueryResponse  {"object": {"columns": [...]}}
+    POST <token path>       -> OAuth token    {"access_token", "expires_in", "refresh_token", ...}
+
+Each endpoint has its own latency distribution, error rate and token-bucket
+rate limit (429 with Retry-After). Query columns come from a generator:
+parsed from the SQL select list, a fixed count, or a random count.
+``GET /_standin/stats`` reports what was served; ``POST /_standin/reset``
+clears the counters.
+
+Serve it and point the agent at it:
+
+    PYTHONPATH=. python benchmarks/icc_standin.py --port 8084 \\
+        --latency query=lognormal:80,0.4 --latency job=normal:40,10 \\
+        --error-rate job=0.02 --rate-limit query=50:100 --columns from-sql
+
+    API_BASE_URL=http://localhost:8084/job/save
+    QUERY_API_BASE_URL=http://localhost:8084/utility/query
+    TOKEN_ENDPOINT=http://localhost:8084/auth/realms/icc/protocol/openid-connect/token
+    AUTH_USERNAME=bench AUTH_PASSWORD=bench
+
+Or in-process, without sockets (job and query only; the token manager opens
+its own client):
+
+    app = create_standin_app(StandinConfig(...))
+    await startup_http_client(httpx.ASGITransport(app=app))
+"""
+import argparse
+import asyncio
+import math
+import random
+import secrets
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import parse_qs
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from src.utils.sql_parser import IDENTIFIER_CASE_UPPER, infer_select_columns
+
+JOB = "job"
+QUERY = "query"
+TOKEN = "token"
+ENDPOINTS = (JOB, QUERY, TOKEN)
+
+TOKEN_PATH = "/auth/realms/icc/protocol/openid-connect/token"
+
+
+def latency_sampler(spec: str, rng: random.Random) -> Callable[[], float]:
+    """
+    Build a latency sampler (seconds) from a spec in milliseconds:
+
+        fixed:50 | uniform:20,80 | normal:50,10 | lognormal:<median>,<sigma> | exp:<mean> | none
+    """
+    kind, _, args = spec.partition(":")
+    values = [float(v) / 1000 for v in args.split(",")] if args else []
+    if kind == "none":
+        return lambda: 0.0
+    if kind == "fixed" and len(values) == 1:
+        return lambda: values[0]
+    if kind == "uniform" and len(values) == 2:
+        return lambda: rng.uniform(values[0], values[1])
+    if kind == "normal" and len(values) == 2:
+        return lambda: max(0.0, rng.gauss(values[0], values[1]))
+    if kind == "lognormal" and len(values) == 2:
+        # sigma is unitless; undo the ms->s scaling applied above
+        median, sigma = values[0], values[1] * 1000
+        return lambda: rng.lognormvariate(math.log(median), sigma)
+    if kind == "exp" and len(values) == 1:
+        return lambda: rng.expovariate(1 / values[0])
+    raise ValueError(f"Invalid latency spec '{spec}'")
+
+
+def column_generator(spec: str, rng: random.Random) -> Callable[[str], List[str]]:
+    """
+    Build a column-list generator from a spec:
+
+        from-sql[:<fallback count>]  select list of the query, or COL_1..N for SELECT * and the like
+        fixed:<count>                COL_1..COL_<count>
+        random:<min>,<max>           COL_1..COL_<n> with n drawn per request
+    """
+    kind, _, args = spec.partition(":")
+    numbers = [int(v) for v in args.split(",")] if args else []
+
+    def generated(count: int) -> List[str]:
+        return [f"COL_{i}" for i in range(1, count + 1)]
+
+    if kind == "from-sql":
+        fallback = numbers[0] if numbers else 8
+        return lambda sql: infer_select_columns(sql, IDENTIFIER_CASE_UPPER) or generated(fallback)
+    if kind == "fixed" and len(numbers) == 1:
+        return lambda sql: generated(numbers[0])
+    if kind == "random" and len(numbers) == 2:
+        return lambda sql: generated(rng.randint(numbers[0], numbers[1]))
+    raise ValueError(f"Invalid column spec '{spec}'")
+
+
+class TokenBucket:
+    """``rate`` requests per second with bursts up to ``burst``."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self) -> Optional[float]:
+        """Consume one token; returns None if allowed, else seconds until one is available."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return None
+        return (1 - self.tokens) / self.rate
+
+
+@dataclass
+class EndpointProfile:
+    """Behaviour of one endpoint."""
+    latency: str = "fixed:20"
+    error_rate: float = 0.0  # share of requests answered with error_status
+    error_status: int = 503
+    rate_limit: Optional[float] = None  # requests per second, None for unlimited
+    burst: Optional[float] = None  # bucket size, defaults to one second's worth
+
+
+@dataclass
+class StandinConfig:
+    """Stand-in server settings."""
+    profiles: Dict[str, EndpointProfile] = field(default_factory=lambda: {
+        JOB: EndpointProfile(latency="fixed:30"),
+        QUERY: EndpointProfile(latency="fixed:60"),
+        TOKEN: EndpointProfile(latency="fixed:15"),
+    })
+    columns: str = "from-sql"
+    token_ttl: float = 300.0
+    require_auth: bool = False  # reject job/query requests without a token this server issued
+    seed: Optional[int] = None
+
+
+class Standin:
+    """Endpoint behaviour and counters shared by the request handlers."""
+
+    def __init__(self, config: StandinConfig):
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.latency = {name: latency_sampler(config.profiles[name].latency, self.rng) for name in ENDPOINTS}
+        self.columns = column_generator(config.columns, self.rng)
+        self.buckets: Dict[str, TokenBucket] = {}
+        for name in ENDPOINTS:
+            profile = config.profiles[name]
+            if profile.rate_limit:
+                self.buckets[name] = TokenBucket(profile.rate_limit, profile.burst or max(1.0, profile.rate_limit))
+        self.tokens: Dict[str, float] = {}  # access token -> expiry (monotonic)
+        self.reset()
+
+    def reset(self) -> None:
+        self.started = time.monotonic()
+        self.status_counts: Dict[str, Dict[int, int]] = {name: defaultdict(int) for name in ENDPOINTS}
+        self.in_flight: Dict[str, int] = defaultdict(int)
+        self.max_in_flight: Dict[str, int] = defaultdict(int)
+
+    async def serve(self, endpoint: str, request: Request, handler: Callable[[], Any]) -> Response:
+        """Apply rate limit, auth, latency and error injection around ``handler``."""
+        self.in_flight[endpoint] += 1
+        self.max_in_flight[endpoint] = max(self.max_in_flight[endpoint], self.in_flight[endpoint])
+        try:
+            response = await self._serve(endpoint, request, handler)
+        finally:
+            self.in_flight[endpoint] -= 1
+        self.status_counts[endpoint][response.status_code] += 1
+        return response
+
+    async def _serve(self, endpoint: str, request: Request, handler: Callable[[], Any]) -> Response:
+        bucket = self.buckets.get(endpoint)
+        if bucket is not None:
+            wait = bucket.take()
+            if wait is not None:
+                return JSONResponse(
+                    {"errorCode": "RATE_LIMITED", "errorMessage": "Too many requests"},
+                    status_code=429,
+                    headers={"Retry-After": f"{max(1, math.ceil(wait))}"},
+                )
+
+        if self.config.require_auth and endpoint != TOKEN and not self._authorized(request):
+            return JSONResponse({"errorCode": "UNAUTHORIZED", "errorMessage": "Invalid or expired token"}, status_code=401)
+
+        await asyncio.sleep(self.latency[endpoint]())
+
+        profile = self.config.profiles[endpoint]
+        if profile.error_rate and self.rng.random() < profile.error_rate:
+            return JSONResponse(
+                {"errorCode": "INJECTED", "errorMessage": "Injected failure"}, status_code=profile.error_status
+            )
+        return await handler()
+
+    def _authorized(self, request: Request) -> bool:
+        scheme, _, token = request.headers.get("authorization", "").partition(" ")
+        expires = self.tokens.get(token) if scheme.lower() == "bearer" else None
+        return expires is not None and expires > time.monotonic()
+
+    def issue_token(self) -> Dict[str, Any]:
+        token = secrets.token_urlsafe(24)
+        self.tokens[token] = time.monotonic() + self.config.token_ttl
+        if len(self.tokens) > 10000:
+            now = time.monotonic()
+            self.tokens = {t: exp for t, exp in self.tokens.items() if exp > now}
+        return {
+            "access_token": token,
+            "token_type": "Bearer",
+            "expires_in": self.config.token_ttl,
+            "refresh_token": secrets.token_urlsafe(24),
+            "refresh_expires_in": self.config.token_ttl * 6,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        elapsed = time.monotonic() - self.started
+        return {
+            "uptime": elapsed,
+            "endpoints": {
+                name: {
+                    "requests": sum(self.status_counts[name].values()),
+                    "rps": sum(self.status_counts[name].values()) / elapsed if elapsed else 0.0,
+                    "status_codes": dict(self.status_counts[name]),
+                    "in_flight": self.in_flight[name],
+                    "max_in_flight": self.max_in_flight[name],
+                }
+                for name in ENDPOINTS
+            },
+        }
+
+
+def create_standin_app(config: Optional[StandinConfig] = None) -> Starlette:
+    """Build the stand-in ASGI app; ``app.state.standin`` exposes counters and config."""
+    standin = Standin(config or StandinConfig())
+
+    async def job_save(request: Request) -> Response:
+        async def handler():
+            await request.body()
+            return JSONResponse({"object": uuid.uuid4().hex, "errorCode": None, "errorMessage": None})
+        return await standin.serve(JOB, request, handler)
+
+    async def utility_query(request: Request) -> Response:
+        async def handler():
+            try:
+                body = await request.json()
+            except ValueError:
+                body = None
+            if not isinstance(body, dict) or not body.get("sql"):
+                return JSONResponse({"errorCode": "BAD_REQUEST", "errorMessage": "'sql' is required"}, status_code=400)
+            return JSONResponse({"object": {"columns": standin.columns(body["sql"])}})
+        return await standin.serve(QUERY, request, handler)
+
+    async def token(request: Request) -> Response:
+        async def handler():
+            # Parsed by hand: Starlette's form support needs python-multipart
+            form = parse_qs((await request.body()).decode("utf-8"))
+            if not form.get("grant_type"):
+                return JSONResponse({"error": "invalid_request"}, status_code=400)
+            return JSONResponse(standin.issue_token())
+        return await standin.serve(TOKEN, request, handler)
+
+    async def stats(request: Request) -> Response:
+        return JSONResponse(standin.stats())
+
+    async def reset(request: Request) -> Response:
+        standin.reset()
+        return JSONResponse({"status": "reset"})
+
+    app = Starlette(routes=[
+        Route("/job/save", job_save, methods=["POST"]),
+        Route("/utility/query", utility_query, methods=["POST"]),
+        Route(TOKEN_PATH, token, methods=["POST"]),
+        Route("/token", token, methods=["POST"]),
+        Route("/_standin/stats", stats, methods=["GET"]),
+        Route("/_standin/reset", reset, methods=["POST"]),
+    ])
+    app.state.standin = standin
+    return app
+
+
+def _per_endpoint(values: List[str], option: str) -> Dict[str, str]:
+    parsed = {}
+    for value in values:
+        name, sep, setting = value.partition("=")
+        if not sep or name not in ENDPOINTS:
+            raise SystemExit(f"{option} expects <{'|'.join(ENDPOINTS)}>=<value>, got '{value}'")
+        parsed[name] = setting
+    return parsed
+
+
+def config_from_args(args: argparse.Namespace) -> StandinConfig:
+    config = StandinConfig(columns=args.columns, token_ttl=args.token_ttl, require_auth=args.require_auth, seed=args.seed)
+    for name, spec in _per_endpoint(args.latency, "--latency").items():
+        config.profiles[name].latency = spec
+    for name, rate in _per_endpoint(args.error_rate, "--error-rate").items():
+        rate, _, status = rate.partition("@")
+        config.profiles[name].error_rate = float(rate)
+        if status:
+            config.profiles[name].error_status = int(status)
+    for name, limit in _per_endpoint(args.rate_limit, "--rate-limit").items():
+        rate, _, burst = limit.partition(":")
+        config.profiles[name].rate_limit = float(rate)
+        config.profiles[name].burst = float(burst) if burst else None
+    return config
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8084)
+    parser.add_argument("--latency", action="append", default=[], metavar="ENDPOINT=SPEC",
+                        help="e.g. query=lognormal:80,0.4 (ms); endpoints: job, query, token")
+    parser.add_argument("--error-rate", action="append", default=[], metavar="ENDPOINT=RATE[@STATUS]",
+                        help="e.g. job=0.05@502")
+    parser.add_argument("--rate-limit", action="append", default=[], metavar="ENDPOINT=RPS[:BURST]",
+                        help="e.g. query=50:100")
+    parser.add_argument("--columns", default="from-sql", help="from-sql[:N] | fixed:N | random:MIN,MAX")
+    parser.add_argument("--token-ttl", type=float, default=300.0, help="access token lifetime (seconds)")
+    parser.add_argument("--require-auth", action="store_true", help="401 for requests without an issued token")
+    parser.add_argument("--seed", type=int, default=None, help="seed for latency, errors and columns")
+    args = parser.parse_args()
+
+    try:
+        import uvicorn
+    except ImportError:
+        raise SystemExit("uvicorn is required to serve the stand-in: pip install uvicorn")
+    uvicorn.run(create_standin_app(config_from_args(args)), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,441 @@
+"""
+Load generator: concurrent scripted conversations with latency percentiles.
+
+Replays the bench_router conversation (query -> confirm -> results -> write
+-> email -> done) for many synthetic sessions at once and reports
+throughput and p50/p95/p99 latency per turn stage and per dependency:
+
+    turn.<stage>        whole turn, keyed by the stage the session was in
+    llm.<agent>         one model call (sql_agent / job_agent), plus ttft when streaming
+    icc.<endpoint>      one ICC request attempt (retries are separate samples)
+    server.<phase>      Server-Timing phases reported by the HTTP API (load, turn, save)
+
+Targets:
+    router   handle_turn in this process (default)
+    api      the HTTP API (src/api/server.py) in this process via ASGI, or a
+             running server with --url (then only turn and server.* metrics)
+
+By default the models are scripted with a sampled latency (--llm-latency)
+and ICC is the local stand-in (benchmarks/icc_standin.py) with its own
+latency, error and rate-limit settings. --llm standin keeps the agents'
+ChatOllama clients and serves them from the Ollama stand-in
+(benchmarks/ollama_standin.py) in process, with its TTFT, tokens/sec and
+parallel-slot settings; --llm real / --icc real use the configured Ollama
+(OLLAMA_BASE_URL) and ICC instead.
+
+Arrivals are closed-loop (every user starts at once and replays the
+conversation until --duration is over, with --think-time between turns) or
+open-loop with --arrival-rate (new sessions per second, Poisson, capped at
+--users simultaneous sessions). --sweep runs closed-loop at several user
+counts to find where turn latency starts to degrade:
+
+    PYTHONPATH=. python benchmarks/load_generator.py --users 50 --duration 30
+    PYTHONPATH=. python benchmarks/load_generator.py --arrival-rate 5 --users 200 --duration 60
+    PYTHONPATH=. python benchmarks/load_generator.py --sweep 1,10,25,50,100 --duration 15
+    PYTHONPATH=. python benchmarks/load_generator.py --target api --url http://localhost:8000 --users 20
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+import sys
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Tuple
+
+import httpx
+from langchain_core.callbacks import AsyncCallbackHandler
+from langchain_core.messages import AIMessageChunk
+from langchain_core.outputs import ChatGenerationChunk
+from langchain_ollama import ChatOllama
+from loguru import logger as loguru_logger
+
+from bench_router import CONVERSATION, SQL, ScriptedChatModel
+from icc_standin import StandinConfig, config_from_args, create_standin_app, latency_sampler
+from ollama_standin import OllamaStandinConfig, StreamingASGITransport, create_ollama_standin_app
+from src.ai.router import handle_turn, Memory
+from src.ai.router import job_agent as job_agent_module
+from src.ai.router import sql_agent as sql_agent_module
+from src.utils.http_client import get_http_client, shutdown_http_client, startup_http_client
+
+PERCENTILES = (50, 95, 99)
+
+
+class PacedChatModel(ScriptedChatModel):
+    """ScriptedChatModel that waits a sampled latency before answering, streaming the answer in a few chunks."""
+
+    sample: Callable[[], float] = lambda: 0.0
+    chunks: int = 4
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.sample())
+        return self._generate(messages)
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.sample())
+        text = self._next()
+        step = max(1, len(text) // self.chunks)
+        for i in range(0, len(text), step):
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=text[i:i + step]))
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+
+@dataclass
+class Recorder:
+    """Latency samples (seconds) and counters collected during one run."""
+    samples: Dict[str, List[float]] = field(default_factory=lambda: defaultdict(list))
+    counts: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    turns: int = 0
+    conversations: int = 0
+    in_flight: int = 0
+    max_in_flight: int = 0
+
+    def reset(self) -> None:
+        self.samples = defaultdict(list)
+        self.counts = defaultdict(int)
+        self.turns = self.conversations = self.in_flight = self.max_in_flight = 0
+
+    def add(self, name: str, seconds: float) -> None:
+        self.samples[name].append(seconds)
+
+    def count(self, name: str) -> None:
+        self.counts[name] += 1
+
+
+class LLMTimer(AsyncCallbackHandler):
+    """LangChain callback timing each model call of one agent, and time to first token when streaming."""
+
+    def __init__(self, recorder: Recorder, name: str):
+        self.recorder = recorder
+        self.name = name
+        self._started: Dict[Any, float] = {}
+        self._first_token: Dict[Any, bool] = {}
+
+    async def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs) -> None:
+        self._started[run_id] = time.perf_counter()
+
+    async def on_llm_new_token(self, token, *, run_id, **kwargs) -> None:
+        if run_id in self._started and not self._first_token.get(run_id):
+            self._first_token[run_id] = True
+            self.recorder.add(f"llm.{self.name}.ttft", time.perf_counter() - self._started[run_id])
+
+    async def on_llm_end(self, response, *, run_id, **kwargs) -> None:
+        started = self._started.pop(run_id, None)
+        self._first_token.pop(run_id, None)
+        if started is not None:
+            self.recorder.add(f"llm.{self.name}", time.perf_counter() - started)
+
+    async def on_llm_error(self, error, *, run_id, **kwargs) -> None:
+        self._started.pop(run_id, None)
+        self._first_token.pop(run_id, None)
+        self.recorder.count(f"llm.{self.name}.error")
+
+
+def instrument_http_client(client: httpx.AsyncClient, recorder: Recorder) -> None:
+    """Time every ICC request attempt on the pooled client, keyed by the last two path segments."""
+
+    async def on_request(request: httpx.Request) -> None:
+        request.extensions["load_started"] = time.perf_counter()
+
+    async def on_response(response: httpx.Response) -> None:
+        started = response.request.extensions.get("load_started")
+        endpoint = "/".join(response.request.url.path.rstrip("/").split("/")[-2:])
+        if started is not None:
+            recorder.add(f"icc.{endpoint}", time.perf_counter() - started)
+        recorder.count(f"icc.{endpoint}.{response.status_code}")
+
+    client.event_hooks["request"].append(on_request)
+    client.event_hooks["response"].append(on_response)
+
+
+def install_llms(args: argparse.Namespace, recorder: Recorder, rng: random.Random) -> None:
+    if args.llm == "scripted":
+        sample = latency_sampler(args.llm_latency, rng)
+        sql_agent_module.sql_agent.llm = PacedChatModel(
+            responses=[json.dumps({"sql": SQL, "reasoning": "load"})], sample=sample
+        )
+        job_agent_module.job_agent.llm = PacedChatModel(
+            responses=[json.dumps({"action": "ASK", "question": "Which table?", "params": {}})], sample=sample
+        )
+    elif args.llm == "standin":
+        config = OllamaStandinConfig(
+            ttft=args.llm_latency, tps=args.llm_tps, parallel=args.llm_parallel, seed=args.seed
+        )
+        transport = StreamingASGITransport(create_ollama_standin_app(config))
+        for agent in (sql_agent_module.sql_agent, job_agent_module.job_agent):
+            agent.llm = ChatOllama(
+                model=agent.llm.model,
+                temperature=agent.llm.temperature,
+                base_url="http://ollama-standin",
+                async_client_kwargs={"transport": transport},
+            )
+    if not args.sql_cache:
+        # Otherwise every session after the first is a cache hit and never reaches the model
+        sql_agent_module.sql_agent.cache = None
+    sql_agent_module.sql_agent.llm.callbacks = [LLMTimer(recorder, "sql_agent")]
+    job_agent_module.job_agent.llm.callbacks = [LLMTimer(recorder, "job_agent")]
+
+
+class RouterTarget:
+    """Drives handle_turn directly, one Memory per session."""
+
+    def __init__(self):
+        self.memories: Dict[str, Memory] = {}
+
+    async def turn(self, session_id: str, utterance: str, recorder: Recorder) -> str:
+        memory = self.memories.setdefault(session_id, Memory())
+        stage = memory.stage.value
+        start = time.perf_counter()
+        try:
+            self.memories[session_id], _ = await handle_turn(memory, utterance)
+        finally:
+            recorder.add(f"turn.{stage}", time.perf_counter() - start)
+        return self.memories[session_id].stage.value
+
+    def end_session(self, session_id: str) -> None:
+        self.memories.pop(session_id, None)
+
+
+class ApiTarget:
+    """Drives POST /sessions/{id}/turns of the HTTP API, in-process (ASGI) or over the network."""
+
+    def __init__(self, client: httpx.AsyncClient):
+        self.client = client
+        self.stages: Dict[str, str] = {}
+
+    async def turn(self, session_id: str, utterance: str, recorder: Recorder) -> str:
+        stage = self.stages.get(session_id, "start")
+        start = time.perf_counter()
+        try:
+            response = await self.client.post(f"/sessions/{session_id}/turns", json={"message": utterance})
+        finally:
+            recorder.add(f"turn.{stage}", time.perf_counter() - start)
+        for phase, duration in parse_server_timing(response.headers.get("server-timing", "")):
+            if phase != "total":
+                recorder.add(f"server.{phase}", duration)
+        if response.status_code != 200:
+            raise RuntimeError(f"HTTP {response.status_code}: {response.text[:200]}")
+        self.stages[session_id] = response.json()["stage"]
+        return self.stages[session_id]
+
+    def end_session(self, session_id: str) -> None:
+        self.stages.pop(session_id, None)
+
+
+def parse_server_timing(header: str) -> List[Tuple[str, float]]:
+    """``load;dur=1.2, turn;dur=30.5`` -> [("load", 0.0012), ("turn", 0.0305)]"""
+    phases = []
+    for part in filter(None, (p.strip() for p in header.split(","))):
+        name, _, params = part.partition(";")
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "dur":
+                phases.append((name, float(value) / 1000))
+    return phases
+
+
+async def run_session(
+    target: Any, recorder: Recorder, deadline: float, think: Callable[[], float], repeat: bool
+) -> None:
+    """One synthetic user: replay the conversation (again and again when ``repeat``) until the deadline."""
+    session_id = f"load-{uuid.uuid4().hex[:12]}"
+    recorder.in_flight += 1
+    recorder.max_in_flight = max(recorder.max_in_flight, recorder.in_flight)
+    try:
+        while time.perf_counter() < deadline:
+            for label, utterance, _ in CONVERSATION:
+                try:
+                    await target.turn(session_id, utterance, recorder)
+                    recorder.turns += 1
+                except Exception as e:
+                    recorder.count(f"error.{label}")
+                    loguru_logger.debug(f"Turn '{label}' of {session_id} failed: {e}")
+                    target.end_session(session_id)
+                    break
+                delay = think()
+                if delay:
+                    await asyncio.sleep(delay)
+            else:
+                recorder.conversations += 1
+            if not repeat:
+                break
+    finally:
+        recorder.in_flight -= 1
+        target.end_session(session_id)
+
+
+async def drive(target: Any, args: argparse.Namespace, users: int, recorder: Recorder, rng: random.Random) -> float:
+    """Run one load phase; returns the wall time in seconds."""
+    think = latency_sampler(args.think_time, rng)
+    start = time.perf_counter()
+    deadline = start + args.duration
+    if not args.arrival_rate:
+        await asyncio.gather(*(run_session(target, recorder, deadline, think, repeat=True) for _ in range(users)))
+        return time.perf_counter() - start
+
+    slots = asyncio.Semaphore(users)
+    tasks = set()
+
+    async def arrival() -> None:
+        async with slots:
+            await run_session(target, recorder, float("inf"), think, repeat=False)
+
+    while time.perf_counter() < deadline:
+        if slots.locked():
+            recorder.count("arrivals.dropped")
+        else:
+            task = asyncio.create_task(arrival())
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        await asyncio.sleep(rng.expovariate(args.arrival_rate))
+    if tasks:
+        await asyncio.gather(*tasks)
+    return time.perf_counter() - start
+
+
+def percentile(ordered: List[float], p: float) -> float:
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+def summarize(recorder: Recorder, elapsed: float) -> Dict[str, Any]:
+    metrics = {}
+    for name, samples in recorder.samples.items():
+        ordered = sorted(samples)
+        metrics[name] = {
+            "n": len(ordered),
+            **{f"p{p}_ms": percentile(ordered, p) * 1000 for p in PERCENTILES},
+            "max_ms": ordered[-1] * 1000,
+        }
+    return {
+        "elapsed_s": elapsed,
+        "turns": recorder.turns,
+        "conversations": recorder.conversations,
+        "turns_per_s": recorder.turns / elapsed if elapsed else 0.0,
+        "max_in_flight": recorder.max_in_flight,
+        "counts": dict(recorder.counts),
+        "metrics": metrics,
+    }
+
+
+def report(summary: Dict[str, Any]) -> None:
+    print(f"{summary['turns']} turns, {summary['conversations']} conversations in {summary['elapsed_s']:.1f}s "
+          f"({summary['turns_per_s']:.1f} turns/s, peak {summary['max_in_flight']} sessions)")
+    print(f"{'metric':<32} {'n':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for name in sorted(summary["metrics"], key=lambda n: (n.split(".")[0], n)):
+        stats = summary["metrics"][name]
+        print(f"{name:<32} {stats['n']:>7} {stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} "
+              f"{stats['p99_ms']:>9.1f} {stats['max_ms']:>9.1f}")
+    if summary["counts"]:
+        print("counts: " + ", ".join(f"{name}={count}" for name, count in sorted(summary["counts"].items())))
+
+
+def report_sweep(rows: List[Tuple[int, Dict[str, Any]]]) -> None:
+    print(f"\n{'users':>6} {'turns/s':>9} {'turn p50':>9} {'turn p95':>9} {'turn p99':>9} {'errors':>7}")
+    for users, summary in rows:
+        turn_samples = sorted(
+            value for name, values in summary["samples"].items() if name.startswith("turn.") for value in values
+        )
+        errors = sum(count for name, count in summary["counts"].items() if name.startswith("error."))
+        cells = [percentile(turn_samples, p) * 1000 for p in PERCENTILES] if turn_samples else [0.0] * 3
+        print(f"{users:>6} {summary['turns_per_s']:>9.1f} {cells[0]:>9.1f} {cells[1]:>9.1f} {cells[2]:>9.1f} {errors:>7}")
+
+
+async def run(args: argparse.Namespace) -> List[Tuple[int, Dict[str, Any]]]:
+    rng = random.Random(args.seed)
+    recorder = Recorder()
+    remote = args.target == "api" and args.url
+    if not remote:
+        install_llms(args, recorder, rng)
+        if args.icc == "standin":
+            await startup_http_client(httpx.ASGITransport(app=create_standin_app(config_from_args(args))))
+        instrument_http_client(get_http_client(), recorder)
+
+    rows = []
+    try:
+        if args.target == "router":
+            for users in args.sweep or [args.users]:
+                rows.append((users, await measure(RouterTarget(), args, users, recorder, rng)))
+        elif remote:
+            async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout) as client:
+                for users in args.sweep or [args.users]:
+                    rows.append((users, await measure(ApiTarget(client), args, users, recorder, rng)))
+        else:
+            from src.api.server import create_app
+
+            app = create_app()
+            # The lifespan reuses the pooled client built above (same transport and event hooks)
+            async with app.router.lifespan_context(app):
+                transport = httpx.ASGITransport(app=app)
+                async with httpx.AsyncClient(transport=transport, base_url="http://api", timeout=args.timeout) as client:
+                    for users in args.sweep or [args.users]:
+                        rows.append((users, await measure(ApiTarget(client), args, users, recorder, rng)))
+    finally:
+        await shutdown_http_client()
+    return rows
+
+
+async def measure(target: Any, args: argparse.Namespace, users: int, recorder: Recorder, rng: random.Random) -> Dict[str, Any]:
+    recorder.reset()
+    elapsed = await drive(target, args, users, recorder, rng)
+    summary = summarize(recorder, elapsed)
+    summary["samples"] = dict(recorder.samples)
+    print(f"\n=== {users} users, {args.target} target ===")
+    report(summary)
+    return summary
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", choices=("router", "api"), default="router")
+    parser.add_argument("--url", default=None, help="base URL of a running API server (api target)")
+    parser.add_argument("--users", type=int, default=20, help="simultaneous sessions (cap for open-loop arrivals)")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds to generate load")
+    parser.add_argument("--arrival-rate", type=float, default=0.0, help="new sessions per second (0 = closed loop)")
+    parser.add_argument("--think-time", default="none", help="pause between turns, latency spec in ms (e.g. uniform:500,2000)")
+    parser.add_argument("--sweep", default=None, help="comma-separated user counts to run one after another")
+    parser.add_argument("--timeout", type=float, default=300.0, help="HTTP timeout for the api target")
+    parser.add_argument("--llm", choices=("scripted", "standin", "real"), default="scripted")
+    parser.add_argument("--llm-latency", default="lognormal:800,0.3",
+                        help="scripted model latency / stand-in time to first token, latency spec (ms)")
+    parser.add_argument("--llm-tps", type=float, default=30.0, help="stand-in tokens per second")
+    parser.add_argument("--llm-parallel", type=int, default=0, help="stand-in concurrent generations (0 = unlimited)")
+    parser.add_argument("--sql-cache", action="store_true", help="keep the SQL generation cache enabled")
+    parser.add_argument("--icc", choices=("standin", "real"), default="standin")
+    parser.add_argument("--icc-latency", dest="latency", action="append", default=[], metavar="ENDPOINT=SPEC",
+                        help="stand-in latency, e.g. query=lognormal:80,0.4 (ms)")
+    parser.add_argument("--icc-error-rate", dest="error_rate", action="append", default=[],
+                        metavar="ENDPOINT=RATE[@STATUS]", help="stand-in error injection, e.g. job=0.02@502")
+    parser.add_argument("--icc-rate-limit", dest="rate_limit", action="append", default=[],
+                        metavar="ENDPOINT=RPS[:BURST]", help="stand-in rate limit, e.g. query=50:100")
+    parser.add_argument("--icc-columns", dest="columns", default="from-sql", help="stand-in column generator")
+    parser.add_argument("--seed", type=int, default=None, help="seed for think times, model and ICC latencies")
+    parser.add_argument("--json", default=None, help="also write the summaries to this file")
+    parser.set_defaults(token_ttl=StandinConfig.token_ttl, require_auth=False)
+    args = parser.parse_args()
+    args.sweep = [int(users) for users in args.sweep.split(",")] if args.sweep else None
+
+    # Keep per-turn log lines out of the measurements and the report
+    logging.disable(logging.WARNING)
+    loguru_logger.remove()
+    loguru_logger.add(sys.stderr, level="ERROR")
+
+    rows = asyncio.run(run(args))
+    if len(rows) > 1:
+        report_sweep(rows)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump([
+                {"users": users, **{key: value for key, value in summary.items() if key != "samples"}}
+                for users, summary in rows
+            ], f, indent=2)
+        print(f"\nWrote {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
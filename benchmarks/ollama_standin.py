@@ -0,0 +1,464 @@
+"""
+Local stand-in for the Ollama API, for reproducible LLM benchmarks on any box.
+
+Speaks the parts of the Ollama HTTP API that ChatOllama uses:
+
+    POST /api/chat        messages -> message, NDJSON stream or one JSON object ("stream": false)
+    POST /api/generate    prompt -> response, same streaming rules
+    GET  /api/tags, POST /api/show, GET /api/version, GET /
+
+Answers come from a script: rules matched in order against the model name
+(glob), the system prompt and the last user message (regexes); the first
+match wins. Each answer is split into word-sized tokens. The first one is
+sent after a sampled time to first token (plus prompt-size / --prefill-tps),
+and the rest follow at --tps tokens per second. Rules can override both.
+--parallel caps concurrent generations like OLLAMA_NUM_PARALLEL; queued
+requests wait for a slot, so the queueing shows up in their TTFT.
+``GET /_standin/stats`` reports requests, rule hits and concurrency;
+``POST /_standin/reset`` clears the counters.
+
+The built-in script answers the SQL agent with the bench_router query and
+the job agent with an ASK action. A script file is JSON:
+
+    {"rules": [
+        {"system": "SQL query generator", "match": "orders",
+         "response": {"sql": "SELECT * FROM orders", "reasoning": "all orders"}, "tps": 15},
+        {"model": "qwen3:*", "response": "{\\"action\\": \\"ASK\\", \\"question\\": \\"Which table?\\", \\"params\\": {}}"}
+     ],
+     "default": "OK"}
+
+Serve it and point the agents at it:
+
+    PYTHONPATH=. python benchmarks/ollama_standin.py --port 11435 --ttft lognormal:400,0.3 --tps 25 --parallel 2
+    OLLAMA_BASE_URL=http://localhost:11435
+
+Or in-process, without sockets (httpx.ASGITransport buffers whole responses,
+so StreamingASGITransport is used to keep tokens arriving one by one):
+
+    app = create_ollama_standin_app(OllamaStandinConfig(...))
+    transport = StreamingASGITransport(app)
+    ChatOllama(model=..., base_url="http://ollama", async_client_kwargs={"transport": transport})
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from fnmatch import fnmatchcase
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+import httpx
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from icc_standin import latency_sampler
+
+# bench_router's query: valid against the sample schema for oracle_10
+DEFAULT_SQL = "SELECT c.first_name, c.country FROM customers c WHERE c.country = 'USA'"
+
+TOKEN_PATTERN = re.compile(r"\s*(?:\w+|[^\w\s])|\s+")
+
+
+@dataclass
+class ScriptRule:
+    """One scripted answer; empty patterns match anything."""
+    response: str
+    model: str = ""  # glob on the model name
+    system: str = ""  # regex searched in the system prompt
+    match: str = ""  # regex searched in the last user message
+    ttft: Optional[str] = None  # latency spec (ms) overriding the server default
+    tps: Optional[float] = None  # tokens per second overriding the server default
+
+    def __post_init__(self):
+        self._system = re.compile(self.system, re.IGNORECASE | re.DOTALL) if self.system else None
+        self._match = re.compile(self.match, re.IGNORECASE | re.DOTALL) if self.match else None
+
+    def matches(self, model: str, system: str, user: str) -> bool:
+        if self.model and not fnmatchcase(model, self.model):
+            return False
+        if self._system is not None and not self._system.search(system):
+            return False
+        return self._match is None or bool(self._match.search(user))
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ScriptRule":
+        response = data["response"]
+        if not isinstance(response, str):
+            response = json.dumps(response)
+        return cls(
+            response=response,
+            model=data.get("model", ""),
+            system=data.get("system", ""),
+            match=data.get("match", ""),
+            ttft=data.get("ttft"),
+            tps=data.get("tps"),
+        )
+
+
+def default_rules() -> List[ScriptRule]:
+    return [
+        ScriptRule(
+            system="SQL query generator",
+            response=json.dumps({"sql": DEFAULT_SQL, "reasoning": "Filter customers by country"}),
+        ),
+        ScriptRule(
+            system="parameter extraction",
+            response=json.dumps({"action": "ASK", "question": "Which table should I write to?", "params": {}}),
+        ),
+    ]
+
+
+@dataclass
+class OllamaStandinConfig:
+    """Stand-in server settings."""
+    rules: List[ScriptRule] = field(default_factory=default_rules)
+    default_response: str = "OK"
+    ttft: str = "fixed:300"  # time to first token, latency spec in ms
+    tps: float = 30.0  # generated tokens per second
+    prefill_tps: float = 0.0  # prompt tokens per second added to the TTFT, 0 to ignore prompt size
+    parallel: int = 0  # concurrent generations, 0 for unlimited
+    seed: Optional[int] = None
+
+    @classmethod
+    def load_script(cls, path: str, **settings: Any) -> "OllamaStandinConfig":
+        with open(path, encoding="utf-8") as f:
+            script = json.load(f)
+        if isinstance(script, list):
+            script = {"rules": script}
+        return cls(
+            rules=[ScriptRule.from_dict(rule) for rule in script.get("rules", [])],
+            default_response=script.get("default", cls.default_response),
+            **settings,
+        )
+
+
+def split_tokens(text: str) -> List[str]:
+    """Word-sized pieces (leading whitespace attached) that join back to ``text``."""
+    return TOKEN_PATTERN.findall(text)
+
+
+def count_tokens(text: str) -> int:
+    return len(split_tokens(text))
+
+
+def now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+class OllamaStandin:
+    """Script lookup, pacing and counters shared by the request handlers."""
+
+    def __init__(self, config: OllamaStandinConfig):
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.ttft = latency_sampler(config.ttft, self.rng)
+        self.rule_ttft = {id(rule): latency_sampler(rule.ttft, self.rng) for rule in config.rules if rule.ttft}
+        self.slots = asyncio.Semaphore(config.parallel) if config.parallel else None
+        self.reset()
+
+    def reset(self) -> None:
+        self.started = time.monotonic()
+        self.requests: Dict[str, int] = defaultdict(int)
+        self.rule_hits: Dict[str, int] = defaultdict(int)
+        self.generated_tokens = 0
+        self.waiting = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def answer(self, model: str, system: str, user: str) -> Tuple[str, Callable[[], float], float, str]:
+        """Scripted response, TTFT sampler, tokens/sec and the name of the rule that matched."""
+        for position, rule in enumerate(self.config.rules):
+            if rule.matches(model, system, user):
+                ttft = self.rule_ttft.get(id(rule), self.ttft)
+                return rule.response, ttft, rule.tps or self.config.tps, f"rule_{position}"
+        return self.config.default_response, self.ttft, self.config.tps, "default"
+
+    async def generate(self, model: str, system: str, user: str, prompt_tokens: int) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Yield (token, {}) pieces paced like a model server, then ("", timings) with Ollama's duration fields.
+        """
+        response, ttft, tps, rule = self.answer(model, system, user)
+        self.requests[model] += 1
+        self.rule_hits[rule] += 1
+
+        start = time.perf_counter()
+        self.waiting += 1
+        try:
+            if self.slots is not None:
+                await self.slots.acquire()
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            load_done = time.perf_counter()
+            prefill = prompt_tokens / self.config.prefill_tps if self.config.prefill_tps else 0.0
+            await asyncio.sleep(ttft() + prefill)
+            prompt_done = time.perf_counter()
+
+            tokens = split_tokens(response)
+            for position, token in enumerate(tokens):
+                if position and tps:
+                    # Sleep to the token's scheduled time so timer overshoot does not accumulate
+                    delay = prompt_done + position / tps - time.perf_counter()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                yield token, {}
+            self.generated_tokens += len(tokens)
+            end = time.perf_counter()
+        finally:
+            self.in_flight -= 1
+            if self.slots is not None:
+                self.slots.release()
+
+        yield "", {
+            "done_reason": "stop",
+            "total_duration": int((end - start) * 1e9),
+            "load_duration": int((load_done - start) * 1e9),
+            "prompt_eval_count": prompt_tokens,
+            "prompt_eval_duration": int((prompt_done - load_done) * 1e9),
+            "eval_count": len(tokens),
+            "eval_duration": int((end - prompt_done) * 1e9),
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        elapsed = time.monotonic() - self.started
+        total = sum(self.requests.values())
+        return {
+            "uptime": elapsed,
+            "requests": total,
+            "rps": total / elapsed if elapsed else 0.0,
+            "by_model": dict(self.requests),
+            "rule_hits": dict(self.rule_hits),
+            "generated_tokens": self.generated_tokens,
+            "waiting": self.waiting,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+        }
+
+
+def message_text(message: Dict[str, Any]) -> str:
+    content = message.get("content") or ""
+    return content if isinstance(content, str) else json.dumps(content)
+
+
+async def stream_or_collect(
+    body: Dict[str, Any], pieces: AsyncIterator[Tuple[str, Dict[str, Any]]], shape: Callable[[str], Dict[str, Any]]
+) -> Response:
+    """NDJSON chunks when streaming (Ollama's default), otherwise one object once generation is done."""
+    model = body.get("model", "")
+
+    if body.get("stream", True):
+        async def ndjson() -> AsyncIterator[str]:
+            async for token, final in pieces:
+                line = {"model": model, "created_at": now_iso(), **shape(token), "done": bool(final), **final}
+                yield json.dumps(line) + "\n"
+
+        return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+    text, final = [], {}
+    async for token, final in pieces:
+        text.append(token)
+    return JSONResponse({"model": model, "created_at": now_iso(), **shape("".join(text)), "done": True, **final})
+
+
+def create_ollama_standin_app(config: Optional[OllamaStandinConfig] = None) -> Starlette:
+    """Build the stand-in ASGI app."""
+    standin = OllamaStandin(config or OllamaStandinConfig())
+
+    async def read_body(request: Request) -> Dict[str, Any]:
+        try:
+            body = await request.json()
+        except json.JSONDecodeError:
+            body = None
+        if not isinstance(body, dict) or not body.get("model"):
+            raise ValueError("model is required")
+        return body
+
+    async def chat(request: Request) -> Response:
+        try:
+            body = await read_body(request)
+        except ValueError as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
+        messages = body.get("messages") or []
+        system = "\n".join(message_text(m) for m in messages if m.get("role") == "system")
+        users = [message_text(m) for m in messages if m.get("role") == "user"]
+        prompt_tokens = sum(count_tokens(message_text(m)) for m in messages)
+        pieces = standin.generate(body["model"], system, users[-1] if users else "", prompt_tokens)
+        return await stream_or_collect(body, pieces, lambda text: {"message": {"role": "assistant", "content": text}})
+
+    async def generate(request: Request) -> Response:
+        try:
+            body = await read_body(request)
+        except ValueError as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
+        system, prompt = body.get("system") or "", body.get("prompt") or ""
+        pieces = standin.generate(body["model"], system, prompt, count_tokens(system) + count_tokens(prompt))
+        return await stream_or_collect(body, pieces, lambda text: {"response": text})
+
+    async def tags(request: Request) -> Response:
+        names = sorted(set(standin.requests) | {rule.model for rule in standin.config.rules if rule.model and "*" not in rule.model})
+        return JSONResponse({"models": [
+            {"name": name, "model": name, "modified_at": now_iso(), "size": 0, "digest": "", "details": {}}
+            for name in names
+        ]})
+
+    async def show(request: Request) -> Response:
+        return JSONResponse({
+            "modelfile": "", "parameters": "", "template": "{{ .Prompt }}",
+            "details": {"format": "standin", "family": "standin", "parameter_size": "0", "quantization_level": ""},
+            "model_info": {}, "capabilities": ["completion"],
+        })
+
+    async def version(request: Request) -> Response:
+        return JSONResponse({"version": "0.0.0-standin"})
+
+    async def root(request: Request) -> Response:
+        return PlainTextResponse("Ollama is running")
+
+    async def stats(request: Request) -> Response:
+        return JSONResponse(standin.stats())
+
+    async def reset(request: Request) -> Response:
+        standin.reset()
+        return JSONResponse({"status": "reset"})
+
+    app = Starlette(routes=[
+        Route("/", root, methods=["GET", "HEAD"]),
+        Route("/api/chat", chat, methods=["POST"]),
+        Route("/api/generate", generate, methods=["POST"]),
+        Route("/api/tags", tags, methods=["GET"]),
+        Route("/api/show", show, methods=["POST"]),
+        Route("/api/version", version, methods=["GET"]),
+        Route("/_standin/stats", stats, methods=["GET"]),
+        Route("/_standin/reset", reset, methods=["POST"]),
+    ])
+    app.state.standin = standin
+    return app
+
+
+class _QueueStream(httpx.AsyncByteStream):
+    """Response body fed by the app's send() as it produces it."""
+
+    def __init__(self, chunks: "asyncio.Queue[Optional[bytes]]", task: "asyncio.Task[None]", disconnected: asyncio.Event):
+        self._chunks = chunks
+        self._task = task
+        self._disconnected = disconnected
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        while (chunk := await self._chunks.get()) is not None:
+            yield chunk
+
+    async def aclose(self) -> None:
+        self._disconnected.set()
+        if not self._task.done():
+            self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+
+class StreamingASGITransport(httpx.AsyncBaseTransport):
+    """
+    In-process ASGI transport that hands the response over as soon as headers
+    are sent and streams the body chunk by chunk (httpx.ASGITransport waits
+    for the whole body first, which hides time to first token).
+    """
+
+    def __init__(self, app: Any):
+        self.app = app
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        body = b"".join([chunk async for chunk in request.stream])
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": request.method,
+            "headers": [(key.lower(), value) for key, value in request.headers.raw],
+            "scheme": request.url.scheme,
+            "path": request.url.path,
+            "raw_path": request.url.raw_path.split(b"?")[0],
+            "query_string": request.url.query,
+            "server": (request.url.host, request.url.port),
+            "client": ("127.0.0.1", 123),
+            "root_path": "",
+        }
+        chunks: asyncio.Queue[Optional[bytes]] = asyncio.Queue()
+        started = asyncio.Event()
+        disconnected = asyncio.Event()
+        start_message: Dict[str, Any] = {}
+        request_sent = False
+
+        async def receive() -> Dict[str, Any]:
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                start_message.update(message)
+                started.set()
+            elif message["type"] == "http.response.body":
+                if message.get("body"):
+                    await chunks.put(message["body"])
+                if not message.get("more_body", False):
+                    await chunks.put(None)
+
+        async def run_app() -> None:
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                started.set()
+                await chunks.put(None)
+
+        task = asyncio.create_task(run_app())
+        await started.wait()
+        if not start_message:
+            await task  # raises the app's exception
+            raise RuntimeError("ASGI app returned without starting a response")
+        return httpx.Response(
+            status_code=start_message["status"],
+            headers=start_message.get("headers", []),
+            stream=_QueueStream(chunks, task, disconnected),
+        )
+
+
+def config_from_args(args: argparse.Namespace) -> OllamaStandinConfig:
+    settings = dict(ttft=args.ttft, tps=args.tps, prefill_tps=args.prefill_tps, parallel=args.parallel, seed=args.seed)
+    if args.script:
+        return OllamaStandinConfig.load_script(args.script, **settings)
+    return OllamaStandinConfig(**settings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--script", default=None, help="JSON script of rules (default: answers for the router's agents)")
+    parser.add_argument("--ttft", default="fixed:300", help="time to first token, latency spec in ms")
+    parser.add_argument("--tps", type=float, default=30.0, help="generated tokens per second (0 = all at once)")
+    parser.add_argument("--prefill-tps", type=float, default=0.0, help="prompt tokens per second added to the TTFT")
+    parser.add_argument("--parallel", type=int, default=0, help="concurrent generations (0 = unlimited)")
+    parser.add_argument("--seed", type=int, default=None, help="seed for the TTFT samples")
+    args = parser.parse_args()
+
+    try:
+        import uvicorn
+    except ImportError:
+        raise SystemExit("uvicorn is required to serve the stand-in: pip install uvicorn")
+    uvicorn.run(create_ollama_standin_app(config_from_args(args)), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
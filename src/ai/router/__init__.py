@@ -1,7 +1,13 @@
 """
 Router module - staged conversation router for ICC agent.
 """
-from src.ai.router.router import handle_turn
+from src.ai.router.router import handle_turn, handle_turn_stream, TurnEvent
 from src.ai.router.memory import Memory, Stage
+from src.ai.router.memory_store import MemoryStore, VersionConflictError, build_memory_store
+from src.ai.router.turn_store import TurnStore, TurnState, build_turn_store
 
-__all__ = ["handle_turn", "Memory", "Stage"]
+__all__ = [
+    "handle_turn", "handle_turn_stream", "TurnEvent", "Memory", "Stage",
+    "MemoryStore", "VersionConflictError", "build_memory_store",
+    "TurnStore", "TurnState", "build_turn_store",
+]
@@ -2,13 +2,17 @@
 Job parameter agent - extracts parameters and asks clarifying questions.
 This agent knows how to gather required parameters for each tool.
 """
+import asyncio
 import os
 from langchain_ollama import ChatOllama
-from langchain_core.messages import HumanMessage, SystemMessage
-from typing import Dict, Any, Optional
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+from typing import Dict, Any, List, Optional
 import json
 import logging
 from src.ai.router.memory import Memory
+from src.ai.router.slot_filler import REQUIRED_SLOTS, SlotFiller
+from src.utils.config import LLM_CONFIG
+from src.utils.tracing import SPAN_KIND_CLIENT, current_span, span
 
 logger = logging.getLogger(__name__)
 
@@ -63,6 +67,11 @@ DO NOT ask for parameters that belong to a different tool!
 """
 
 
+# Tools whose parameters are fully determined by Memory (read_sql: query from the
+# SQL agent, connection set externally). The model is never consulted for these.
+MEMORY_RESOLVED_TOOLS = frozenset({"read_sql"})
+
+
 class JobAgent:
     """Agent that gathers parameters and determines when to invoke tools."""
     
@@ -70,8 +79,36 @@ class JobAgent:
         self.llm = ChatOllama(
             model=os.getenv("MODEL_NAME", "qwen3:1.7b"),
             temperature=0.3,
-            base_url="http://localhost:11434",
+            base_url=LLM_CONFIG["base_url"],
         )
+        self.slot_filler = SlotFiller()
+        self.llm_calls = 0
+        self.llm_calls_avoided = 0
+    
+    def _resolve_without_llm(self, memory: Memory, tool_name: str, user_input: str) -> Optional[Dict[str, Any]]:
+        """Return the action directly if it does not need the model, otherwise None."""
+        if tool_name in MEMORY_RESOLVED_TOOLS:
+            self.llm_calls_avoided += 1
+            logger.info(f"⚡ Job Agent: '{tool_name}' params come from memory, skipping LLM")
+            return self._fallback_param_check(memory, tool_name, user_input)
+        
+        if tool_name in REQUIRED_SLOTS:
+            extraction = self.slot_filler.fill(memory, tool_name, user_input)
+            if not extraction.ambiguous and not self.slot_filler.missing_slots(memory, tool_name):
+                self.llm_calls_avoided += 1
+                logger.info(f"⚡ Job Agent: all '{tool_name}' slots filled by rules, skipping LLM")
+                return self._fallback_param_check(memory, tool_name, user_input)
+        
+        self.llm_calls += 1
+        return None
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return how many LLM calls were made and avoided, plus per-slot fast-path stats."""
+        return {
+            "llm_calls": self.llm_calls,
+            "llm_calls_avoided": self.llm_calls_avoided,
+            "slots": self.slot_filler.stats(),
+        }
     
     def gather_params(
         self,
@@ -82,10 +119,45 @@ class JobAgent:
         """
         Extract parameters from user input and determine next action.
         
+        Blocking variant for scripts; the router uses ``agather_params``.
+        
+        Args:
+            memory: Conversation memory with context
+            user_input: Latest user message
+            tool_name: Which tool we're gathering params for
+            
+        Returns:
+            Dict with action (ASK/TOOL/FINISH), question, params, etc.
+        """
+        logger.info(f"🔍 Job Agent: Gathering params for '{tool_name}'")
+        logger.info(f"📋 Current params: {memory.gathered_params}")
+        
+        resolved = self._resolve_without_llm(memory, tool_name, user_input)
+        if resolved is not None:
+            return resolved
+        
+        try:
+            response = self.llm.invoke(self._build_messages(memory, user_input, tool_name))
+            return self._handle_response(response.content, memory, tool_name, user_input)
+        except Exception as e:
+            logger.error(f"❌ Job Agent error: {str(e)}")
+            return self._fallback_param_check(memory, tool_name, user_input)
+    
+    async def agather_params(
+        self,
+        memory: Memory,
+        user_input: str,
+        tool_name: str,
+        timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Extract parameters from user input without blocking the event loop.
+        
         Args:
             memory: Conversation memory with context
             user_input: Latest user message
             tool_name: Which tool we're gathering params for
+            timeout: Seconds to wait for the model, defaults to LLM_CONFIG["timeout"]
             
         Returns:
             Dict with action (ASK/TOOL/FINISH), question, params, etc.
@@ -93,6 +165,35 @@ class JobAgent:
         logger.info(f"🔍 Job Agent: Gathering params for '{tool_name}'")
         logger.info(f"📋 Current params: {memory.gathered_params}")
         
+        resolved = self._resolve_without_llm(memory, tool_name, user_input)
+        current_span().set_attribute("job_agent.llm_skipped", resolved is not None)
+        if resolved is not None:
+            return resolved
+        
+        timeout = timeout or LLM_CONFIG["timeout"]
+        
+        try:
+            llm_attributes = {"llm.model": self.llm.model, "llm.tool": tool_name}
+            with span("llm.job_agent.gather_params", kind=SPAN_KIND_CLIENT, **llm_attributes) as llm_span:
+                # wait_for cancels the generation on timeout; caller cancellation propagates as usual
+                response = await asyncio.wait_for(
+                    self.llm.ainvoke(self._build_messages(memory, user_input, tool_name)),
+                    timeout=timeout,
+                )
+                if llm_span.recording:
+                    llm_span.set_attributes({
+                        "llm.prompt_tokens": response.response_metadata.get("prompt_eval_count"),
+                        "llm.completion_tokens": response.response_metadata.get("eval_count"),
+                    })
+            return self._handle_response(response.content, memory, tool_name, user_input)
+        except asyncio.TimeoutError:
+            logger.error(f"❌ Job Agent timed out after {timeout}s")
+            return self._fallback_param_check(memory, tool_name, user_input)
+        except Exception as e:
+            logger.error(f"❌ Job Agent error: {str(e)}")
+            return self._fallback_param_check(memory, tool_name, user_input)
+    
+    def _build_messages(self, memory: Memory, user_input: str, tool_name: str) -> List[BaseMessage]:
         # Build context
         context = {
             "tool_name": tool_name,
@@ -104,54 +205,46 @@ class JobAgent:
         
         context_str = json.dumps(context, indent=2)
         
+        return [
+            SystemMessage(content=PARAMETER_EXTRACTION_PROMPT),
+            HumanMessage(content=f"Context:\n{context_str}\n\nUser input: {user_input}")
+        ]
+    
+    def _handle_response(self, content: str, memory: Memory, tool_name: str, user_input: str) -> Dict[str, Any]:
+        """Parse the model output, merge extracted params into memory and pick the next action."""
+        content = content.strip()
+        
+        logger.info(f"🤖 Job Agent raw response: {content[:300]}...")
+        
+        # Parse JSON response
         try:
-            messages = [
-                SystemMessage(content=PARAMETER_EXTRACTION_PROMPT),
-                HumanMessage(content=f"Context:\n{context_str}\n\nUser input: {user_input}")
-            ]
+            # Clean markdown if present
+            if "```json" in content:
+                content = content.split("```json")[1].split("```")[0].strip()
+            elif "```" in content:
+                content = content.split("```")[1].split("```")[0].strip()
             
-            response = self.llm.invoke(messages)
-            content = response.content.strip()
+            result = json.loads(content)
             
-            logger.info(f"🤖 Job Agent raw response: {content[:300]}...")
+            # Normalize: if LLM returns "message" instead of "question", fix it
+            if "message" in result and "question" not in result:
+                result["question"] = result["message"]
             
-            # Parse JSON response
-            try:
-                # Clean markdown if present
-                if "```json" in content:
-                    content = content.split("```json")[1].split("```")[0].strip()
-                elif "```" in content:
-                    content = content.split("```")[1].split("```")[0].strip()
-                
-                result = json.loads(content)
-                
-                # Normalize: if LLM returns "message" instead of "question", fix it
-                if "message" in result and "question" not in result:
-                    result["question"] = result["message"]
-                
-                # Update gathered params (filter out None values)
-                if "params" in result and result["params"]:
-                    # Only update with non-None values
-                    new_params = {k: v for k, v in result["params"].items() if v is not None}
-                    memory.gathered_params.update(new_params)
-                
-                # For read_sql, always use fallback to ensure we use memory.connection
-                if tool_name == "read_sql":
-                    return self._fallback_param_check(memory, tool_name, user_input)
-                
-                logger.info(f"✅ Job Agent action: {result.get('action')}")
-                
-                return result
-                
-            except json.JSONDecodeError as e:
-                logger.error(f"❌ Job Agent: Could not parse JSON: {e}")
-                logger.error(f"Raw content: {content}")
-                
-                # Fallback: Ask for parameters manually
-                return self._fallback_param_check(memory, tool_name, user_input)
-                
-        except Exception as e:
-            logger.error(f"❌ Job Agent error: {str(e)}")
+            # Update gathered params (filter out None values)
+            if "params" in result and result["params"]:
+                # Only update with non-None values
+                new_params = {k: v for k, v in result["params"].items() if v is not None}
+                memory.gathered_params.update(new_params)
+            
+            logger.info(f"✅ Job Agent action: {result.get('action')}")
+            
+            return result
+            
+        except json.JSONDecodeError as e:
+            logger.error(f"❌ Job Agent: Could not parse JSON: {e}")
+            logger.error(f"Raw content: {content}")
+            
+            # Fallback: Ask for parameters manually
             return self._fallback_param_check(memory, tool_name, user_input)
     
     def _fallback_param_check(self, memory: Memory, tool_name: str, user_input: str = "") -> Dict[str, Any]:
@@ -175,17 +268,20 @@ class JobAgent:
             if not params.get("table"):
                 return {
                     "action": "ASK",
-                    "question": "What table should I write the data to?"
+                    "question": "What table should I write the data to?",
+                    "slot": "table"
                 }
             if not params.get("connection"):
                 return {
                     "action": "ASK",
-                    "question": "What database connection should I use for writing?"
+                    "question": "What database connection should I use for writing?",
+                    "slot": "connection"
                 }
             if not params.get("drop_or_truncate"):
                 return {
                     "action": "ASK",
-                    "question": "Should I 'drop' (remove and recreate), 'truncate' (clear data), or 'none' (append)?"
+                    "question": "Should I 'drop' (remove and recreate), 'truncate' (clear data), or 'none' (append)?",
+                    "slot": "drop_or_truncate"
                 }
             # Have all params
             return {
@@ -198,12 +294,14 @@ class JobAgent:
             if not params.get("to"):
                 return {
                     "action": "ASK",
-                    "question": "Who should I send the email to?"
+                    "question": "Who should I send the email to?",
+                    "slot": "to"
                 }
             if not params.get("subject"):
                 return {
                     "action": "ASK",
-                    "question": "What should the email subject be?"
+                    "question": "What should the email subject be?",
+                    "slot": "subject"
                 }
             # Have enough params
             return {
@@ -235,3 +333,29 @@ def call_job_agent(memory: Memory, user_input: str, tool_name: str = "read_sql")
         Action dict with next steps
     """
     return job_agent.gather_params(memory, user_input, tool_name)
+
+
+async def acall_job_agent(
+    memory: Memory,
+    user_input: str,
+    tool_name: str = "read_sql",
+    timeout: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Call the job parameter agent without blocking the event loop.
+    
+    Args:
+        memory: Conversation memory
+        user_input: User's message
+        tool_name: Tool we're gathering params for
+        timeout: Seconds to wait for the model, defaults to LLM_CONFIG["timeout"]
+        
+    Returns:
+        Action dict with next steps
+    """
+    return await job_agent.agather_params(memory, user_input, tool_name, timeout=timeout)
+
+
+def get_job_agent_stats() -> Dict[str, Any]:
+    """Return how many job agent LLM calls were made and avoided, and how often each slot was filled by rules."""
+    return job_agent.stats()
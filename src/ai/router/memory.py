@@ -1,9 +1,12 @@
 """
 Memory and Stage management for the staged conversation router.
 """
+import json
+import sys
+import zlib
 from enum import Enum
 from dataclasses import dataclass, field
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, Iterable, Tuple
 
 
 class Stage(Enum):
@@ -16,7 +19,25 @@ class Stage(Enum):
     DONE = "done"
 
 
-@dataclass
+# Sessions that ran the same query share one tuple of interned column names
+_interned_columns: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+_INTERNED_COLUMNS_MAX = 4096
+
+
+def intern_columns(columns: Optional[Iterable[str]]) -> Optional[Tuple[str, ...]]:
+    """Return a shared, immutable tuple of interned column names (None stays None)."""
+    if columns is None:
+        return None
+    key = tuple(sys.intern(str(column)) for column in columns)
+    shared = _interned_columns.get(key)
+    if shared is None:
+        if len(_interned_columns) >= _INTERNED_COLUMNS_MAX:
+            _interned_columns.clear()
+        shared = _interned_columns[key] = key
+    return shared
+
+
+@dataclass(slots=True)
 class Memory:
     """
     Conversation memory that persists across turns.
@@ -25,11 +46,17 @@ class Memory:
     stage: Stage = Stage.START
     last_sql: Optional[str] = None
     last_job_id: Optional[str] = None
-    last_columns: Optional[List[str]] = None
+    last_columns: Optional[Tuple[str, ...]] = None  # Assign through set_columns so the tuple is shared
     last_preview: Optional[Dict[str, Any]] = None
     gathered_params: Dict[str, Any] = field(default_factory=dict)
+    pending_tool: Optional[str] = None  # Tool whose parameters we are still asking for
+    pending_slot: Optional[str] = None  # Parameter the last question asked for, if known
     connection: str = "oracle_10"  # Default connection, can be set from UI/config
-    
+
+    def set_columns(self, columns: Optional[Iterable[str]]) -> None:
+        """Store the result columns of the last query as an interned tuple."""
+        self.last_columns = intern_columns(columns)
+
     def reset(self):
         """Reset memory to start a new conversation."""
         self.stage = Stage.START
@@ -38,20 +65,24 @@ class Memory:
         self.last_columns = None
         self.last_preview = None
         self.gathered_params = {}
+        self.pending_tool = None
+        self.pending_slot = None
         # Keep connection as it's set externally
-    
+
     def to_dict(self) -> Dict[str, Any]:
-        """Convert memory to dictionary for serialization."""
+        """Convert memory to a JSON-friendly dictionary (for debugging and the UI)."""
         return {
             "stage": self.stage.value,
             "last_sql": self.last_sql,
             "last_job_id": self.last_job_id,
-            "last_columns": self.last_columns,
+            "last_columns": list(self.last_columns) if self.last_columns is not None else None,
             "last_preview": self.last_preview,
             "gathered_params": self.gathered_params,
+            "pending_tool": self.pending_tool,
+            "pending_slot": self.pending_slot,
             "connection": self.connection
         }
-    
+
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "Memory":
         """Create Memory from dictionary."""
@@ -59,8 +90,203 @@ class Memory:
         memory.stage = Stage(data.get("stage", "start"))
         memory.last_sql = data.get("last_sql")
         memory.last_job_id = data.get("last_job_id")
-        memory.last_columns = data.get("last_columns")
+        memory.set_columns(data.get("last_columns"))
         memory.last_preview = data.get("last_preview")
         memory.gathered_params = data.get("gathered_params", {})
+        memory.pending_tool = data.get("pending_tool")
+        memory.pending_slot = data.get("pending_slot")
         memory.connection = data.get("connection", "oracle_10")
         return memory
+
+    def to_snapshot(self) -> bytes:
+        """Encode memory in the compact binary snapshot format."""
+        return encode_snapshot(self)
+
+    @classmethod
+    def from_snapshot(cls, data: bytes) -> "Memory":
+        """Create Memory from a snapshot made by ``to_snapshot``."""
+        return decode_snapshot(data)
+
+
+# Snapshot layout:
+#
+#   magic b"IM" | format version (1 byte) | codec (1 byte: 0 raw, 1 zlib) | body
+#
+# Version 1 body: stage code, presence flags, connection, then each present
+# optional field in flag order. Strings are varint-length-prefixed UTF-8,
+# last_columns is one string of NUL-separated names (NUL cannot occur in an
+# identifier), and the two free-form dicts (last_preview, gathered_params)
+# are compact JSON strings.
+
+SNAPSHOT_MAGIC = b"IM"
+SNAPSHOT_VERSION = 1
+_CODEC_RAW = 0
+_CODEC_ZLIB = 1
+_COMPRESS_THRESHOLD = 512  # Bodies this large are worth compressing (wide column lists, previews)
+_COLUMN_SEPARATOR = "\x00"
+
+# Stage codes are part of the format: append new stages, never renumber
+_STAGE_CODES = {
+    Stage.START: 0,
+    Stage.NEED_QUERY: 1,
+    Stage.HAVE_SQL: 2,
+    Stage.SHOW_RESULTS: 3,
+    Stage.NEED_WRITE_OR_EMAIL: 4,
+    Stage.DONE: 5,
+}
+_STAGES_BY_CODE = {code: stage for stage, code in _STAGE_CODES.items()}
+
+_HAS_LAST_SQL = 0x01
+_HAS_LAST_JOB_ID = 0x02
+_HAS_LAST_COLUMNS = 0x04
+_HAS_LAST_PREVIEW = 0x08
+_HAS_GATHERED_PARAMS = 0x10
+_HAS_PENDING_TOOL = 0x20
+_HAS_PENDING_SLOT = 0x40
+
+
+def _write_varint(out: bytearray, value: int) -> None:
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _write_str(out: bytearray, value: str) -> None:
+    raw = value.encode("utf-8")
+    _write_varint(out, len(raw))
+    out += raw
+
+
+_encode_json = json.JSONEncoder(separators=(",", ":"), default=str).encode
+
+
+def _write_json(out: bytearray, value: Any) -> None:
+    _write_str(out, _encode_json(value))
+
+
+class _Reader:
+    """Cursor over a snapshot body."""
+    __slots__ = ("data", "pos")
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.pos = 0
+
+    def byte(self) -> int:
+        value = self.data[self.pos]
+        self.pos += 1
+        return value
+
+    def varint(self) -> int:
+        result = shift = 0
+        while True:
+            byte = self.byte()
+            result |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return result
+            shift += 7
+
+    def str(self) -> str:
+        length = self.varint()
+        end = self.pos + length
+        if end > len(self.data):
+            raise ValueError("Truncated memory snapshot")
+        value = self.data[self.pos:end].decode("utf-8")
+        self.pos = end
+        return value
+
+
+def is_snapshot(data: bytes) -> bool:
+    """True if ``data`` is a binary snapshot rather than JSON."""
+    return data[:2] == SNAPSHOT_MAGIC
+
+
+def encode_snapshot(memory: Memory) -> bytes:
+    """Encode Memory as a versioned binary snapshot."""
+    flags = 0
+    if memory.last_sql is not None:
+        flags |= _HAS_LAST_SQL
+    if memory.last_job_id is not None:
+        flags |= _HAS_LAST_JOB_ID
+    if memory.last_columns is not None:
+        flags |= _HAS_LAST_COLUMNS
+    if memory.last_preview is not None:
+        flags |= _HAS_LAST_PREVIEW
+    if memory.gathered_params:
+        flags |= _HAS_GATHERED_PARAMS
+    if memory.pending_tool is not None:
+        flags |= _HAS_PENDING_TOOL
+    if memory.pending_slot is not None:
+        flags |= _HAS_PENDING_SLOT
+
+    body = bytearray((_STAGE_CODES[memory.stage], flags))
+    _write_str(body, memory.connection)
+    if flags & _HAS_LAST_SQL:
+        _write_str(body, memory.last_sql)
+    if flags & _HAS_LAST_JOB_ID:
+        _write_str(body, memory.last_job_id)
+    if flags & _HAS_LAST_COLUMNS:
+        _write_str(body, _COLUMN_SEPARATOR.join(memory.last_columns))
+    if flags & _HAS_LAST_PREVIEW:
+        _write_json(body, memory.last_preview)
+    if flags & _HAS_GATHERED_PARAMS:
+        _write_json(body, memory.gathered_params)
+    if flags & _HAS_PENDING_TOOL:
+        _write_str(body, memory.pending_tool)
+    if flags & _HAS_PENDING_SLOT:
+        _write_str(body, memory.pending_slot)
+
+    codec, payload = _CODEC_RAW, bytes(body)
+    if len(payload) >= _COMPRESS_THRESHOLD:
+        compressed = zlib.compress(payload, 1)
+        if len(compressed) < len(payload):
+            codec, payload = _CODEC_ZLIB, compressed
+    return SNAPSHOT_MAGIC + bytes((SNAPSHOT_VERSION, codec)) + payload
+
+
+def decode_snapshot(data: bytes) -> Memory:
+    """
+    Decode a binary snapshot.
+
+    Raises:
+        ValueError: If the data is not a snapshot, is corrupt, or uses an unknown version or codec
+    """
+    if len(data) < 4 or not is_snapshot(data):
+        raise ValueError("Not a memory snapshot")
+    version, codec = data[2], data[3]
+    if version != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported memory snapshot version {version}")
+    if codec == _CODEC_RAW:
+        body = data[4:]
+    elif codec == _CODEC_ZLIB:
+        try:
+            body = zlib.decompress(data[4:])
+        except zlib.error as e:
+            raise ValueError(f"Corrupt memory snapshot: {e}") from e
+    else:
+        raise ValueError(f"Unsupported memory snapshot codec {codec}")
+
+    try:
+        reader = _Reader(body)
+        memory = Memory(stage=_STAGES_BY_CODE[reader.byte()])
+        flags = reader.byte()
+        memory.connection = reader.str()
+        if flags & _HAS_LAST_SQL:
+            memory.last_sql = reader.str()
+        if flags & _HAS_LAST_JOB_ID:
+            memory.last_job_id = reader.str()
+        if flags & _HAS_LAST_COLUMNS:
+            joined = reader.str()
+            memory.set_columns(joined.split(_COLUMN_SEPARATOR) if joined else [])
+        if flags & _HAS_LAST_PREVIEW:
+            memory.last_preview = json.loads(reader.str())
+        if flags & _HAS_GATHERED_PARAMS:
+            memory.gathered_params = json.loads(reader.str())
+        if flags & _HAS_PENDING_TOOL:
+            memory.pending_tool = reader.str()
+        if flags & _HAS_PENDING_SLOT:
+            memory.pending_slot = reader.str()
+    except (IndexError, KeyError, UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ValueError(f"Corrupt memory snapshot: {e}") from e
+    return memory
@@ -0,0 +1,364 @@
+"""
+Persistent session storage for conversation Memory.
+
+Every stored session carries a version number. Writes are compare-and-swap:
+``save`` only succeeds if the caller read the version that is currently
+stored, so two workers handling the same session cannot silently overwrite
+each other. The interface maps directly onto a key-value server (e.g. Redis
+WATCH/MULTI or a Lua CAS script) should one be added later.
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+import logging
+
+from src.ai.router.memory import Memory, is_snapshot
+from src.utils.config import MEMORY_STORE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+class VersionConflictError(Exception):
+    """Raised when a session was changed by someone else since it was loaded."""
+
+    def __init__(self, session_id: str, expected_version: int, actual_version: Optional[int]):
+        self.session_id = session_id
+        self.expected_version = expected_version
+        self.actual_version = actual_version
+        super().__init__(
+            f"Session '{session_id}' is at version {actual_version}, expected {expected_version}"
+        )
+
+
+@dataclass(frozen=True)
+class StoredMemory:
+    """A loaded session and the version to pass back to ``save``."""
+    memory: Memory
+    version: int
+
+
+def encode_memory(memory: Memory) -> bytes:
+    """Serialize Memory for storage as a binary snapshot."""
+    return memory.to_snapshot()
+
+
+def decode_memory(data: bytes) -> Memory:
+    """Inverse of ``encode_memory``; rows written before snapshots existed are JSON."""
+    if is_snapshot(data):
+        return Memory.from_snapshot(data)
+    return Memory.from_dict(json.loads(data))
+
+
+class MemoryStore(ABC):
+    """
+    Versioned session storage.
+
+    Version 0 means "no such session": saving with ``expected_version=0``
+    creates it. Loaded Memory objects are private copies; mutating them does
+    not affect the store until they are saved.
+    """
+
+    @abstractmethod
+    async def load(self, session_id: str) -> Optional[StoredMemory]:
+        """Return the stored session, or None if it does not exist."""
+
+    @abstractmethod
+    async def save(
+        self,
+        session_id: str,
+        memory: Memory,
+        expected_version: int,
+        new_version: Optional[int] = None,
+    ) -> int:
+        """
+        Store a session if it is still at ``expected_version``.
+
+        Args:
+            session_id: Session identifier
+            memory: State to store
+            expected_version: Version the caller loaded (0 to create the session)
+            new_version: Version to store, must be greater than ``expected_version``
+                (defaults to ``expected_version + 1``)
+
+        Returns:
+            int: The new version
+
+        Raises:
+            VersionConflictError: If the stored version differs from ``expected_version``
+        """
+
+    @abstractmethod
+    async def delete(self, session_id: str) -> None:
+        """Remove a session (no error if it does not exist)."""
+
+    async def flush(self) -> None:
+        """Wait until all accepted writes are persisted (no-op for synchronous stores)."""
+
+    async def close(self) -> None:
+        """Release resources."""
+
+    async def load_or_create(self, session_id: str) -> StoredMemory:
+        """Load a session, or return a fresh Memory at version 0."""
+        stored = await self.load(session_id)
+        return stored if stored is not None else StoredMemory(memory=Memory(), version=0)
+
+
+class InMemoryMemoryStore(MemoryStore):
+    """Process-local store; sessions are lost on restart. For tests and single-process use."""
+
+    def __init__(self):
+        self._sessions: Dict[str, Tuple[int, bytes]] = {}
+
+    async def load(self, session_id: str) -> Optional[StoredMemory]:
+        entry = self._sessions.get(session_id)
+        if entry is None:
+            return None
+        return StoredMemory(memory=decode_memory(entry[1]), version=entry[0])
+
+    async def save(
+        self,
+        session_id: str,
+        memory: Memory,
+        expected_version: int,
+        new_version: Optional[int] = None,
+    ) -> int:
+        current = self._sessions.get(session_id, (0, b""))[0]
+        if current != expected_version:
+            raise VersionConflictError(session_id, expected_version, current)
+        version = new_version if new_version is not None else expected_version + 1
+        self._sessions[session_id] = (version, encode_memory(memory))
+        return version
+
+    async def delete(self, session_id: str) -> None:
+        self._sessions.pop(session_id, None)
+
+
+class SQLiteMemoryStore(MemoryStore):
+    """
+    Sessions in a SQLite file, shared by every worker process on the host.
+
+    Queries run in a worker thread so the event loop never blocks on disk.
+    """
+
+    def __init__(self, path: str = MEMORY_STORE_CONFIG["path"], session_ttl: float = MEMORY_STORE_CONFIG["session_ttl"]):
+        self.path = path
+        self.session_ttl = session_ttl
+        self._lock = threading.Lock()
+        self._conn = self._connect(path)
+        self._writes_since_prune = 0
+
+    @staticmethod
+    def _connect(path: str) -> sqlite3.Connection:
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY,
+                version INTEGER NOT NULL,
+                data BLOB NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_updated_at ON sessions(updated_at)")
+        conn.commit()
+        return conn
+
+    async def load(self, session_id: str) -> Optional[StoredMemory]:
+        return await asyncio.to_thread(self._load, session_id)
+
+    def _load(self, session_id: str) -> Optional[StoredMemory]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT version, data FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return StoredMemory(memory=decode_memory(row[1]), version=row[0])
+
+    async def save(
+        self,
+        session_id: str,
+        memory: Memory,
+        expected_version: int,
+        new_version: Optional[int] = None,
+    ) -> int:
+        data = encode_memory(memory)
+        version = new_version if new_version is not None else expected_version + 1
+        return await asyncio.to_thread(self._save, session_id, data, expected_version, version)
+
+    def _save(self, session_id: str, data: bytes, expected_version: int, version: int) -> int:
+        now = time.time()
+        with self._lock:
+            if expected_version == 0:
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO sessions VALUES (?, ?, ?, ?)", (session_id, version, data, now)
+                )
+            else:
+                cursor = self._conn.execute(
+                    "UPDATE sessions SET version = ?, data = ?, updated_at = ? WHERE session_id = ? AND version = ?",
+                    (version, data, now, session_id, expected_version),
+                )
+            if cursor.rowcount != 1:
+                self._conn.rollback()
+                row = self._conn.execute("SELECT version FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+                raise VersionConflictError(session_id, expected_version, row[0] if row else 0)
+            self._conn.commit()
+
+            self._writes_since_prune += 1
+            if self.session_ttl and self._writes_since_prune >= 200:
+                self._writes_since_prune = 0
+                self._conn.execute("DELETE FROM sessions WHERE updated_at < ?", (now - self.session_ttl,))
+                self._conn.commit()
+        return version
+
+    async def delete(self, session_id: str) -> None:
+        await asyncio.to_thread(self._delete, session_id)
+
+    def _delete(self, session_id: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            self._conn.commit()
+
+    async def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+@dataclass
+class _PendingWrite:
+    data: bytes
+    base_version: int  # version in the inner store the write applies to
+    version: int  # version handed out to callers
+
+
+class WriteBehindMemoryStore(MemoryStore):
+    """
+    Accepts writes immediately and persists them to ``inner`` in the background.
+
+    Sessions with unflushed writes are served from the pending buffer. Several
+    writes to one session between flushes are coalesced into one CAS write
+    against the version that was last read from ``inner``, so another worker's
+    change is still detected - at flush time. The losing write is dropped and
+    logged, and the next load returns the other worker's state.
+
+    The flusher runs as a task on the event loop that made the first pending
+    write; call ``flush()`` before that loop is closed.
+    """
+
+    def __init__(self, inner: MemoryStore, flush_interval: float = MEMORY_STORE_CONFIG["flush_interval"]):
+        self.inner = inner
+        self.flush_interval = flush_interval
+        self._pending: Dict[str, _PendingWrite] = {}
+        self._flusher: Optional[asyncio.Task] = None
+        # The background flusher and flush()/close() must not CAS the same entry twice
+        self._flush_lock = asyncio.Lock()
+
+        self.flushed = 0
+        self.coalesced = 0
+        self.conflicts = 0
+
+    async def load(self, session_id: str) -> Optional[StoredMemory]:
+        pending = self._pending.get(session_id)
+        if pending is not None:
+            return StoredMemory(memory=decode_memory(pending.data), version=pending.version)
+        return await self.inner.load(session_id)
+
+    async def save(
+        self,
+        session_id: str,
+        memory: Memory,
+        expected_version: int,
+        new_version: Optional[int] = None,
+    ) -> int:
+        pending = self._pending.get(session_id)
+        version = new_version if new_version is not None else expected_version + 1
+        if pending is not None:
+            if pending.version != expected_version:
+                raise VersionConflictError(session_id, expected_version, pending.version)
+            pending.data = encode_memory(memory)
+            pending.version = version
+            self.coalesced += 1
+        else:
+            self._pending[session_id] = _PendingWrite(encode_memory(memory), expected_version, version)
+        self._ensure_flusher()
+        return version
+
+    async def delete(self, session_id: str) -> None:
+        self._pending.pop(session_id, None)
+        await self.inner.delete(session_id)
+
+    def _ensure_flusher(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._flusher is None or self._flusher.done() or self._flusher.get_loop() is not loop:
+            self._flusher = loop.create_task(self._flush_loop())
+
+    async def _flush_loop(self) -> None:
+        while self._pending:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def flush(self) -> None:
+        async with self._flush_lock:
+            # Entries stay in the buffer while in flight so loads keep seeing them; saves made
+            # meanwhile update the entry and are picked up by the next flush
+            snapshot = [
+                (session_id, pending.data, pending.base_version, pending.version)
+                for session_id, pending in self._pending.items()
+            ]
+            for session_id, data, base_version, version in snapshot:
+                await self._flush_one(session_id, data, base_version, version)
+
+    async def _flush_one(self, session_id: str, data: bytes, base_version: int, version: int) -> None:
+        try:
+            await self.inner.save(session_id, decode_memory(data), base_version, new_version=version)
+        except VersionConflictError as e:
+            self.conflicts += 1
+            logger.warning(f"⚠️ Memory store: dropped write for session '{session_id}': {e}")
+            self._pending.pop(session_id, None)
+            return
+        except Exception as e:
+            logger.error(f"❌ Memory store: flush of session '{session_id}' failed, will retry: {e}")
+            return
+        self.flushed += 1
+        current = self._pending.get(session_id)
+        if current is not None and current.version == version:
+            del self._pending[session_id]
+        elif current is not None:
+            # Written again while the flush was in flight: next flush applies on top of this one
+            current.base_version = version
+
+    def stats(self) -> Dict[str, Any]:
+        """Pending sessions and flush counters."""
+        return {
+            "pending": len(self._pending),
+            "flushed": self.flushed,
+            "coalesced": self.coalesced,
+            "conflicts": self.conflicts,
+        }
+
+    async def close(self) -> None:
+        await self.flush()
+        if self._flusher is not None and not self._flusher.done():
+            self._flusher.cancel()
+        await self.inner.close()
+
+
+def build_memory_store(
+    backend: str = MEMORY_STORE_CONFIG["backend"],
+    write_behind: bool = MEMORY_STORE_CONFIG["write_behind"],
+) -> MemoryStore:
+    """Create the configured store ('memory' or 'sqlite'), optionally wrapped for write-behind."""
+    store: MemoryStore = SQLiteMemoryStore() if backend == "sqlite" else InMemoryMemoryStore()
+    if write_behind:
+        store = WriteBehindMemoryStore(store)
+    return store
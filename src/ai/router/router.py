@@ -1,12 +1,17 @@
 """
 Main staged router - orchestrates the conversation flow through different stages.
 """
+import asyncio
+import contextvars
 import logging
 import json
-from typing import Tuple
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Optional, Tuple
 from src.ai.router.memory import Memory, Stage
-from src.ai.router.sql_agent import call_sql_agent
-from src.ai.router.job_agent import call_job_agent
+from src.ai.router.schema_catalog import schema_catalog
+from src.ai.router.sql_agent import acall_sql_agent, aforget_sql_generation, arepair_sql_agent
+from src.ai.router.sql_validator import validate_sql
+from src.ai.router.job_agent import acall_job_agent
 from src.ai.toolkits.icc_toolkit import read_sql_job, write_data_job, send_email_job
 from src.models.natural_language import (
     ReadSqlLLMRequest,
@@ -17,14 +22,49 @@ from src.models.natural_language import (
     SendEmailVariables,
     ColumnSchema
 )
+from src.utils.circuit_breaker import open_circuit_error
+from src.utils.config import API_CONFIG
+from src.utils.metrics import endpoint_label
+from src.utils.tracing import span
 
 logger = logging.getLogger(__name__)
 
+JOB_ENDPOINT = endpoint_label(API_CONFIG["api_base_url"])
+QUERY_ENDPOINT = endpoint_label(API_CONFIG["query_api_base_url"])
+
+# Receives generated text chunks while a turn runs under handle_turn_stream
+_token_sink: contextvars.ContextVar[Optional[Callable[[str], None]]] = contextvars.ContextVar("token_sink", default=None)
+
+
+@dataclass
+class TurnEvent:
+    """
+    One event of a streamed turn.
+    
+    ``token`` events carry a chunk of partial text; the single ``final`` event
+    carries the response and the updated memory, exactly as handle_turn returns them.
+    """
+    kind: str  # "token" or "final"
+    text: str = ""
+    memory: Optional[Memory] = None
+
+
+def _unavailable_message(*endpoints: str) -> Optional[str]:
+    """Fail fast while an ICC endpoint's circuit breaker is open, instead of waiting on it."""
+    for endpoint in endpoints:
+        error = open_circuit_error(endpoint)
+        if error is not None:
+            logger.warning(f"⛔ Skipping ICC call: {error}")
+            return f"⏳ {error}\nNothing was lost - just ask me again in a moment."
+    return None
+
 
 async def handle_turn(memory: Memory, user_utterance: str) -> Tuple[Memory, str]:
     """
     One conversational turn. Returns updated memory and a response string.
     
+    The turn is the root tracing span; agent, auth, payload and ICC spans nest under it.
+    
     Args:
         memory: Current conversation memory
         user_utterance: User's input message
@@ -32,6 +72,14 @@ async def handle_turn(memory: Memory, user_utterance: str) -> Tuple[Memory, str]
     Returns:
         Tuple of (updated memory, response message)
     """
+    with span("router.handle_turn", **{"router.stage": memory.stage.value, "router.input_chars": len(user_utterance)}) as turn_span:
+        memory, response = await _dispatch_stage(memory, user_utterance)
+        turn_span.set_attribute("router.next_stage", memory.stage.value)
+        return memory, response
+
+
+async def _dispatch_stage(memory: Memory, user_utterance: str) -> Tuple[Memory, str]:
+    """Run the handler of the current stage."""
     logger.info(f"\n{'='*60}")
     logger.info(f"🎯 ROUTER: Stage={memory.stage.value}, Input='{user_utterance[:50]}...'")
     logger.info(f"{'='*60}")
@@ -46,12 +94,22 @@ async def handle_turn(memory: Memory, user_utterance: str) -> Tuple[Memory, str]
         logger.info("📝 Generating SQL from natural language...")
         
         # Generate SQL using SQL agent
-        spec = call_sql_agent(user_utterance)
+        spec = await acall_sql_agent(user_utterance, on_token=_token_sink.get(), connection=memory.connection)
+        
+        # Validate locally; one cheap repair round before the user sees the query.
+        # The fallback query means the model already failed - asking it again would only wait another timeout.
+        tables = await schema_catalog.atables(memory.connection)
+        validation = validate_sql(spec.sql, tables, memory.connection)
+        if not validation.ok and not spec.fallback:
+            logger.warning(f"⚠️ SQL failed validation:\n{validation.summary()}")
+            spec = await arepair_sql_agent(user_utterance, spec.sql, validation.issues, connection=memory.connection)
+            validation = validate_sql(spec.sql, tables, memory.connection)
+            if not validation.ok:
+                await aforget_sql_generation(user_utterance, memory.connection)
         memory.last_sql = spec.sql
         
-        # Check if it's a SELECT query
-        if "select" not in spec.sql.lower():
-            warning = "\n⚠️ Note: This is a non-SELECT query. "
+        if not validation.ok:
+            warning = f"\n⚠️ This query may not run as-is:\n{validation.summary()}\n"
         else:
             warning = ""
         
@@ -66,8 +124,12 @@ async def handle_turn(memory: Memory, user_utterance: str) -> Tuple[Memory, str]
     if memory.stage == Stage.HAVE_SQL:
         logger.info("🔧 Gathering parameters for read_sql...")
         
+        unavailable = _unavailable_message(QUERY_ENDPOINT, JOB_ENDPOINT)
+        if unavailable:
+            return memory, unavailable
+        
         # Use job agent to gather parameters
-        action = call_job_agent(memory, user_utterance, tool_name="read_sql")
+        action = await acall_job_agent(memory, user_utterance, tool_name="read_sql")
         
         if action.get("action") == "ASK":
             # Need more parameters
@@ -96,7 +158,7 @@ async def handle_turn(memory: Memory, user_utterance: str) -> Tuple[Memory, str]
                 if result.get("message") == "Success":
                     # Save job_id and columns for later use
                     memory.last_job_id = result.get("job_id")
-                    memory.last_columns = result.get("columns", [])
+                    memory.set_columns(result.get("columns", []))
                     memory.stage = Stage.SHOW_RESULTS
                     
                     cols_str = ", ".join(memory.last_columns[:5])
@@ -118,6 +180,8 @@ async def handle_turn(memory: Memory, user_utterance: str) -> Tuple[Memory, str]
     if memory.stage == Stage.SHOW_RESULTS:
         memory.stage = Stage.NEED_WRITE_OR_EMAIL
         memory.gathered_params = {}  # Reset for next operation
+        memory.pending_tool = None
+        memory.pending_slot = None
         
         return memory, "What would you like to do next?\n• 'write' - Save results to a table\n• 'email' - Send results via email\n• 'both' - Write and email\n• 'done' - Finish"
     
@@ -134,13 +198,26 @@ async def handle_turn(memory: Memory, user_utterance: str) -> Tuple[Memory, str]
         wants_write = "write" in user_lower or "save" in user_lower or "store" in user_lower
         wants_email = "email" in user_lower or "send" in user_lower
         
+        # Bare answers to a parameter question ("truncate", "bob@example.com") continue the pending tool
+        if not wants_write and not wants_email and memory.pending_tool:
+            wants_write = memory.pending_tool == "write_data"
+            wants_email = memory.pending_tool == "send_email"
+        
+        if wants_write or wants_email:
+            unavailable = _unavailable_message(JOB_ENDPOINT)
+            if unavailable:
+                return memory, unavailable
+        
         if wants_write:
             logger.info("📝 Processing write_data request...")
             
-            action = call_job_agent(memory, user_utterance, tool_name="write_data")
+            action = await acall_job_agent(memory, user_utterance, tool_name="write_data")
             
             if action.get("action") == "ASK":
+                memory.pending_tool = "write_data"
+                memory.pending_slot = action.get("slot")
                 return memory, action["question"]
+            memory.pending_tool = memory.pending_slot = None
             
             if action.get("action") == "TOOL" and action.get("tool_name") == "write_data":
                 logger.info("⚡ Executing write_data_job...")
@@ -168,6 +245,9 @@ async def handle_turn(memory: Memory, user_utterance: str) -> Tuple[Memory, str]
                     
                     logger.info(f"📊 write_data_job result: {json.dumps(result, indent=2, default=str)}")
                     
+                    if result.get("message") != "Success":
+                        return memory, f"❌ Error writing data: {result.get('error', 'Unknown error')}\nPlease try again."
+                    
                     return memory, f"✅ Data written successfully to table '{params.get('table')}'!\nAnything else? (email / done)"
                     
                 except Exception as e:
@@ -177,10 +257,13 @@ async def handle_turn(memory: Memory, user_utterance: str) -> Tuple[Memory, str]
         elif wants_email:
             logger.info("📧 Processing send_email request...")
             
-            action = call_job_agent(memory, user_utterance, tool_name="send_email")
+            action = await acall_job_agent(memory, user_utterance, tool_name="send_email")
             
             if action.get("action") == "ASK":
+                memory.pending_tool = "send_email"
+                memory.pending_slot = action.get("slot")
                 return memory, action["question"]
+            memory.pending_tool = memory.pending_slot = None
             
             if action.get("action") == "TOOL" and action.get("tool_name") == "send_email":
                 logger.info("⚡ Executing send_email_job...")
@@ -205,6 +288,9 @@ async def handle_turn(memory: Memory, user_utterance: str) -> Tuple[Memory, str]
                     
                     logger.info(f"📊 send_email_job result: {json.dumps(result, indent=2, default=str)}")
                     
+                    if result.get("message") != "Success":
+                        return memory, f"❌ Error sending email: {result.get('error', 'Unknown error')}\nPlease try again."
+                    
                     return memory, f"✅ Email sent to {params.get('to')}!\nAnything else? (write / done)"
                     
                 except Exception as e:
@@ -223,3 +309,38 @@ async def handle_turn(memory: Memory, user_utterance: str) -> Tuple[Memory, str]
     
     # Fallback
     return memory, "I didn't quite catch that. Could you rephrase?"
+
+
+async def handle_turn_stream(memory: Memory, user_utterance: str) -> AsyncIterator[TurnEvent]:
+    """
+    Streaming variant of handle_turn.
+    
+    Yields ``token`` events with partial text while the SQL agent generates,
+    then one ``final`` event with the full response and updated memory.
+    Stages without LLM generation yield only the final event.
+    
+    Args:
+        memory: Current conversation memory
+        user_utterance: User's input message
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    token = _token_sink.set(queue.put_nowait)
+    try:
+        # The task copies the current context, so the stage code sees the sink
+        turn = asyncio.create_task(handle_turn(memory, user_utterance))
+    finally:
+        _token_sink.reset(token)
+    turn.add_done_callback(lambda _: queue.put_nowait(None))
+    
+    try:
+        while True:
+            chunk = await queue.get()
+            if chunk is None:
+                break
+            yield TurnEvent(kind="token", text=chunk)
+        
+        updated_memory, response = await turn
+        yield TurnEvent(kind="final", text=response, memory=updated_memory)
+    finally:
+        if not turn.done():
+            turn.cancel()
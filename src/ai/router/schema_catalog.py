@@ -0,0 +1,416 @@
+"""
+Schema catalog - the tables, columns and keys of each connection.
+
+A SchemaSource introspects a connection; the catalog keeps the result in
+memory, persists it to a compact gzip'd JSON file per connection and
+refreshes incrementally: only tables whose change marker differs (or whose
+entry is older than ``table_ttl`` when the source has no markers) are
+described again.
+"""
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Protocol
+import logging
+
+from src.ai.router.schema_index import SchemaIndex, render_schema
+from src.models.query import QueryPayload
+from src.models.schema import ColumnInfo, TableInfo
+from src.repositories.query_repository import QueryRepository
+from src.utils.config import SCHEMA_CATALOG_CONFIG
+from src.utils.http_client import get_http_client
+
+logger = logging.getLogger(__name__)
+
+CACHE_FORMAT_VERSION = 1
+
+# Demo database the SQL prompt examples are written against
+DEFAULT_SCHEMA = [
+    TableInfo(name="customers", columns=[
+        ColumnInfo(name="customer_id", type="INT", primary_key=True),
+        ColumnInfo(name="first_name", type="VARCHAR"),
+        ColumnInfo(name="last_name", type="VARCHAR"),
+        ColumnInfo(name="email", type="VARCHAR"),
+        ColumnInfo(name="phone", type="VARCHAR"),
+        ColumnInfo(name="country", type="VARCHAR"),
+        ColumnInfo(name="city", type="VARCHAR"),
+        ColumnInfo(name="address", type="VARCHAR"),
+        ColumnInfo(name="created_date", type="DATE"),
+    ]),
+    TableInfo(name="orders", columns=[
+        ColumnInfo(name="order_id", type="INT", primary_key=True),
+        ColumnInfo(name="customer_id", type="INT", references="customers.customer_id"),
+        ColumnInfo(name="order_date", type="DATE"),
+        ColumnInfo(name="total_amount", type="DECIMAL"),
+        ColumnInfo(name="status", type="VARCHAR", comment="values: 'pending', 'completed', 'cancelled'"),
+        ColumnInfo(name="shipping_address", type="VARCHAR"),
+    ]),
+    TableInfo(name="products", columns=[
+        ColumnInfo(name="product_id", type="INT", primary_key=True),
+        ColumnInfo(name="product_name", type="VARCHAR"),
+        ColumnInfo(name="category", type="VARCHAR"),
+        ColumnInfo(name="price", type="DECIMAL"),
+        ColumnInfo(name="stock_quantity", type="INT"),
+        ColumnInfo(name="supplier", type="VARCHAR"),
+    ]),
+    TableInfo(name="order_items", columns=[
+        ColumnInfo(name="order_item_id", type="INT", primary_key=True),
+        ColumnInfo(name="order_id", type="INT", references="orders.order_id"),
+        ColumnInfo(name="product_id", type="INT", references="products.product_id"),
+        ColumnInfo(name="quantity", type="INT"),
+        ColumnInfo(name="unit_price", type="DECIMAL"),
+    ]),
+]
+
+_TABLE_NAME_RE = re.compile(r"^[A-Za-z_][\w$#]*(\.[A-Za-z_][\w$#]*)?$")
+
+
+class SchemaSource(Protocol):
+    """Where table definitions come from."""
+
+    async def list_tables(self, connection: str) -> Dict[str, Optional[str]]:
+        """Table name → change marker (None if the source cannot tell whether a table changed)."""
+        ...
+
+    async def describe_table(self, connection: str, table: str) -> Optional[TableInfo]:
+        """Full definition of one table, or None if it cannot be read."""
+        ...
+
+
+def table_marker(table: TableInfo) -> str:
+    """Change marker derived from the table definition itself."""
+    return hashlib.sha1(render_schema([table]).encode("utf-8")).hexdigest()[:12]
+
+
+class StaticSchemaSource:
+    """Local stand-in: the same fixed tables for every connection."""
+
+    def __init__(self, tables: List[TableInfo] = DEFAULT_SCHEMA):
+        self.tables = {table.name: table for table in tables}
+
+    async def list_tables(self, connection: str) -> Dict[str, Optional[str]]:
+        return {name: table_marker(table) for name, table in self.tables.items()}
+
+    async def describe_table(self, connection: str, table: str) -> Optional[TableInfo]:
+        return self.tables.get(table)
+
+
+class ICCSchemaSource:
+    """
+    Introspects tables through the ICC utility/query endpoint.
+
+    utility/query only reports the column names a query would return, so each
+    table is probed with ``SELECT * FROM <table> WHERE 1=0``. Types, keys and
+    comments are taken from ``seed`` tables of the same name when available.
+    The endpoint exposes no DDL timestamps, so tables carry no change marker
+    and are re-probed once their entry is older than the catalog's ``table_ttl``.
+    """
+
+    def __init__(self, table_names: Optional[List[str]] = None, seed: List[TableInfo] = DEFAULT_SCHEMA):
+        self.seed = {table.name.lower(): table for table in seed}
+        self.table_names = table_names or [table.name for table in seed]
+
+    async def list_tables(self, connection: str) -> Dict[str, Optional[str]]:
+        return {name: None for name in self.table_names}
+
+    async def describe_table(self, connection: str, table: str) -> Optional[TableInfo]:
+        if not _TABLE_NAME_RE.match(table):
+            logger.warning(f"⚠️ Schema catalog: skipping invalid table name '{table}'")
+            return None
+
+        sql = f"SELECT * FROM {table} WHERE 1=0"
+        # A refresh must see the live table, not a cached column list
+        QueryRepository.invalidate_column_cache(connection, sql)
+        repo = QueryRepository(get_http_client())
+        response = await QueryRepository.get_column_names(repo, QueryPayload(connectionId=connection, sql=sql))
+        if not response.success:
+            logger.warning(f"⚠️ Schema catalog: could not describe {connection}.{table}: {response.error}")
+            return None
+
+        known = self.seed.get(table.lower())
+        known_columns = {column.name.lower(): column for column in known.columns} if known else {}
+        columns = [
+            known_columns[name.lower()].model_copy(update={"name": name}) if name.lower() in known_columns
+            else ColumnInfo(name=name)
+            for name in response.data.object.columns
+        ]
+        return TableInfo(name=table, columns=columns, comment=known.comment if known else "")
+
+
+@dataclass
+class CatalogEntry:
+    """A described table and when/at which marker it was read."""
+    table: TableInfo
+    marker: Optional[str]
+    refreshed_at: float
+
+
+@dataclass
+class RefreshResult:
+    """What an incremental refresh changed."""
+    added: int = 0
+    changed: int = 0
+    removed: int = 0
+    unchanged: int = 0
+    failed: int = 0
+
+
+def build_schema_source(name: str = SCHEMA_CATALOG_CONFIG["source"]) -> SchemaSource:
+    """Create the configured schema source ('static' or 'icc')."""
+    if name == "icc":
+        return ICCSchemaSource(table_names=SCHEMA_CATALOG_CONFIG["tables"] or None)
+    return StaticSchemaSource()
+
+
+class SchemaCatalog:
+    """Per-connection table definitions with an on-disk cache and incremental refresh."""
+
+    def __init__(
+        self,
+        source: Optional[SchemaSource] = None,
+        cache_dir: str = SCHEMA_CATALOG_CONFIG["cache_dir"],
+        refresh_interval: float = SCHEMA_CATALOG_CONFIG["refresh_interval"],
+        table_ttl: float = SCHEMA_CATALOG_CONFIG["table_ttl"],
+        probe_concurrency: int = SCHEMA_CATALOG_CONFIG["probe_concurrency"],
+    ):
+        self.source = source or build_schema_source()
+        self.cache_dir = cache_dir
+        self.refresh_interval = refresh_interval
+        self.table_ttl = table_ttl
+        self.probe_concurrency = probe_concurrency
+
+        self._entries: Dict[str, Dict[str, CatalogEntry]] = {}
+        self._indexes: Dict[str, SchemaIndex] = {}
+        self._checked_at: Dict[str, float] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+        self.refreshes = 0
+        self.tables_described = 0
+
+    # ---- lookups -------------------------------------------------------
+
+    async def get_index(self, connection: str) -> SchemaIndex:
+        """Schema index for a connection, loading or refreshing the catalog when due."""
+        if connection not in self._entries or self._refresh_due(connection):
+            async with self._lock(connection):
+                # Concurrent callers wait for the first one's load/refresh instead of repeating it
+                if connection not in self._entries:
+                    await self._aload(connection)
+                if self._refresh_due(connection):
+                    await self._refresh(connection)
+        return self.cached_index(connection)
+
+    def cached_index(self, connection: str) -> SchemaIndex:
+        """Schema index from memory or disk only; never calls the source."""
+        if connection not in self._entries:
+            self._load(connection)
+        index = self._indexes.get(connection)
+        if index is None:
+            index = self._indexes[connection] = SchemaIndex(self.tables(connection))
+        return index
+
+    async def atables(self, connection: str) -> List[TableInfo]:
+        """Like ``tables``, reading the disk cache off the event loop."""
+        if connection not in self._entries:
+            async with self._lock(connection):
+                if connection not in self._entries:
+                    await self._aload(connection)
+        return self.tables(connection)
+
+    def tables(self, connection: str) -> List[TableInfo]:
+        """Known tables of a connection (from memory or disk)."""
+        if connection not in self._entries:
+            self._load(connection)
+        return [entry.table for entry in self._entries.get(connection, {}).values()]
+
+    def get_table(self, connection: str, name: str) -> Optional[TableInfo]:
+        """Look up one table by name, case-insensitively."""
+        for table in self.tables(connection):
+            if table.name.lower() == name.lower():
+                return table
+        return None
+
+    # ---- refresh -------------------------------------------------------
+
+    async def refresh(self, connection: str, force: bool = False) -> RefreshResult:
+        """
+        Bring a connection's catalog up to date.
+
+        Only new tables, tables whose change marker differs and marker-less
+        tables older than ``table_ttl`` are described; everything else is kept.
+
+        Args:
+            connection: Connection identifier
+            force: Describe every table again
+
+        Returns:
+            RefreshResult: Counts of added/changed/removed/unchanged/failed tables
+        """
+        async with self._lock(connection):
+            if connection not in self._entries:
+                await self._aload(connection)
+            return await self._refresh(connection, force)
+
+    async def _refresh(self, connection: str, force: bool = False) -> RefreshResult:
+        """Refresh body; the caller holds the connection's lock."""
+        entries = self._entries.setdefault(connection, {})
+        result = RefreshResult()
+        now = time.time()
+
+        try:
+            markers = await self.source.list_tables(connection)
+        except Exception as e:
+            logger.error(f"❌ Schema catalog: listing tables of '{connection}' failed: {e}")
+            self._checked_at[connection] = now
+            return result
+
+        for name in [name for name in entries if name not in markers]:
+            del entries[name]
+            result.removed += 1
+
+        stale = []
+        for name, marker in markers.items():
+            entry = entries.get(name)
+            if entry is None or force:
+                stale.append(name)
+            elif marker is not None and marker != entry.marker:
+                stale.append(name)
+            elif marker is None and now - entry.refreshed_at >= self.table_ttl:
+                stale.append(name)
+            else:
+                result.unchanged += 1
+
+        semaphore = asyncio.Semaphore(max(1, self.probe_concurrency))
+
+        async def describe(name: str) -> Optional[TableInfo]:
+            async with semaphore:
+                try:
+                    return await self.source.describe_table(connection, name)
+                except Exception as e:
+                    logger.error(f"❌ Schema catalog: describing {connection}.{name} failed: {e}")
+                    return None
+
+        described = await asyncio.gather(*(describe(name) for name in stale))
+        for name, table in zip(stale, described):
+            if table is None:
+                result.failed += 1
+                continue
+            if name in entries:
+                result.changed += 1
+            else:
+                result.added += 1
+            entries[name] = CatalogEntry(table=table, marker=markers[name], refreshed_at=now)
+
+        self.refreshes += 1
+        self.tables_described += len(stale) - result.failed
+        self._checked_at[connection] = now
+        if result.added or result.changed or result.removed:
+            self._indexes.pop(connection, None)
+            await self._asave(connection)
+        logger.info(
+            f"🗂️ Schema catalog '{connection}': +{result.added} ~{result.changed} -{result.removed} "
+            f"={result.unchanged} (failed {result.failed})"
+        )
+        return result
+
+    def _refresh_due(self, connection: str) -> bool:
+        return time.time() - self._checked_at.get(connection, 0.0) >= self.refresh_interval
+
+    def _lock(self, connection: str) -> asyncio.Lock:
+        lock = self._locks.get(connection)
+        if lock is None:
+            lock = self._locks[connection] = asyncio.Lock()
+        return lock
+
+    def stats(self) -> Dict[str, Any]:
+        """Tables per loaded connection and refresh counters."""
+        return {
+            "connections": {connection: len(entries) for connection, entries in self._entries.items()},
+            "refreshes": self.refreshes,
+            "tables_described": self.tables_described,
+        }
+
+    # ---- persistence ---------------------------------------------------
+
+    def _cache_path(self, connection: str) -> str:
+        safe = re.sub(r"[^\w.-]", "_", connection)
+        return os.path.join(self.cache_dir, f"{safe}.json.gz")
+
+    def _load(self, connection: str) -> None:
+        """Read the disk cache; blocks, so async code uses ``_aload``."""
+        self._apply_cache(connection, self._read_cache(self._cache_path(connection)))
+
+    async def _aload(self, connection: str) -> None:
+        data = await asyncio.to_thread(self._read_cache, self._cache_path(connection))
+        self._apply_cache(connection, data)
+
+    @staticmethod
+    def _read_cache(path: str) -> Optional[Dict[str, Any]]:
+        if not os.path.exists(path):
+            return None
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ Schema catalog: ignoring unreadable cache {path}: {e}")
+            return None
+
+    def _apply_cache(self, connection: str, data: Optional[Dict[str, Any]]) -> None:
+        self._entries[connection] = {}
+        if data is None or data.get("version") != CACHE_FORMAT_VERSION:
+            return
+        try:
+            self._entries[connection] = {
+                name: CatalogEntry(
+                    table=TableInfo.model_validate(item["table"]),
+                    marker=item.get("marker"),
+                    refreshed_at=item.get("refreshed_at", 0.0),
+                )
+                for name, item in data["tables"].items()
+            }
+            self._checked_at[connection] = data.get("checked_at", 0.0)
+            logger.info(f"🗂️ Schema catalog '{connection}': loaded {len(self._entries[connection])} tables from disk")
+        except (ValueError, KeyError) as e:
+            logger.warning(f"⚠️ Schema catalog: ignoring unreadable cache for '{connection}': {e}")
+
+    def _cache_data(self, connection: str) -> Dict[str, Any]:
+        return {
+            "version": CACHE_FORMAT_VERSION,
+            "connection": connection,
+            "checked_at": self._checked_at.get(connection, 0.0),
+            "tables": {
+                name: {
+                    "table": entry.table.model_dump(exclude_defaults=True),
+                    "marker": entry.marker,
+                    "refreshed_at": entry.refreshed_at,
+                }
+                for name, entry in self._entries.get(connection, {}).items()
+            },
+        }
+
+    async def _asave(self, connection: str) -> None:
+        await asyncio.to_thread(self._write_cache, self._cache_path(connection), self._cache_data(connection))
+
+    def _write_cache(self, path: str, data: Dict[str, Any]) -> None:
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"⚠️ Schema catalog: could not write {path}: {e}")
+
+
+# Global instance
+schema_catalog = SchemaCatalog()
+
+
+def get_schema_catalog() -> SchemaCatalog:
+    """Return the process-wide schema catalog."""
+    return schema_catalog
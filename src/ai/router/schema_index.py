@@ -0,0 +1,172 @@
+"""
+Local lexical index over the database schema.
+
+Ranks tables against an utterance with BM25 over table names, column names
+and comments. Identifier words are also indexed as character trigrams, so
+"customer" still finds CUST_MASTER-style names and plural/singular forms
+match. Everything runs in memory; there is no network call.
+"""
+import hashlib
+import math
+import re
+from collections import Counter, defaultdict
+from functools import lru_cache
+from typing import Dict, Iterable, List, Tuple
+
+from src.models.schema import TableInfo
+
+# Words that say nothing about which table is meant
+STOPWORDS = {
+    "a", "all", "an", "and", "are", "as", "at", "by", "for", "from", "get", "give", "how", "in",
+    "is", "list", "many", "me", "of", "on", "or", "show", "that", "the", "their", "them", "this",
+    "to", "what", "which", "who", "with", "find", "fetch", "select", "display", "each", "per",
+}
+
+# Table-name words are also indexed as a separate field, so a match on the
+# table itself outranks an incidental column match
+NAME_PREFIX = "@"
+TRIGRAM_PREFIX = "#"
+
+
+def identifier_words(text: str) -> List[str]:
+    """Split identifiers and prose into lower-case words (snake_case, camelCase, punctuation)."""
+    text = re.sub(r"([a-z0-9])([A-Z])", r"\1 \2", text)
+    words = []
+    for word in re.split(r"[^A-Za-z0-9]+", text.lower()):
+        if not word or word in STOPWORDS or word.isdigit():
+            continue
+        # Crude singularization so "orders" and "order" share a term
+        if len(word) > 4 and word.endswith("ies"):
+            word = word[:-3] + "y"
+        elif len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        words.append(word)
+    return words
+
+
+@lru_cache(maxsize=65536)
+def _word_terms(word: str) -> Tuple[str, ...]:
+    padded = f" {word} "
+    return (word,) + tuple(TRIGRAM_PREFIX + padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def _terms(words: Iterable[str]) -> Counter:
+    terms: Counter = Counter()
+    for word in words:
+        terms.update(_word_terms(word))
+    return terms
+
+
+def render_schema(tables: Iterable[TableInfo]) -> str:
+    """Render tables in the prompt's schema format."""
+    blocks = []
+    for table in tables:
+        lines = [f"Table: {table.name}" + (f" -- {table.comment}" if table.comment else ""), "Columns:"]
+        for column in table.columns:
+            details = [column.type] if column.type else []
+            if column.primary_key:
+                details.append("Primary Key")
+            if column.references:
+                details.append(f"Foreign Key → {column.references}")
+            line = f"  - {column.name}" + (f" ({', '.join(details)})" if details else "")
+            if column.comment:
+                line += f" -- {column.comment}"
+            lines.append(line)
+        blocks.append("\n".join(lines))
+    return "\n\n".join(blocks)
+
+
+class SchemaIndex:
+    """BM25 ranking of tables, with word and character-trigram terms."""
+
+    def __init__(self, tables: List[TableInfo], k1: float = 1.2, b: float = 0.75, trigram_weight: float = 0.3):
+        self.tables = list(tables)
+        self.k1 = k1
+        self.b = b
+        self.trigram_weight = trigram_weight
+        self._by_name: Dict[str, TableInfo] = {table.name.lower(): table for table in self.tables}
+
+        self._docs: List[Counter] = []
+        for table in self.tables:
+            name_words = identifier_words(table.name)
+            terms = _terms(name_words)
+            terms.update(NAME_PREFIX + word for word in name_words)
+            terms.update(_terms(identifier_words(table.comment)))
+            for column in table.columns:
+                terms.update(_terms(identifier_words(column.name)))
+                terms.update(_terms(identifier_words(column.comment)))
+            self._docs.append(terms)
+
+        self._doc_lengths = [sum(doc.values()) for doc in self._docs]
+        self._avg_length = sum(self._doc_lengths) / len(self._docs) if self._docs else 0.0
+
+        # Inverted index: term -> [(table position, term frequency)]
+        self._postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        for index, doc in enumerate(self._docs):
+            for term, tf in doc.items():
+                self._postings[term].append((index, tf))
+        count = len(self._docs)
+        self._idf = {
+            term: math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self._postings.items()
+        }
+
+        # Foreign-key neighbours in both directions
+        self._neighbours: Dict[str, List[str]] = {table.name.lower(): [] for table in self.tables}
+        for table in self.tables:
+            for target in table.referenced_tables():
+                target = target.lower()
+                if target in self._neighbours and target != table.name.lower():
+                    self._neighbours[table.name.lower()].append(target)
+                    self._neighbours[target].append(table.name.lower())
+
+        self.fingerprint = hashlib.sha256(render_schema(self.tables).encode("utf-8")).hexdigest()[:16]
+
+    def __len__(self) -> int:
+        return len(self.tables)
+
+    def search(self, query: str, top_k: int = 5) -> List[Tuple[TableInfo, float]]:
+        """
+        Rank tables for a query.
+
+        Returns:
+            List[Tuple[TableInfo, float]]: Up to ``top_k`` tables with a positive score, best first
+        """
+        scores: Dict[int, float] = defaultdict(float)
+        words = identifier_words(query)
+        query_terms = _terms(words)
+        query_terms.update(NAME_PREFIX + word for word in words)
+        for term in query_terms:
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            weight = (self.trigram_weight if term.startswith(TRIGRAM_PREFIX) else 1.0) * self._idf[term]
+            for index, tf in postings:
+                norm = self.k1 * (1 - self.b + self.b * self._doc_lengths[index] / (self._avg_length or 1))
+                scores[index] += weight * tf * (self.k1 + 1) / (tf + norm)
+        ranked = sorted(scores.items(), key=lambda pair: pair[1], reverse=True)[:top_k]
+        return [(self.tables[index], score) for index, score in ranked]
+
+    def select(
+        self, query: str, top_k: int = 5, include_neighbours: bool = True, max_tables: int = 0
+    ) -> List[TableInfo]:
+        """
+        Tables to put in the prompt: the ``top_k`` best matches plus their foreign-key neighbours.
+
+        Falls back to the first ``top_k`` tables if nothing matches at all.
+
+        Args:
+            query: User utterance
+            top_k: Number of ranked tables
+            include_neighbours: Also add tables joined to them by a foreign key
+            max_tables: Upper bound including neighbours (0 means no bound)
+        """
+        ranked = [table for table, _ in self.search(query, top_k)] or self.tables[:top_k]
+        selected = {table.name.lower(): table for table in ranked}
+        if include_neighbours:
+            for table in ranked:
+                for name in self._neighbours.get(table.name.lower(), []):
+                    if max_tables and len(selected) >= max_tables:
+                        return list(selected.values())
+                    selected.setdefault(name, self._by_name[name])
+        return list(selected.values())
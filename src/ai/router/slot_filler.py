@@ -0,0 +1,212 @@
+"""
+Deterministic slot filling for tool parameters.
+
+Most write_data/send_email replies are trivially parseable ("truncate",
+"to table SALES_2024 on oracle_prod", "bob@example.com"). These rules fill
+``memory.gathered_params`` before the job agent's LLM is consulted, so the
+model only runs when required slots are still missing or ambiguous.
+"""
+import re
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+import logging
+
+from src.ai.router.memory import Memory
+from src.utils.sql_parser import DIALECT_GENERIC, dialect_for
+
+logger = logging.getLogger(__name__)
+
+
+# Required parameters per tool, in the order they are asked for
+REQUIRED_SLOTS: Dict[str, Tuple[str, ...]] = {
+    "write_data": ("table", "connection", "drop_or_truncate"),
+    "send_email": ("to", "subject"),
+}
+
+EMAIL_RE = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
+IDENTIFIER = r"[A-Za-z_][\w$#]*(?:\.[A-Za-z_][\w$#]*)?"
+CONNECTION_IDENTIFIER = r"[A-Za-z_][\w\-]*"
+
+TABLE_PATTERNS = [
+    re.compile(rf"\btable\s+(?:named\s+|called\s+)?[\"'`]?({IDENTIFIER})", re.IGNORECASE),
+    re.compile(rf"\b(?:to|into)\s+(?:the\s+)?[\"'`]?({IDENTIFIER})", re.IGNORECASE),
+]
+# A connection name needs a cue ("connection X", "on the X database"), otherwise "on Monday" would be one
+CONNECTION_PATTERNS = [
+    re.compile(rf"\bconnection\s+(?:named\s+|called\s+|is\s+|=\s*|:\s*)?[\"'`]?({CONNECTION_IDENTIFIER})", re.IGNORECASE),
+    re.compile(rf"\b(?:on|using|via)\s+(?:the\s+)?[\"'`]?({CONNECTION_IDENTIFIER})[\"'`]?\s+(?:connection|database|db)\b", re.IGNORECASE),
+]
+# "on oracle_prod" without a cue word only counts when the name itself identifies a database
+CONNECTION_PREPOSITION_PATTERN = re.compile(
+    rf"\b(?:on|using|via)\s+(?:the\s+)?[\"'`]?({CONNECTION_IDENTIFIER})", re.IGNORECASE
+)
+SUBJECT_PATTERNS = [
+    re.compile(r"\b(?:subject|titled|title)\s*(?:is|:|=|as)?\s*[\"“']([^\"”']+)[\"”']", re.IGNORECASE),
+    re.compile(r"\b(?:subject|titled)\s*(?:is|:|=|as)?\s+(.+?)\s*(?:$|[.;]\s|\b(?:and|with)\s+(?:body|text|message)\b)", re.IGNORECASE),
+]
+TEXT_PATTERNS = [
+    re.compile(r"\b(?:body|text|message)\s*(?:is|:|=)\s*[\"“']?(.+?)[\"”']?\s*$", re.IGNORECASE),
+]
+MODE_KEYWORDS = {
+    "drop": re.compile(r"\b(?:drop|recreate)\b", re.IGNORECASE),
+    "truncate": re.compile(r"\b(?:truncate|clear|empty)\b", re.IGNORECASE),
+    "none": re.compile(r"\b(?:none|append|keep)\b", re.IGNORECASE),
+}
+
+# Words the table/connection patterns can pick up that are never a name
+_NOT_A_NAME = {
+    "a", "an", "the", "it", "them", "table", "connection", "database", "db", "email", "mail",
+    "me", "my", "this", "that", "data", "results", "result", "on", "to", "into", "using", "via",
+    "drop", "truncate", "none", "append", "write", "save", "store", "and", "or", "with", "then", "please",
+}
+# One-word replies that answer a yes/no question or cancel, never a slot value
+_REPLY_WORDS = {
+    "yes", "y", "yeah", "yep", "sure", "no", "n", "nope", "ok", "okay", "cancel", "stop", "abort",
+    "quit", "skip", "thanks", "done",
+}
+_SINGLE_VALUE_RE = re.compile(rf"^\s*[\"'`]?({CONNECTION_IDENTIFIER}(?:\.{IDENTIFIER})?)[\"'`]?\s*$")
+
+
+@dataclass
+class SlotExtraction:
+    """Values found in one utterance, plus slots whose value could not be pinned down."""
+    params: Dict[str, Any] = field(default_factory=dict)
+    ambiguous: Set[str] = field(default_factory=set)
+
+
+def _first_name(patterns: List[re.Pattern], text: str) -> List[str]:
+    for pattern in patterns:
+        names = [m.group(1) for m in pattern.finditer(text) if m.group(1).lower() not in _NOT_A_NAME]
+        if names:
+            return names
+    return []
+
+
+def _extract_write_data(text: str) -> SlotExtraction:
+    result = SlotExtraction()
+
+    connections = _first_name(CONNECTION_PATTERNS, text) or [
+        name for name in _first_name([CONNECTION_PREPOSITION_PATTERN], text)
+        if dialect_for(name) != DIALECT_GENERIC
+    ]
+    # "to table X on conn" - keep the connection out of the table candidates
+    tables = [name for name in _first_name(TABLE_PATTERNS, text) if name not in connections]
+    for slot, values in (("table", tables), ("connection", connections)):
+        if len(set(values)) == 1:
+            result.params[slot] = values[0]
+        elif values:
+            result.ambiguous.add(slot)
+
+    modes = [mode for mode, pattern in MODE_KEYWORDS.items() if pattern.search(text)]
+    if len(modes) == 1:
+        result.params["drop_or_truncate"] = modes[0]
+    elif modes:
+        result.ambiguous.add("drop_or_truncate")
+    return result
+
+
+def _extract_send_email(text: str) -> SlotExtraction:
+    result = SlotExtraction()
+
+    cc_part = re.split(r"\bcc\b", text, maxsplit=1, flags=re.IGNORECASE)
+    to_emails = EMAIL_RE.findall(cc_part[0])
+    cc_emails = EMAIL_RE.findall(cc_part[1]) if len(cc_part) > 1 else []
+    if len(set(to_emails)) == 1:
+        result.params["to"] = to_emails[0]
+    elif to_emails:
+        result.ambiguous.add("to")
+    if cc_emails:
+        result.params["cc"] = ", ".join(cc_emails)
+
+    for pattern in SUBJECT_PATTERNS:
+        match = pattern.search(text)
+        if match and match.group(1).strip():
+            result.params["subject"] = match.group(1).strip()
+            break
+
+    for pattern in TEXT_PATTERNS:
+        match = pattern.search(text)
+        if match and match.group(1).strip():
+            result.params["text"] = match.group(1).strip()
+            break
+    return result
+
+
+EXTRACTORS: Dict[str, Callable[[str], SlotExtraction]] = {
+    "write_data": _extract_write_data,
+    "send_email": _extract_send_email,
+}
+
+
+class SlotFiller:
+    """Runs the per-tool rules and keeps per-slot fast-path statistics."""
+
+    def __init__(self):
+        # slot stats: attempts = slot was still missing when a reply was parsed, filled = rules found it
+        self._stats: Dict[str, Dict[str, Dict[str, int]]] = defaultdict(
+            lambda: defaultdict(lambda: {"attempts": 0, "filled": 0, "ambiguous": 0})
+        )
+
+    def extract(self, tool_name: str, user_input: str, asked_slot: Optional[str] = None) -> SlotExtraction:
+        """
+        Extract slot values from one utterance.
+
+        Args:
+            tool_name: Tool the parameters are for
+            user_input: User's message
+            asked_slot: Slot the last question asked for; only it can be filled by a bare one-word reply
+        """
+        extractor = EXTRACTORS.get(tool_name)
+        if extractor is None:
+            return SlotExtraction()
+        result = extractor(user_input)
+
+        # Answer to a single question ("What table should I write the data to?" → "SALES_2024")
+        bare = _SINGLE_VALUE_RE.match(user_input)
+        if bare and asked_slot in ("table", "connection") and not result.params:
+            value = bare.group(1)
+            if value.lower() not in _NOT_A_NAME and value.lower() not in _REPLY_WORDS:
+                result.params[asked_slot] = value
+        return result
+
+    def fill(self, memory: Memory, tool_name: str, user_input: str) -> SlotExtraction:
+        """
+        Merge deterministically extracted values into ``memory.gathered_params``.
+
+        Values already gathered are kept unless the new reply states them explicitly.
+
+        Returns:
+            SlotExtraction: What was found in this utterance
+        """
+        required = REQUIRED_SLOTS.get(tool_name, ())
+        missing = tuple(slot for slot in required if not memory.gathered_params.get(slot))
+        asked_slot = memory.pending_slot if memory.pending_slot in missing else None
+        result = self.extract(tool_name, user_input, asked_slot)
+
+        for slot in missing:
+            stats = self._stats[tool_name][slot]
+            stats["attempts"] += 1
+            if slot in result.params:
+                stats["filled"] += 1
+            if slot in result.ambiguous:
+                stats["ambiguous"] += 1
+
+        if result.params:
+            logger.info(f"🧩 Slot filler ({tool_name}): {result.params}")
+            memory.gathered_params.update(result.params)
+        return result
+
+    def missing_slots(self, memory: Memory, tool_name: str) -> List[str]:
+        """Required slots of ``tool_name`` not yet present in memory."""
+        return [slot for slot in REQUIRED_SLOTS.get(tool_name, ()) if not memory.gathered_params.get(slot)]
+
+    def stats(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """Per tool and slot: how often the fast path was tried, succeeded and hit ambiguity."""
+        report: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for tool_name, slots in self._stats.items():
+            report[tool_name] = {}
+            for slot, stats in slots.items():
+                rate = stats["filled"] / stats["attempts"] if stats["attempts"] else 0.0
+                report[tool_name][slot] = {**stats, "success_rate": rate}
+        return report
@@ -2,63 +2,44 @@
 SQL generation agent - converts natural language to SQL queries.
 Uses a small LLM focused only on SQL generation.
 """
+import asyncio
 import os
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from langchain_ollama import ChatOllama
-from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
 from pydantic import BaseModel
 import json
 import logging
+import re
+from src.ai.router.schema_catalog import SchemaCatalog, schema_catalog
+from src.ai.router.schema_index import SchemaIndex, render_schema
+from src.ai.router.sql_cache import SQLGenerationCache, prompt_version
+from src.ai.router.sql_validator import limit_rows
+from src.utils.config import LLM_CONFIG, SQL_CACHE_CONFIG, SCHEMA_INDEX_CONFIG
+from src.utils.sql_parser import dialect_for
+from src.utils.tracing import SPAN_KIND_CLIENT, current_span, span
 
 logger = logging.getLogger(__name__)
 
+# Memory's default connection, used when a caller does not name one
+DEFAULT_CONNECTION = "oracle_10"
+
 
 class SQLSpec(BaseModel):
     """SQL specification from natural language."""
     sql: str
     reasoning: str = ""
+    # Set when generation failed and this is the canned fallback query (not worth repairing)
+    fallback: bool = False
 
 
+# {schema} is filled per request with the tables relevant to the utterance,
+# {limit_example} with a row-limited query in the connection's dialect
 SQL_GENERATION_PROMPT = """You are a SQL query generator. Convert natural language requests into SQL queries.
 
 DATABASE SCHEMA:
 
-Table: customers
-Columns:
-  - customer_id (INT, Primary Key)
-  - first_name (VARCHAR)
-  - last_name (VARCHAR)
-  - email (VARCHAR)
-  - phone (VARCHAR)
-  - country (VARCHAR)
-  - city (VARCHAR)
-  - address (VARCHAR)
-  - created_date (DATE)
-
-Table: orders
-Columns:
-  - order_id (INT, Primary Key)
-  - customer_id (INT, Foreign Key → customers.customer_id)
-  - order_date (DATE)
-  - total_amount (DECIMAL)
-  - status (VARCHAR) -- values: 'pending', 'completed', 'cancelled'
-  - shipping_address (VARCHAR)
-
-Table: products
-Columns:
-  - product_id (INT, Primary Key)
-  - product_name (VARCHAR)
-  - category (VARCHAR)
-  - price (DECIMAL)
-  - stock_quantity (INT)
-  - supplier (VARCHAR)
-
-Table: order_items
-Columns:
-  - order_item_id (INT, Primary Key)
-  - order_id (INT, Foreign Key → orders.order_id)
-  - product_id (INT, Foreign Key → products.product_id)
-  - quantity (INT)
-  - unit_price (DECIMAL)
+{schema}
 
 Rules:
 - Generate valid SQL queries using the schema above
@@ -72,7 +53,7 @@ User: "get customers from USA"
 SQL: SELECT * FROM customers WHERE country = 'USA'
 
 User: "first 10 orders from today"
-SQL: SELECT * FROM orders WHERE order_date = CURRENT_DATE LIMIT 10
+SQL: {limit_example}
 
 User: "show customer names with their total order amounts"
 SQL: SELECT c.first_name, c.last_name, SUM(o.total_amount) as total_spent FROM customers c JOIN orders o ON c.customer_id = o.customer_id GROUP BY c.customer_id, c.first_name, c.last_name
@@ -81,84 +62,367 @@ Now generate SQL for the user's request. Respond with JSON: {"sql": "YOUR_SQL_HE
 """
 
 
+def estimate_tokens(text: str) -> int:
+    """Rough token count (words and punctuation) for logging prompt size without a tokenizer."""
+    return len(re.findall(r"\w+|[^\w\s]", text))
+
+
 class SQLAgent:
     """Agent that generates SQL from natural language."""
     
-    def __init__(self):
+    def __init__(self, catalog: SchemaCatalog = schema_catalog):
+        self.model_name = os.getenv("SQL_MODEL_NAME", "qwen2.5-coder:7b")
         self.llm = ChatOllama(
-            model=os.getenv("SQL_MODEL_NAME", "qwen2.5-coder:7b"),
+            model=self.model_name,
             temperature=0.1,  # Low temperature for consistent SQL generation
-            base_url="http://localhost:11434",
+            base_url=LLM_CONFIG["base_url"],
         )
+        self.catalog = catalog
+        # Generations from other schemas, connections or prompt versions are never looked up again and age out of the cache
+        self.cache: Optional[SQLGenerationCache] = SQLGenerationCache() if SQL_CACHE_CONFIG["enabled"] else None
+    
+    @staticmethod
+    def prompt_version(index: SchemaIndex, connection: str) -> str:
+        """
+        Cached generations are only valid for the prompt, schema and connection they were made with.
+        
+        The connection is part of the version because the prompt and the repairs are dialect-specific,
+        while schema sources may report the same fingerprint for every connection.
+        """
+        return prompt_version(SQL_GENERATION_PROMPT, index.fingerprint, connection)
+    
+    def _cached_spec(self, user_input: str, index: SchemaIndex, connection: str) -> Optional[SQLSpec]:
+        if self.cache is None:
+            return None
+        entry = self.cache.get(self.model_name, self.prompt_version(index, connection), user_input)
+        return self._spec_from_cache(user_input, entry)
+    
+    async def _acached_spec(self, user_input: str, index: SchemaIndex, connection: str) -> Optional[SQLSpec]:
+        if self.cache is None:
+            return None
+        entry = await self.cache.aget(self.model_name, self.prompt_version(index, connection), user_input)
+        return self._spec_from_cache(user_input, entry)
+    
+    @staticmethod
+    def _spec_from_cache(user_input: str, entry: Optional[Tuple[str, str]]) -> Optional[SQLSpec]:
+        if entry is None:
+            return None
+        logger.info(f"⚡ SQL Agent: cache hit for '{user_input}'")
+        return SQLSpec(sql=entry[0], reasoning=entry[1])
+    
+    def _remember(self, user_input: str, index: SchemaIndex, connection: str, spec: SQLSpec) -> SQLSpec:
+        if self.cache is not None and spec.sql:
+            self.cache.put(self.model_name, self.prompt_version(index, connection), user_input, spec.sql, spec.reasoning)
+        return spec
     
-    def generate_sql(self, user_input: str) -> SQLSpec:
+    async def _aremember(self, user_input: str, index: SchemaIndex, connection: str, spec: SQLSpec) -> SQLSpec:
+        if self.cache is not None and spec.sql:
+            await self.cache.aput(self.model_name, self.prompt_version(index, connection), user_input, spec.sql, spec.reasoning)
+        return spec
+    
+    def generate_sql(self, user_input: str, connection: str = DEFAULT_CONNECTION) -> SQLSpec:
         """
         Generate SQL query from natural language input.
         
+        Blocking variant for scripts; the router uses ``agenerate_sql``. Uses
+        the catalog as cached in memory or on disk, without refreshing it.
+        
         Args:
             user_input: Natural language description of desired query
+            connection: Connection whose schema the query is written against
             
         Returns:
             SQLSpec with generated SQL and reasoning
         """
+        index = self.catalog.cached_index(connection)
+        cached = self._cached_spec(user_input, index, connection)
+        if cached is not None:
+            return cached
+        
         logger.info(f"🔮 SQL Agent: Generating SQL from: '{user_input}'")
         
         try:
-            messages = [
-                SystemMessage(content=SQL_GENERATION_PROMPT),
-                HumanMessage(content=user_input)
-            ]
-            
-            response = self.llm.invoke(messages)
-            content = response.content.strip()
-            
-            logger.info(f"📝 SQL Agent raw response: {content[:200]}...")
-            
-            # Try to parse as JSON first
-            try:
-                # Clean up markdown code blocks if present
-                if "```json" in content:
-                    content = content.split("```json")[1].split("```")[0].strip()
-                elif "```" in content:
-                    content = content.split("```")[1].split("```")[0].strip()
-                
-                parsed = json.loads(content)
-                sql = parsed.get("sql", "")
-                reasoning = parsed.get("reasoning", "")
-            except json.JSONDecodeError:
-                # If not JSON, assume entire response is SQL
-                logger.warning("⚠️ SQL Agent: Could not parse JSON, using raw response as SQL")
-                sql = content
-                reasoning = "Direct SQL output"
-            
-            # Clean SQL
-            sql = sql.strip().rstrip(";")
-            
-            logger.info(f"✅ SQL Agent: Generated SQL: {sql}")
+            response = self.llm.invoke(self._build_messages(user_input, index, connection))
+            self._log_prompt_usage(response.response_metadata)
+            return self._remember(user_input, index, connection, self._parse_response(response.content))
+        except Exception as e:
+            return self._fallback_spec(e, connection)
+    
+    async def agenerate_sql(
+        self,
+        user_input: str,
+        timeout: Optional[float] = None,
+        on_token: Optional[Callable[[str], None]] = None,
+        connection: str = DEFAULT_CONNECTION
+    ) -> SQLSpec:
+        """
+        Generate SQL query from natural language input without blocking the event loop.
+        
+        Args:
+            user_input: Natural language description of desired query
+            timeout: Seconds to wait for the model, defaults to LLM_CONFIG["timeout"]
+            on_token: If given, the response is streamed and each text chunk is passed to it
+            connection: Connection whose schema the query is written against
             
-            return SQLSpec(sql=sql, reasoning=reasoning)
+        Returns:
+            SQLSpec with generated SQL and reasoning
+        """
+        index = await self.catalog.get_index(connection)
+        cached = await self._acached_spec(user_input, index, connection)
+        current_span().set_attribute("sql_agent.cache_hit", cached is not None)
+        if cached is not None:
+            if on_token is not None:
+                on_token(cached.sql)
+            return cached
+        
+        logger.info(f"🔮 SQL Agent: Generating SQL from: '{user_input}'")
+        timeout = timeout or LLM_CONFIG["timeout"]
+        messages = self._build_messages(user_input, index, connection)
+        
+        try:
+            llm_attributes = {"llm.model": self.model_name, "llm.streaming": on_token is not None}
+            with span("llm.sql_agent.generate", kind=SPAN_KIND_CLIENT, **llm_attributes):
+                # wait_for cancels the generation on timeout; caller cancellation propagates as usual
+                if on_token is not None:
+                    content = await asyncio.wait_for(self._stream_content(messages, on_token), timeout=timeout)
+                else:
+                    response = await asyncio.wait_for(self.llm.ainvoke(messages), timeout=timeout)
+                    self._log_prompt_usage(response.response_metadata)
+                    content = response.content
+            return await self._aremember(user_input, index, connection, self._parse_response(content))
+        except asyncio.TimeoutError:
+            return self._fallback_spec(TimeoutError(f"SQL generation timed out after {timeout}s"), connection)
+        except Exception as e:
+            return self._fallback_spec(e, connection)
+    
+    async def arepair_sql(
+        self,
+        user_input: str,
+        sql: str,
+        problems: List[str],
+        connection: str = DEFAULT_CONNECTION,
+        timeout: Optional[float] = None
+    ) -> SQLSpec:
+        """
+        Ask the model once to fix a query that failed local validation.
+        
+        The repaired query replaces the cached generation for ``user_input``.
+        
+        Args:
+            user_input: Original natural language request
+            sql: Query that failed validation
+            problems: Validation issues to fix
+            connection: Connection whose schema the query is written against
+            timeout: Seconds to wait for the model, defaults to LLM_CONFIG["timeout"]
             
+        Returns:
+            SQLSpec with the repaired SQL (or the original one if the repair failed)
+        """
+        logger.info(f"🩹 SQL Agent: Repairing SQL ({len(problems)} problems)")
+        index = self.catalog.cached_index(connection)
+        timeout = timeout or LLM_CONFIG["timeout"]
+        messages = self._build_messages(user_input, index, connection)
+        issue_list = "\n".join(f"- {problem}" for problem in problems)
+        messages[-1] = HumanMessage(content=(
+            f"Request: {user_input}\n\n"
+            f"This SQL was generated for the request but is invalid for the {dialect_for(connection)} connection:\n"
+            f"{sql}\n\nProblems:\n{issue_list}\n\n"
+            "Fix only these problems and respond with the same JSON format."
+        ))
+        
+        try:
+            with span("llm.sql_agent.repair", kind=SPAN_KIND_CLIENT, **{"llm.model": self.model_name, "llm.streaming": False}):
+                response = await asyncio.wait_for(self.llm.ainvoke(messages), timeout=timeout)
+                self._log_prompt_usage(response.response_metadata)
+            spec = self._parse_response(response.content)
+        except asyncio.TimeoutError:
+            logger.error(f"❌ SQL Agent repair timed out after {timeout}s")
+            return SQLSpec(sql=sql, reasoning="Repair timed out")
         except Exception as e:
-            logger.error(f"❌ SQL Agent error: {str(e)}")
-            # Fallback - try to extract any SQL-like content
-            return SQLSpec(
-                sql="SELECT * FROM customers LIMIT 10",
-                reasoning=f"Error occurred: {str(e)}. Using fallback query."
+            logger.error(f"❌ SQL Agent repair error: {str(e)}")
+            return SQLSpec(sql=sql, reasoning=f"Repair failed: {str(e)}")
+        return await self._aremember(user_input, index, connection, spec)
+    
+    def forget(self, user_input: str, connection: str = DEFAULT_CONNECTION) -> None:
+        """Drop the cached generation for ``user_input`` (e.g. it is still invalid after repair)."""
+        if self.cache is not None:
+            index = self.catalog.cached_index(connection)
+            self.cache.delete(self.model_name, self.prompt_version(index, connection), user_input)
+    
+    async def aforget(self, user_input: str, connection: str = DEFAULT_CONNECTION) -> None:
+        """Like ``forget``, without blocking the event loop."""
+        if self.cache is not None:
+            index = self.catalog.cached_index(connection)
+            await self.cache.adelete(self.model_name, self.prompt_version(index, connection), user_input)
+    
+    async def _stream_content(self, messages: List[BaseMessage], on_token: Callable[[str], None]) -> str:
+        """Stream the completion, forwarding chunks as they arrive, and return the full text."""
+        parts = []
+        metadata: Dict[str, Any] = {}
+        llm_span = current_span()
+        async for chunk in self.llm.astream(messages):
+            if chunk.content:
+                if not parts:
+                    llm_span.add_event("first_token")
+                parts.append(chunk.content)
+                on_token(chunk.content)
+            metadata.update(chunk.response_metadata or {})
+        self._log_prompt_usage(metadata)
+        return "".join(parts)
+    
+    def _build_messages(self, user_input: str, index: SchemaIndex, connection: str) -> List[BaseMessage]:
+        tables = index.select(
+            user_input,
+            top_k=SCHEMA_INDEX_CONFIG["top_k"],
+            include_neighbours=SCHEMA_INDEX_CONFIG["include_neighbours"],
+            max_tables=SCHEMA_INDEX_CONFIG["max_tables"],
+        )
+        # str.replace, not format: the prompt contains literal JSON braces
+        limit_example = limit_rows("SELECT * FROM orders WHERE order_date = CURRENT_DATE", 10, connection)
+        system_prompt = (
+            SQL_GENERATION_PROMPT
+            .replace("{schema}", render_schema(tables))
+            .replace("{limit_example}", limit_example)
+        )
+        logger.info(
+            f"📏 SQL Agent prompt: ~{estimate_tokens(system_prompt) + estimate_tokens(user_input)} tokens, "
+            f"{len(tables)}/{len(index)} tables ({', '.join(t.name for t in tables)})"
+        )
+        return [
+            SystemMessage(content=system_prompt),
+            HumanMessage(content=user_input)
+        ]
+    
+    @staticmethod
+    def _log_prompt_usage(metadata: Dict[str, Any]) -> None:
+        """Log the token counts Ollama reports for a finished generation and add them to the current span."""
+        if metadata.get("prompt_eval_count") is not None:
+            logger.info(
+                f"📏 SQL Agent usage: {metadata['prompt_eval_count']} prompt tokens, "
+                f"{metadata.get('eval_count', 0)} completion tokens"
             )
+            current_span().set_attributes({
+                "llm.prompt_tokens": metadata["prompt_eval_count"],
+                "llm.completion_tokens": metadata.get("eval_count", 0),
+            })
+    
+    def _parse_response(self, content: str) -> SQLSpec:
+        """Turn the model output into a SQLSpec (JSON preferred, raw SQL accepted)."""
+        content = content.strip()
+        
+        logger.info(f"📝 SQL Agent raw response: {content[:200]}...")
+        
+        # Try to parse as JSON first
+        try:
+            # Clean up markdown code blocks if present
+            if "```json" in content:
+                content = content.split("```json")[1].split("```")[0].strip()
+            elif "```" in content:
+                content = content.split("```")[1].split("```")[0].strip()
+            
+            parsed = json.loads(content)
+            sql = parsed.get("sql", "")
+            reasoning = parsed.get("reasoning", "")
+        except json.JSONDecodeError:
+            # If not JSON, assume entire response is SQL
+            logger.warning("⚠️ SQL Agent: Could not parse JSON, using raw response as SQL")
+            sql = content
+            reasoning = "Direct SQL output"
+        
+        # Clean SQL
+        sql = sql.strip().rstrip(";")
+        
+        logger.info(f"✅ SQL Agent: Generated SQL: {sql}")
+        
+        return SQLSpec(sql=sql, reasoning=reasoning)
+    
+    def _fallback_spec(self, error: Exception, connection: str) -> SQLSpec:
+        logger.error(f"❌ SQL Agent error: {str(error)}")
+        # Fallback - a query the connection's dialect accepts, so it is not sent for repair
+        return SQLSpec(
+            sql=limit_rows("SELECT * FROM customers", 10, connection),
+            reasoning=f"Error occurred: {str(error)}. Using fallback query.",
+            fallback=True
+        )
 
 
 # Global instance
 sql_agent = SQLAgent()
 
 
-def call_sql_agent(user_input: str) -> SQLSpec:
+def call_sql_agent(user_input: str, connection: str = DEFAULT_CONNECTION) -> SQLSpec:
     """
     Call the SQL generation agent.
     
     Args:
         user_input: Natural language query description
+        connection: Connection whose schema the query is written against
         
     Returns:
         SQLSpec with generated SQL
     """
-    return sql_agent.generate_sql(user_input)
+    return sql_agent.generate_sql(user_input, connection)
+
+
+async def acall_sql_agent(
+    user_input: str,
+    timeout: Optional[float] = None,
+    on_token: Optional[Callable[[str], None]] = None,
+    connection: str = DEFAULT_CONNECTION
+) -> SQLSpec:
+    """
+    Call the SQL generation agent without blocking the event loop.
+    
+    Args:
+        user_input: Natural language query description
+        timeout: Seconds to wait for the model, defaults to LLM_CONFIG["timeout"]
+        on_token: Optional callback receiving generated text chunks as they stream in
+        connection: Connection whose schema the query is written against
+        
+    Returns:
+        SQLSpec with generated SQL
+    """
+    return await sql_agent.agenerate_sql(user_input, timeout=timeout, on_token=on_token, connection=connection)
+
+
+async def arepair_sql_agent(
+    user_input: str,
+    sql: str,
+    problems: List[str],
+    connection: str = DEFAULT_CONNECTION,
+    timeout: Optional[float] = None
+) -> SQLSpec:
+    """
+    Ask the SQL agent to fix a query that failed local validation.
+    
+    Args:
+        user_input: Original natural language request
+        sql: Query that failed validation
+        problems: Validation issues to fix
+        connection: Connection whose schema the query is written against
+        timeout: Seconds to wait for the model, defaults to LLM_CONFIG["timeout"]
+        
+    Returns:
+        SQLSpec with the repaired SQL
+    """
+    return await sql_agent.arepair_sql(user_input, sql, problems, connection=connection, timeout=timeout)
+
+
+def forget_sql_generation(user_input: str, connection: str = DEFAULT_CONNECTION) -> None:
+    """Drop the cached generation for one request, e.g. because it is invalid."""
+    sql_agent.forget(user_input, connection)
+
+
+async def aforget_sql_generation(user_input: str, connection: str = DEFAULT_CONNECTION) -> None:
+    """Drop the cached generation for one request without blocking the event loop."""
+    await sql_agent.aforget(user_input, connection)
+
+
+def get_sql_cache_stats() -> Dict[str, Any]:
+    """Return hit-rate counters of the NL→SQL cache (empty if disabled)."""
+    return sql_agent.cache.stats() if sql_agent.cache is not None else {}
+
+
+def invalidate_sql_cache() -> int:
+    """Drop every cached generation, e.g. after the database schema changed."""
+    return sql_agent.cache.invalidate() if sql_agent.cache is not None else 0
@@ -0,0 +1,241 @@
+"""
+Persistent cache of natural-language → SQL generations.
+
+Entries are keyed by model name, prompt version hash and the normalized
+utterance. Lookups hit an in-memory LRU first and fall back to a SQLite
+file, so recurring requests skip the LLM entirely and survive restarts.
+The ``a``-prefixed methods run the SQLite queries in a worker thread so the
+event loop never blocks on disk.
+"""
+import asyncio
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+import logging
+
+from src.utils.cache import TTLCache
+from src.utils.config import SQL_CACHE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_utterance(utterance: str) -> str:
+    """Lower-case, collapse whitespace and drop surrounding punctuation."""
+    text = re.sub(r"\s+", " ", utterance.strip().lower())
+    return text.strip(" .!?;,")
+
+
+def prompt_version(*parts: str) -> str:
+    """Short hash identifying the prompt (and schema) a generation was made with."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()[:16]
+
+
+class SQLGenerationCache:
+    """Two-level (memory LRU + SQLite) cache of generated SQL with TTL and a size bound."""
+
+    def __init__(
+        self,
+        path: str = SQL_CACHE_CONFIG["path"],
+        max_entries: int = SQL_CACHE_CONFIG["max_entries"],
+        memory_entries: int = SQL_CACHE_CONFIG["memory_entries"],
+        ttl: float = SQL_CACHE_CONFIG["ttl"],
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._memory: TTLCache[str, Tuple[str, str]] = TTLCache(maxsize=memory_entries, ttl=ttl, clock=time.time)
+        self._lock = threading.Lock()
+        self._conn = self._connect(path)
+        self._writes_since_prune = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+
+    @staticmethod
+    def _connect(path: str) -> sqlite3.Connection:
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = sqlite3.connect(path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS sql_generations (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                prompt_version TEXT NOT NULL,
+                utterance TEXT NOT NULL,
+                sql TEXT NOT NULL,
+                reasoning TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_sql_generations_last_used ON sql_generations(last_used)")
+        conn.commit()
+        return conn
+
+    @staticmethod
+    def make_key(model: str, version: str, utterance: str) -> str:
+        return hashlib.sha256(f"{model}\0{version}\0{normalize_utterance(utterance)}".encode("utf-8")).hexdigest()
+
+    def get(self, model: str, version: str, utterance: str) -> Optional[Tuple[str, str]]:
+        """
+        Look up a previous generation.
+
+        Returns:
+            Optional[Tuple[str, str]]: (sql, reasoning), or None on a miss
+        """
+        key = self.make_key(model, version, utterance)
+        entry = self._memory.get(key)
+        if entry is not None:
+            self.hits += 1
+            return entry
+        return self._get_persisted(key)
+
+    async def aget(self, model: str, version: str, utterance: str) -> Optional[Tuple[str, str]]:
+        """Like ``get``, without blocking the event loop on a memory miss."""
+        key = self.make_key(model, version, utterance)
+        entry = self._memory.get(key)
+        if entry is not None:
+            self.hits += 1
+            return entry
+        return await asyncio.to_thread(self._get_persisted, key)
+
+    def _get_persisted(self, key: str) -> Optional[Tuple[str, str]]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT sql, reasoning, created_at FROM sql_generations WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and row[2] + self.ttl > now:
+                self._conn.execute("UPDATE sql_generations SET last_used = ? WHERE key = ?", (now, key))
+                self._conn.commit()
+            elif row is not None:
+                self._conn.execute("DELETE FROM sql_generations WHERE key = ?", (key,))
+                self._conn.commit()
+                row = None
+
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.disk_hits += 1
+        entry = (row[0], row[1])
+        self._memory.set(key, entry, ttl=row[2] + self.ttl - now)
+        return entry
+
+    def put(self, model: str, version: str, utterance: str, sql: str, reasoning: str = "") -> None:
+        """Store a generation in both levels."""
+        key = self.make_key(model, version, utterance)
+        self._memory.set(key, (sql, reasoning))
+        self._persist(key, model, version, utterance, sql, reasoning)
+
+    async def aput(self, model: str, version: str, utterance: str, sql: str, reasoning: str = "") -> None:
+        """Like ``put``, writing the SQLite level in a worker thread."""
+        key = self.make_key(model, version, utterance)
+        self._memory.set(key, (sql, reasoning))
+        await asyncio.to_thread(self._persist, key, model, version, utterance, sql, reasoning)
+
+    def _persist(self, key: str, model: str, version: str, utterance: str, sql: str, reasoning: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sql_generations VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, model, version, normalize_utterance(utterance), sql, reasoning, now, now),
+            )
+            self._conn.commit()
+            self._writes_since_prune += 1
+            if self._writes_since_prune >= 100:
+                self._prune_locked(now)
+
+    def delete(self, model: str, version: str, utterance: str) -> None:
+        """Forget one generation, e.g. because it turned out to be invalid."""
+        key = self.make_key(model, version, utterance)
+        self._memory.invalidate(key)
+        self._delete_persisted(key)
+
+    async def adelete(self, model: str, version: str, utterance: str) -> None:
+        """Like ``delete``, removing the SQLite row in a worker thread."""
+        key = self.make_key(model, version, utterance)
+        self._memory.invalidate(key)
+        await asyncio.to_thread(self._delete_persisted, key)
+
+    def _delete_persisted(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM sql_generations WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def invalidate(self, model: Optional[str] = None, keep_version: Optional[str] = None) -> int:
+        """
+        Drop cached generations.
+
+        Args:
+            model: Only drop entries of this model (all models if None)
+            keep_version: Keep entries made with this prompt version, drop every other one
+
+        Returns:
+            int: Number of persisted entries removed
+        """
+        clauses, args = [], []
+        if model is not None:
+            clauses.append("model = ?")
+            args.append(model)
+        if keep_version is not None:
+            clauses.append("prompt_version != ?")
+            args.append(keep_version)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        self._memory.clear()
+        with self._lock:
+            removed = self._conn.execute(f"DELETE FROM sql_generations{where}", args).rowcount
+            self._conn.commit()
+        if removed:
+            logger.info(f"🧹 SQL cache: invalidated {removed} entries")
+        return removed
+
+    def prune(self) -> None:
+        """Remove expired entries and enforce max_entries (least recently used first)."""
+        with self._lock:
+            self._prune_locked(time.time())
+
+    def _prune_locked(self, now: float) -> None:
+        self._writes_since_prune = 0
+        self._conn.execute("DELETE FROM sql_generations WHERE created_at < ?", (now - self.ttl,))
+        self._conn.execute(
+            """
+            DELETE FROM sql_generations WHERE key IN (
+                SELECT key FROM sql_generations ORDER BY last_used DESC LIMIT -1 OFFSET ?
+            )
+            """,
+            (self.max_entries,),
+        )
+        self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit-rate counters."""
+        lookups = self.hits + self.misses
+        with self._lock:
+            persisted = self._conn.execute("SELECT COUNT(*) FROM sql_generations").fetchone()[0]
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "disk_hits": self.disk_hits,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "persisted_entries": persisted,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,325 @@
+"""
+Local validation of generated SQL before it is submitted as a read_sql job.
+
+Catches what the small model most often gets wrong - broken syntax, tables
+or columns that are not in the schema, and constructs the target dialect
+does not support - so it can be repaired before the user confirms, without
+an ICC round trip.
+"""
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+from src.models.schema import TableInfo
+from src.utils.sql_parser import (
+    DIALECT_MSSQL,
+    DIALECT_MYSQL,
+    DIALECT_ORACLE,
+    DIALECT_POSTGRES,
+    Token,
+    dialect_for,
+    select_aliases,
+    tokenize,
+)
+
+# Words that are never column references
+SQL_KEYWORDS = {
+    "SELECT", "FROM", "WHERE", "AND", "OR", "NOT", "IN", "IS", "NULL", "LIKE", "ILIKE", "BETWEEN",
+    "EXISTS", "AS", "ON", "USING", "JOIN", "INNER", "LEFT", "RIGHT", "FULL", "OUTER", "CROSS",
+    "NATURAL", "GROUP", "BY", "ORDER", "HAVING", "LIMIT", "OFFSET", "FETCH", "FIRST", "NEXT",
+    "ROWS", "ROW", "ONLY", "TOP", "PERCENT", "DISTINCT", "ALL", "UNIQUE", "UNION", "INTERSECT",
+    "EXCEPT", "MINUS", "WITH", "RECURSIVE", "CASE", "WHEN", "THEN", "ELSE", "END", "ASC", "DESC",
+    "NULLS", "LAST", "TRUE", "FALSE", "INTERVAL", "YEAR", "MONTH", "DAY", "HOUR", "MINUTE",
+    "SECOND", "WEEK", "QUARTER", "CURRENT_DATE", "CURRENT_TIME", "CURRENT_TIMESTAMP", "SYSDATE",
+    "SYSTIMESTAMP", "LOCALTIMESTAMP", "ROWNUM", "LEVEL", "DUAL", "OVER", "PARTITION", "WINDOW",
+    "RANGE", "UNBOUNDED", "PRECEDING", "FOLLOWING", "CURRENT", "DATE", "TIMESTAMP", "TIME",
+    "INT", "INTEGER", "BIGINT", "SMALLINT", "NUMBER", "NUMERIC", "DECIMAL", "FLOAT", "REAL",
+    "DOUBLE", "PRECISION", "CHAR", "VARCHAR", "VARCHAR2", "NVARCHAR", "TEXT", "BOOLEAN",
+    "ESCAPE", "ANY", "SOME", "TIES", "AT", "ZONE", "FOR", "OF", "TO", "INTO", "VALUES",
+    "INSERT", "UPDATE", "DELETE", "MERGE", "CREATE", "ALTER", "DROP", "TRUNCATE", "SET",
+    "BOTH", "LEADING", "TRAILING",
+}
+# Functions whose argument list may contain FROM (not a table reference)
+_FROM_FUNCTIONS = {"EXTRACT", "TRIM", "SUBSTRING", "OVERLAY", "POSITION"}
+_CLAUSE_END = {
+    "WHERE", "GROUP", "ORDER", "HAVING", "LIMIT", "OFFSET", "FETCH", "UNION", "INTERSECT", "EXCEPT",
+    "MINUS", "ON", "USING", "JOIN", "INNER", "LEFT", "RIGHT", "FULL", "CROSS", "NATURAL", "WINDOW",
+    "CONNECT", "START",
+}
+
+# Keywords that need something after them, and keywords that start the next clause
+_NEEDS_OPERAND = {"SELECT", "FROM", "WHERE", "HAVING", "BY", "ON", "USING", "JOIN", "AND", "OR", "NOT", "LIMIT", "OFFSET"}
+_CLAUSE_START = {"WHERE", "GROUP", "ORDER", "HAVING", "LIMIT", "OFFSET", "FETCH", "UNION", "INTERSECT", "EXCEPT", "MINUS"}
+
+
+@dataclass
+class ValidationResult:
+    """Outcome of validating one query."""
+    issues: List[str] = field(default_factory=list)
+    tables: List[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.issues
+
+    def summary(self) -> str:
+        return "\n".join(f"- {issue}" for issue in self.issues)
+
+
+def oracle_version(connection: str) -> Optional[int]:
+    """Major Oracle version encoded in a connection name ('oracle_10' → 10), if any."""
+    match = re.search(r"oracle[_-]?(\d+)", (connection or "").lower())
+    return int(match.group(1)) if match else None
+
+
+def limit_rows(sql: str, rows: int, connection: str = "") -> str:
+    """
+    Limit a simple SELECT to its first ``rows`` rows in the connection's dialect.
+
+    Only meant for single-table queries without ORDER BY (fallbacks and prompt examples).
+    """
+    dialect = dialect_for(connection)
+    if dialect == DIALECT_MSSQL:
+        return re.sub(r"^SELECT\s+", f"SELECT TOP {rows} ", sql, count=1, flags=re.IGNORECASE)
+    if dialect == DIALECT_ORACLE:
+        if (oracle_version(connection) or 12) < 12:
+            keyword = "AND" if re.search(r"\bWHERE\b", sql, re.IGNORECASE) else "WHERE"
+            return f"{sql} {keyword} ROWNUM <= {rows}"
+        return f"{sql} FETCH FIRST {rows} ROWS ONLY"
+    return f"{sql} LIMIT {rows}"
+
+
+def _read_name(tokens: List[Token], i: int) -> Tuple[Optional[str], int]:
+    """Read a possibly qualified identifier (a.b.c) starting at ``i``."""
+    if i >= len(tokens) or tokens[i].kind not in ("word", "quoted"):
+        return None, i
+    parts = [tokens[i].text.strip('"`[]')]
+    i += 1
+    while i + 1 < len(tokens) and tokens[i].text == "." and tokens[i + 1].kind in ("word", "quoted"):
+        parts.append(tokens[i + 1].text.strip('"`[]'))
+        i += 2
+    return ".".join(parts), i
+
+
+def _table_references(tokens: List[Token]) -> Tuple[List[Tuple[str, Optional[str]]], Set[str], Set[str]]:
+    """
+    Find the tables a query reads.
+
+    Returns:
+        (table name, alias) pairs, CTE names and aliases of derived tables
+    """
+    references: List[Tuple[str, Optional[str]]] = []
+    ctes: Set[str] = set()
+    derived: Set[str] = set()
+    functions: List[str] = []
+
+    for i, token in enumerate(tokens):
+        if token.kind == "word" and i + 2 < len(tokens) and tokens[i + 1].upper == "AS" and tokens[i + 2].text == "(":
+            ctes.add(token.text.lower())
+
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token.text == "(":
+            functions.append(tokens[i - 1].upper if i > 0 else "")
+        elif token.text == ")":
+            if functions:
+                functions.pop()
+        elif token.upper in ("FROM", "JOIN") and not (functions and functions[-1] in _FROM_FUNCTIONS):
+            j = i + 1
+            while True:
+                if j < len(tokens) and tokens[j].text == "(":
+                    # Derived table: its own FROM is handled when the loop reaches it
+                    depth, k = 0, j
+                    while k < len(tokens):
+                        depth += tokens[k].text == "("
+                        depth -= tokens[k].text == ")"
+                        if depth == 0:
+                            break
+                        k += 1
+                    alias_at = k + 1
+                    if alias_at < len(tokens) and tokens[alias_at].upper == "AS":
+                        alias_at += 1
+                    if alias_at < len(tokens) and tokens[alias_at].kind == "word" and tokens[alias_at].upper not in SQL_KEYWORDS | _CLAUSE_END:
+                        derived.add(tokens[alias_at].text.lower())
+                    break
+                name, j = _read_name(tokens, j)
+                if name is None:
+                    break
+                alias = None
+                if j < len(tokens) and tokens[j].upper == "AS":
+                    j += 1
+                if j < len(tokens) and tokens[j].kind == "word" and tokens[j].upper not in SQL_KEYWORDS | _CLAUSE_END:
+                    alias = tokens[j].text
+                    j += 1
+                references.append((name, alias))
+                # FROM a, b - comma-separated table list
+                if token.upper == "FROM" and j < len(tokens) and tokens[j].text == ",":
+                    j += 1
+                    continue
+                break
+        i += 1
+    return references, ctes, derived
+
+
+def _check_syntax(sql: str, tokens: List[Token]) -> List[str]:
+    issues = []
+    if not tokens:
+        return ["The query is empty."]
+    if tokens[0].upper not in ("SELECT", "WITH"):
+        issues.append(f"The query must be a SELECT statement, but starts with '{tokens[0].text}'.")
+
+    depth = 0
+    for token in tokens:
+        depth += token.text == "("
+        depth -= token.text == ")"
+        if depth < 0:
+            break
+    if depth != 0:
+        issues.append("Parentheses are not balanced.")
+
+    if any(token.kind == "other" and token.text in ("'", '"', "`") for token in tokens):
+        issues.append("A string literal or quoted identifier is not terminated.")
+
+    for index, token in enumerate(tokens[:-1]):
+        if token.text == ";" and any(t.text != ";" for t in tokens[index + 1:]):
+            issues.append("Only a single statement is allowed.")
+            break
+
+    significant = [token for token in tokens if token.text != ";"]
+    for previous, token in zip(significant, significant[1:] + [None]):
+        if previous.kind != "word" or previous.upper not in _NEEDS_OPERAND:
+            continue
+        if token is None or token.text == ")" or (token.kind == "word" and token.upper in _CLAUSE_START):
+            issues.append(f"'{previous.text}' is not followed by anything.")
+            break
+
+    for previous, token in zip(tokens, tokens[1:]):
+        if previous.text == "," and (token.upper in ("FROM", "WHERE", "GROUP", "ORDER") or token.text == ")"):
+            issues.append(f"Dangling comma before '{token.text}'.")
+            break
+        if previous.upper == "SELECT" and token.upper == "FROM":
+            issues.append("The select list is empty.")
+            break
+    return issues
+
+
+def _check_schema(sql: str, tokens: List[Token], tables: List[TableInfo], result: ValidationResult) -> List[str]:
+    issues: List[str] = []
+    references, ctes, derived = _table_references(tokens)
+    known: Dict[str, TableInfo] = {}
+    for table in tables:
+        known[table.name.lower()] = table
+        known.setdefault(table.name.lower().rsplit(".", 1)[-1], table)
+
+    aliases: Dict[str, TableInfo] = {}
+    all_known = True
+    for name, alias in references:
+        lowered = name.lower()
+        table = known.get(lowered) or known.get(lowered.rsplit(".", 1)[-1])
+        if table is None:
+            all_known = False
+            if lowered not in ctes and lowered != "dual":
+                issues.append(f"Unknown table '{name}'.")
+            continue
+        result.tables.append(table.name)
+        aliases[lowered] = aliases[lowered.rsplit(".", 1)[-1]] = table
+        if alias:
+            aliases[alias.lower()] = table
+    if derived or ctes:
+        all_known = False
+
+    def has_column(table: TableInfo, column: str) -> bool:
+        return any(c.name.lower() == column.lower() for c in table.columns)
+
+    output_names = {name.lower() for name in select_aliases(sql)}
+    defined_aliases = {
+        tokens[i + 1].text.lower() for i in range(len(tokens) - 1)
+        if tokens[i].upper == "AS" and tokens[i + 1].kind in ("word", "quoted")
+    }
+    referenced = [aliases[name.lower()] for name, _ in references if name.lower() in aliases]
+    unknown_columns: List[str] = []
+
+    for i, token in enumerate(tokens):
+        if token.kind not in ("word", "quoted"):
+            continue
+        # qualifier.column
+        if i + 2 < len(tokens) and tokens[i + 1].text == "." and tokens[i + 2].kind in ("word", "quoted"):
+            table = aliases.get(token.text.strip('"`[]').lower())
+            column = tokens[i + 2].text.strip('"`[]')
+            if table is not None and table.columns and tokens[i + 2].text != "*" and not has_column(table, column):
+                unknown_columns.append(f"{token.text}.{column}")
+            continue
+        if token.kind != "word" or (i > 0 and tokens[i - 1].text == "."):
+            continue
+        # Unqualified identifiers can only be checked when every source table is known
+        if not all_known or not referenced or any(not table.columns for table in referenced):
+            continue
+        word = token.text.lower()
+        if (
+            token.upper in SQL_KEYWORDS
+            or (i + 1 < len(tokens) and tokens[i + 1].text == "(")
+            or word in aliases
+            or word in output_names
+            or word in defined_aliases
+            or (i > 0 and tokens[i - 1].upper in ("AS", "FROM", "JOIN"))
+        ):
+            continue
+        if not any(has_column(table, token.text) for table in referenced):
+            unknown_columns.append(token.text)
+
+    for column in dict.fromkeys(unknown_columns):
+        issues.append(f"Unknown column '{column}'.")
+    return issues
+
+
+def _check_dialect(tokens: List[Token], connection: str) -> List[str]:
+    dialect = dialect_for(connection)
+    words = [token.upper for token in tokens if token.kind == "word"]
+    issues = []
+
+    if dialect in (DIALECT_ORACLE, DIALECT_MSSQL) and "LIMIT" in words:
+        if dialect == DIALECT_MSSQL:
+            hint = "use SELECT TOP n"
+        elif (oracle_version(connection) or 12) < 12:
+            hint = "use WHERE ROWNUM <= n"
+        else:
+            hint = "use FETCH FIRST n ROWS ONLY"
+        issues.append(f"LIMIT is not supported on {dialect} connections; {hint}.")
+    if dialect in (DIALECT_ORACLE, DIALECT_POSTGRES, DIALECT_MYSQL):
+        for previous, token in zip(tokens, tokens[1:]):
+            if token.upper == "TOP" and previous.upper in ("SELECT", "DISTINCT"):
+                issues.append(f"SELECT TOP is not supported on {dialect} connections.")
+                break
+    if dialect == DIALECT_ORACLE:
+        if "FETCH" in words and (oracle_version(connection) or 12) < 12:
+            issues.append("FETCH FIRST is not supported before Oracle 12c; use WHERE ROWNUM <= n.")
+        if "ILIKE" in words:
+            issues.append("ILIKE is not supported on oracle connections; use UPPER(col) LIKE UPPER(pattern).")
+        if any(token.text == "::" for token in tokens):
+            issues.append("'::' casts are not supported on oracle connections; use CAST(x AS type).")
+    if dialect in (DIALECT_ORACLE, DIALECT_MSSQL, DIALECT_POSTGRES):
+        if any(token.kind == "quoted" and token.text.startswith("`") for token in tokens):
+            issues.append(f"Backtick-quoted identifiers are not supported on {dialect} connections.")
+    return issues
+
+
+def validate_sql(sql: str, tables: List[TableInfo], connection: str = "") -> ValidationResult:
+    """
+    Validate a generated query locally.
+
+    Args:
+        sql: Query text
+        tables: Known tables of the connection (schema checks are skipped if empty)
+        connection: Connection identifier, used to pick dialect rules
+
+    Returns:
+        ValidationResult: Issues found (empty if the query looks valid) and the tables it reads
+    """
+    result = ValidationResult()
+    tokens = tokenize(sql)
+    result.issues.extend(_check_syntax(sql, tokens))
+    if tokens and tables:
+        result.issues.extend(_check_schema(sql, tokens, tables, result))
+    result.issues.extend(_check_dialect(tokens, connection))
+    return result
@@ -0,0 +1,246 @@
+"""
+Shared state of in-flight chat turns, keyed by session.
+
+The UI starts a turn on one worker process and polls for its streamed text
+and final result, possibly from another worker. Keeping turns in the same
+backend as session memory lets any worker answer the poll. Finished turns
+nobody collects (closed tabs) and running turns whose worker died are
+expired after a TTL, so they never block a session for good.
+
+Methods are synchronous (the UI callbacks run in threads); call them
+through ``asyncio.to_thread`` from the event loop.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from src.utils.config import MEMORY_STORE_CONFIG
+
+
+@dataclass
+class TurnState:
+    """One turn of a session: streamed text so far and, once done, the router result."""
+    turn_id: str
+    started_at: float
+    updated_at: float
+    text: str = ""
+    done: bool = False
+    result: Optional[Dict[str, Any]] = None
+
+
+class TurnStore(ABC):
+    """
+    At most one turn per session.
+
+    Args:
+        result_ttl: Seconds a finished turn waits to be collected
+        stale_after: Seconds after which a running turn is considered lost (its worker died)
+    """
+
+    def __init__(
+        self,
+        result_ttl: float = MEMORY_STORE_CONFIG["turn_result_ttl"],
+        stale_after: float = MEMORY_STORE_CONFIG["turn_stale_after"],
+    ):
+        self.result_ttl = result_ttl
+        self.stale_after = stale_after
+
+    def expired(self, state: TurnState, now: float) -> bool:
+        if state.done:
+            return state.updated_at + self.result_ttl < now
+        return state.started_at + self.stale_after < now
+
+    @abstractmethod
+    def start(self, session_id: str) -> Optional[str]:
+        """
+        Register a running turn.
+
+        A finished or expired turn of the session is replaced.
+
+        Returns:
+            Optional[str]: Id of the new turn, or None if the session already has a running turn
+        """
+
+    @abstractmethod
+    def update_text(self, session_id: str, turn_id: str, text: str) -> None:
+        """Publish the text streamed so far (ignored if the turn was replaced)."""
+
+    @abstractmethod
+    def finish(self, session_id: str, turn_id: str, result: Dict[str, Any]) -> None:
+        """Store the router result and mark the turn done (ignored if the turn was replaced)."""
+
+    @abstractmethod
+    def get(self, session_id: str) -> Optional[TurnState]:
+        """Return the session's current turn, or None if there is none or it expired."""
+
+    @abstractmethod
+    def take(self, session_id: str, turn_id: str) -> bool:
+        """Remove a finished turn; True for exactly one caller, so its result is shown once."""
+
+    def close(self) -> None:
+        """Release resources."""
+
+
+class InMemoryTurnStore(TurnStore):
+    """Process-local turns. Only correct with a single worker process."""
+
+    def __init__(self, **kwargs: Any):
+        super().__init__(**kwargs)
+        self._turns: Dict[str, TurnState] = {}
+        self._lock = threading.Lock()
+
+    def start(self, session_id: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            for key in [key for key, state in self._turns.items() if self.expired(state, now)]:
+                del self._turns[key]
+            current = self._turns.get(session_id)
+            if current is not None and not current.done:
+                return None
+            turn_id = uuid.uuid4().hex
+            self._turns[session_id] = TurnState(turn_id=turn_id, started_at=now, updated_at=now)
+            return turn_id
+
+    def _current(self, session_id: str, turn_id: str) -> Optional[TurnState]:
+        state = self._turns.get(session_id)
+        return state if state is not None and state.turn_id == turn_id else None
+
+    def update_text(self, session_id: str, turn_id: str, text: str) -> None:
+        with self._lock:
+            state = self._current(session_id, turn_id)
+            if state is not None and not state.done:
+                state.text, state.updated_at = text, time.time()
+
+    def finish(self, session_id: str, turn_id: str, result: Dict[str, Any]) -> None:
+        with self._lock:
+            state = self._current(session_id, turn_id)
+            if state is not None:
+                state.result, state.done, state.updated_at = result, True, time.time()
+
+    def get(self, session_id: str) -> Optional[TurnState]:
+        with self._lock:
+            state = self._turns.get(session_id)
+            if state is not None and self.expired(state, time.time()):
+                del self._turns[session_id]
+                return None
+            return TurnState(**vars(state)) if state is not None else None
+
+    def take(self, session_id: str, turn_id: str) -> bool:
+        with self._lock:
+            state = self._current(session_id, turn_id)
+            if state is None or not state.done:
+                return False
+            del self._turns[session_id]
+            return True
+
+
+class SQLiteTurnStore(TurnStore):
+    """Turns in a SQLite file, shared by every worker process on the host."""
+
+    def __init__(self, path: str = MEMORY_STORE_CONFIG["path"], **kwargs: Any):
+        super().__init__(**kwargs)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = self._connect(path)
+
+    @staticmethod
+    def _connect(path: str) -> sqlite3.Connection:
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS turns (
+                session_id TEXT PRIMARY KEY,
+                turn_id TEXT NOT NULL,
+                started_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                done INTEGER NOT NULL,
+                text TEXT NOT NULL,
+                result TEXT
+            )
+            """
+        )
+        conn.commit()
+        return conn
+
+    def start(self, session_id: str) -> Optional[str]:
+        now = time.time()
+        turn_id = uuid.uuid4().hex
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM turns WHERE (done = 1 AND updated_at < ?) OR (done = 0 AND started_at < ?)",
+                (now - self.result_ttl, now - self.stale_after),
+            )
+            # One statement, so two workers starting a turn for the same session cannot both win
+            cursor = self._conn.execute(
+                """
+                INSERT INTO turns VALUES (?, ?, ?, ?, 0, '', NULL)
+                ON CONFLICT(session_id) DO UPDATE SET
+                    turn_id = excluded.turn_id, started_at = excluded.started_at,
+                    updated_at = excluded.updated_at, done = 0, text = '', result = NULL
+                WHERE turns.done = 1
+                """,
+                (session_id, turn_id, now, now),
+            )
+            self._conn.commit()
+        return turn_id if cursor.rowcount == 1 else None
+
+    def update_text(self, session_id: str, turn_id: str, text: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE turns SET text = ?, updated_at = ? WHERE session_id = ? AND turn_id = ? AND done = 0",
+                (text, time.time(), session_id, turn_id),
+            )
+            self._conn.commit()
+
+    def finish(self, session_id: str, turn_id: str, result: Dict[str, Any]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE turns SET done = 1, result = ?, updated_at = ? WHERE session_id = ? AND turn_id = ?",
+                (json.dumps(result, default=str), time.time(), session_id, turn_id),
+            )
+            self._conn.commit()
+
+    def get(self, session_id: str) -> Optional[TurnState]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT turn_id, started_at, updated_at, text, done, result FROM turns WHERE session_id = ?",
+                (session_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        state = TurnState(
+            turn_id=row[0], started_at=row[1], updated_at=row[2], text=row[3], done=bool(row[4]),
+            result=json.loads(row[5]) if row[5] is not None else None,
+        )
+        if self.expired(state, time.time()):
+            with self._lock:
+                self._conn.execute("DELETE FROM turns WHERE session_id = ? AND turn_id = ?", (session_id, state.turn_id))
+                self._conn.commit()
+            return None
+        return state
+
+    def take(self, session_id: str, turn_id: str) -> bool:
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM turns WHERE session_id = ? AND turn_id = ? AND done = 1", (session_id, turn_id)
+            )
+            self._conn.commit()
+        return cursor.rowcount == 1
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def build_turn_store(backend: str = MEMORY_STORE_CONFIG["backend"]) -> TurnStore:
+    """Create the turn store matching the memory store backend ('memory' or 'sqlite')."""
+    return SQLiteTurnStore() if backend == "sqlite" else InMemoryTurnStore()
@@ -1,14 +1,14 @@
-from typing import List
+from typing import List, Optional
 import uuid
-from httpx import AsyncClient
 from src.models.natural_language import (
+    BaseLLMRequest,
     SendEmailLLMRequest,
     ReadSqlLLMRequest,
     WriteDataLLMRequest,
 )
 from src.payload_builders.wire_builder import build_wire_payload
 from src.repositories.job_repository import JobRepository
-from src.utils.auth import authenticate
+from src.utils.http_client import get_http_client
 
 
 
@@ -30,13 +30,11 @@ async def write_data_job(data: WriteDataLLMRequest) -> dict:
     if not data.id:
         data.id = str(uuid.uuid4())
 
-    # Authenticate and create HTTP client with token
-    token = await authenticate()
-    headers = {"Authorization": f"Bearer {token}"} if token else {}
-    
-    async with AsyncClient(headers=headers, verify=False) as client:
-        repo = JobRepository(client)
-        await JobRepository.write_data_job(repo, data)
+    # Shared pooled client; the bearer token is injected per request from the token cache
+    repo = JobRepository(get_http_client())
+    response = await JobRepository.write_data_job(repo, data)
+    if not response.success:
+        return {"message": "Error", "error": response.error, "data": data.model_dump()}
     return {"message": "Success", "data": data.model_dump()}
 
 
@@ -62,13 +60,9 @@ async def read_sql_job(data: ReadSqlLLMRequest) -> dict:
     if not data.id:
         data.id = str(uuid.uuid4())
     
-    # Authenticate and create HTTP client with token
-    token = await authenticate()
-    headers = {"Authorization": f"Bearer {token}"} if token else {}
-    
-    async with AsyncClient(headers=headers, verify=False) as client:
-        repo = JobRepository(client)
-        response, columns = await JobRepository.read_sql_job(repo, data)
+    # Shared pooled client; the bearer token is injected per request from the token cache
+    repo = JobRepository(get_http_client())
+    response, columns = await JobRepository.read_sql_job(repo, data)
     
     if response.success:
         return {
@@ -98,16 +92,50 @@ async def send_email_job(data: SendEmailLLMRequest) -> dict:
     if not data.id:
         data.id = str(uuid.uuid4())
 
-    # Authenticate and create HTTP client with token
-    token = await authenticate()
-    headers = {"Authorization": f"Bearer {token}"} if token else {}
-    
-    async with AsyncClient(headers=headers, verify=False) as client:
-        repo = JobRepository(client)
-        await JobRepository.send_email_job(repo, data)
+    # Shared pooled client; the bearer token is injected per request from the token cache
+    repo = JobRepository(get_http_client())
+    response = await JobRepository.send_email_job(repo, data)
+    if not response.success:
+        return {"message": "Error", "error": response.error, "data": data.model_dump()}
     return {"message": "Success", "data": data.model_dump()}
 
 
+async def submit_jobs(requests: List[BaseLLMRequest], concurrency: Optional[int] = None) -> List[dict]:
+    """
+    Create many read_sql/write_data/send_email jobs concurrently.
+    Use this for batch workloads instead of calling the single-job tools in a loop.
+    
+    IMPORTANT: A write_data request with an empty data_set is chained to the
+    closest preceding read_sql request in the list.
+    - data_set: Filled with the job_id returned by that read_sql job
+    - columns: Filled with that read_sql job's columns if left empty
+    
+    Args:
+        requests (List[BaseLLMRequest]): Requests to submit, in dependency order.
+        concurrency (Optional[int]): Maximum number of jobs in flight.
+    Returns:
+        List[dict]: One result per request, in input order, each with:
+            - message: Success or Error
+            - job_id: The created job ID (if successful)
+            - columns: Column names (read_sql only)
+            - error: Error message (if failed)
+    """
+    repo = JobRepository(get_http_client())
+    results = await JobRepository.submit_many(repo, requests, concurrency)
+
+    summaries = []
+    for result in results:
+        summary = {"message": "Success" if result.response.success else "Error", "template": result.template_key}
+        if result.response.success:
+            summary["job_id"] = result.response.data.object_id
+        else:
+            summary["error"] = result.response.error
+        if result.columns is not None:
+            summary["columns"] = result.columns
+        summaries.append(summary)
+    return summaries
+
+
 class ICCToolkit:
     @staticmethod
     def get_tools() -> List:
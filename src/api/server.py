@@ -0,0 +1,300 @@
+"""
+HTTP API for the staged router (ASGI, Starlette).
+
+Lets other systems drive conversations without the Dash UI:
+
+    POST   /sessions/{session_id}/turns   {"message": "...", "connection": "..."}
+    GET    /sessions/{session_id}         current Memory and version
+    POST   /sessions/{session_id}/reset   start the conversation over
+    GET    /health
+
+A turn returns JSON, or server-sent events when the client sends
+``Accept: text/event-stream`` (or ``?stream=true``): ``token`` events while
+the SQL agent generates, then one ``final`` event (or ``error``).
+
+Turns of one session are serialized per worker, and the memory store's
+version check catches concurrent turns across workers (409). Every response
+carries ``X-Response-Time`` and a ``Server-Timing`` header with per-phase
+durations (load, turn, save).
+
+Run:
+    python -m src.api.server            # API_SERVER_* settings
+    uvicorn src.api.server:app --workers 4
+"""
+import asyncio
+import json
+import logging
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from src.ai.router import handle_turn_stream, Memory, MemoryStore, VersionConflictError, build_memory_store
+from src.utils.config import API_SERVER_CONFIG, MEMORY_STORE_CONFIG
+from src.utils.event_loop import KeyedLocks
+from src.utils.http_client import startup_http_client, shutdown_http_client
+
+logger = logging.getLogger(__name__)
+
+
+class TimingMiddleware:
+    """
+    Adds ``X-Response-Time`` (ms until headers are sent) and ``Server-Timing``.
+
+    Handlers add phases with ``timed(request, name)``; they are collected in
+    the request state and written into the response headers.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        timings: Dict[str, float] = {}
+        scope.setdefault("state", {})["timings"] = timings
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                elapsed = (time.perf_counter() - start) * 1000
+                phases = [f"{name};dur={duration:.1f}" for name, duration in timings.items()]
+                phases.append(f"total;dur={elapsed:.1f}")
+                headers = list(message.get("headers", []))
+                headers.append((b"x-response-time", f"{elapsed:.1f}ms".encode("latin-1")))
+                headers.append((b"server-timing", ", ".join(phases).encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        await self.app(scope, receive, send_with_timing)
+
+
+@contextmanager
+def timed(request: Request, phase: str):
+    """Record the duration of a block (ms) for the Server-Timing header."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        request.state.timings[phase] = (time.perf_counter() - start) * 1000
+
+
+def error_response(status_code: int, message: str) -> JSONResponse:
+    return JSONResponse({"error": message}, status_code=status_code)
+
+
+def sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Format one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def wants_stream(request: Request) -> bool:
+    if request.query_params.get("stream", "").lower() in ("1", "true", "yes"):
+        return True
+    return "text/event-stream" in request.headers.get("accept", "")
+
+
+def turn_timeout() -> Optional[float]:
+    return API_SERVER_CONFIG["turn_timeout"] or None
+
+
+async def read_turn_request(request: Request) -> Dict[str, Any]:
+    """Parse and validate the turn body; raises ValueError with a client-facing message."""
+    try:
+        body = await request.json()
+    except json.JSONDecodeError:
+        raise ValueError("Request body must be JSON")
+    if not isinstance(body, dict):
+        raise ValueError("Request body must be a JSON object")
+    message = body.get("message")
+    if not isinstance(message, str) or not message.strip():
+        raise ValueError("'message' must be a non-empty string")
+    connection = body.get("connection")
+    if connection is not None and not isinstance(connection, str):
+        raise ValueError("'connection' must be a string")
+    return {"message": message, "connection": connection}
+
+
+def turn_result(session_id: str, memory: Memory, response: str, version: int) -> Dict[str, Any]:
+    return {
+        "session_id": session_id,
+        "response": response,
+        "stage": memory.stage.value,
+        "version": version,
+    }
+
+
+async def run_turn(
+    request: Request, session_id: str, message: str, connection: Optional[str]
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Run one turn under the session lock, yielding token dicts and then the final result.
+
+    Raises:
+        VersionConflictError: If another worker changed the session during the turn
+    """
+    store: MemoryStore = request.app.state.memory_store
+    async with request.app.state.session_locks.hold(session_id):
+        with timed(request, "load"):
+            stored = await store.load_or_create(session_id)
+        memory = stored.memory
+        if connection:
+            memory.connection = connection
+
+        updated_memory, response = memory, ""
+        with timed(request, "turn"):
+            async for event in handle_turn_stream(memory, message):
+                if event.kind == "token":
+                    yield {"text": event.text}
+                else:
+                    updated_memory, response = event.memory, event.text
+
+        with timed(request, "save"):
+            version = await store.save(session_id, updated_memory, expected_version=stored.version)
+        yield turn_result(session_id, updated_memory, response, version)
+
+
+async def post_turn(request: Request) -> Response:
+    session_id = request.path_params["session_id"]
+    try:
+        body = await read_turn_request(request)
+    except ValueError as e:
+        return error_response(400, str(e))
+
+    if wants_stream(request):
+        return StreamingResponse(
+            stream_turn(request, session_id, body["message"], body["connection"]),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    result: Dict[str, Any] = {}
+    try:
+        async with asyncio.timeout(turn_timeout()):
+            async for item in run_turn(request, session_id, body["message"], body["connection"]):
+                result = item
+    except VersionConflictError as e:
+        logger.warning(f"⚠️ {e}")
+        return error_response(409, "Session was updated concurrently, resend the message")
+    except TimeoutError:
+        logger.warning(f"⏱️ Turn for session '{session_id}' timed out")
+        return error_response(504, "Turn timed out")
+    except Exception as e:
+        logger.error(f"❌ Turn for session '{session_id}' failed: {e}", exc_info=True)
+        return error_response(500, str(e))
+    return JSONResponse(result)
+
+
+async def stream_turn(request: Request, session_id: str, message: str, connection: Optional[str]) -> AsyncIterator[str]:
+    """
+    SSE body: token events, then final (or error).
+
+    Headers are sent before the turn runs, so errors become events and the
+    phase timings travel in the final event instead of Server-Timing.
+    """
+    try:
+        async with asyncio.timeout(turn_timeout()):
+            async for item in run_turn(request, session_id, message, connection):
+                if "response" in item:
+                    timings = {phase: round(duration, 1) for phase, duration in request.state.timings.items()}
+                    yield sse_event("final", {**item, "timings": timings})
+                else:
+                    yield sse_event("token", item)
+    except VersionConflictError as e:
+        logger.warning(f"⚠️ {e}")
+        yield sse_event("error", {"status": 409, "error": "Session was updated concurrently, resend the message"})
+    except TimeoutError:
+        logger.warning(f"⏱️ Turn for session '{session_id}' timed out")
+        yield sse_event("error", {"status": 504, "error": "Turn timed out"})
+    except Exception as e:
+        logger.error(f"❌ Turn for session '{session_id}' failed: {e}", exc_info=True)
+        yield sse_event("error", {"status": 500, "error": str(e)})
+
+
+async def get_session(request: Request) -> Response:
+    session_id = request.path_params["session_id"]
+    with timed(request, "load"):
+        stored = await request.app.state.memory_store.load(session_id)
+    if stored is None:
+        return error_response(404, f"Unknown session '{session_id}'")
+    return JSONResponse({"session_id": session_id, "version": stored.version, "memory": stored.memory.to_dict()})
+
+
+async def reset_session(request: Request) -> Response:
+    """Start over; the session keeps its connection."""
+    session_id = request.path_params["session_id"]
+    store: MemoryStore = request.app.state.memory_store
+    async with request.app.state.session_locks.hold(session_id):
+        stored = await store.load_or_create(session_id)
+        stored.memory.reset()
+        try:
+            with timed(request, "save"):
+                version = await store.save(session_id, stored.memory, expected_version=stored.version)
+        except VersionConflictError as e:
+            logger.warning(f"⚠️ {e}")
+            return error_response(409, "Session was updated concurrently, retry the reset")
+    return JSONResponse({"session_id": session_id, "version": version, "stage": stored.memory.stage.value})
+
+
+async def health(request: Request) -> Response:
+    return JSONResponse({"status": "ok"})
+
+
+@asynccontextmanager
+async def lifespan(app: Starlette) -> AsyncIterator[None]:
+    """Per worker process: open the pooled HTTP client and the memory store."""
+    await startup_http_client()
+    app.state.memory_store = build_memory_store()
+    app.state.session_locks = KeyedLocks()
+    try:
+        yield
+    finally:
+        await app.state.memory_store.close()
+        await shutdown_http_client()
+
+
+def create_app() -> Starlette:
+    """Build the ASGI application."""
+    app = Starlette(
+        routes=[
+            Route("/health", health, methods=["GET"]),
+            Route("/sessions/{session_id}/turns", post_turn, methods=["POST"]),
+            Route("/sessions/{session_id}/reset", reset_session, methods=["POST"]),
+            Route("/sessions/{session_id}", get_session, methods=["GET"]),
+        ],
+        lifespan=lifespan,
+    )
+    app.add_middleware(TimingMiddleware)
+    return app
+
+
+app = create_app()
+
+
+def main() -> None:
+    """Serve the API with uvicorn using API_SERVER_CONFIG."""
+    try:
+        import uvicorn
+    except ImportError:
+        raise SystemExit("uvicorn is required to run the API server: pip install uvicorn")
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    workers = API_SERVER_CONFIG["workers"]
+    if workers > 1 and MEMORY_STORE_CONFIG["backend"] == "memory":
+        logger.warning("⚠️ MEMORY_STORE_BACKEND=memory is per process; sessions will not be shared between workers")
+    uvicorn.run(
+        "src.api.server:app",
+        host=API_SERVER_CONFIG["host"],
+        port=API_SERVER_CONFIG["port"],
+        workers=workers,
+    )
+
+
+if __name__ == "__main__":
+    main()
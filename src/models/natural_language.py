@@ -23,6 +23,11 @@ class BaseLLMRequest(BaseModel):
         if not self.id:
             self.id = str(uuid.uuid4())
 
+    def idempotency_key(self) -> str:
+        """Stable key for job creation, so retried job/save requests never create duplicate jobs."""
+        self.ensure_id()
+        return str(uuid.uuid5(uuid.NAMESPACE_URL, f"icc-job:{self.template_key()}:{self.id}"))
+
     def template_key(self) -> str:
         raise NotImplementedError
 
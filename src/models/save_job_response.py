@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, Generic, TypeVar
+from typing import Optional, Generic, TypeVar, List
 
 T = TypeVar("T")
 
@@ -38,3 +38,14 @@ class APIResponse(BaseModel, Generic[T]):
         """Create an error response"""
         return cls(success=False, data=None, error=error, status_code=status_code)
 
+
+class BulkJobResult(BaseModel):
+    """
+    Outcome of one request submitted through JobRepository.submit_many.
+    Results are returned in the same order as the submitted requests.
+    """
+    index: int = Field(description="Position of the request in the submitted list")
+    template_key: str = Field(description="Template of the request (READSQL, WRITEDATA, SENDEMAIL)")
+    response: APIResponse[JobResponse] = Field(description="API response of the job creation")
+    columns: Optional[List[str]] = Field(None, description="Column names, for read_sql jobs")
+    depends_on: Optional[int] = Field(None, description="Index of the read_sql job this write_data job was chained to")
@@ -0,0 +1,26 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+
+class ColumnInfo(BaseModel):
+    """
+    A column of a database table as shown to the SQL agent.
+    """
+    name: str
+    type: str = ""
+    primary_key: bool = False
+    references: Optional[str] = None  # "table.column" of a foreign key target
+    comment: str = ""
+
+
+class TableInfo(BaseModel):
+    """
+    A database table with its columns and keys.
+    """
+    name: str
+    columns: List[ColumnInfo]
+    comment: str = ""
+
+    def referenced_tables(self) -> List[str]:
+        """Names of the tables this table has foreign keys to."""
+        return [column.references.rsplit(".", 1)[0] for column in self.columns if column.references]
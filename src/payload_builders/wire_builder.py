@@ -1,6 +1,7 @@
 from typing import Any, Dict, List
 from pydantic import BaseModel
 from src.models.wire import WirePayload, WireVariable, WireProps
+from src.utils.tracing import span
 from src.models.definition_map import (
     TEMPLATES,
     DEFAULT_PRIORITY,
@@ -18,6 +19,14 @@ def build_wire_payload(request: BaseModel, column_names = "") -> WirePayload:
     Converts an object derived from BaseLLMRequest (with LLM-friendly field names)
     into a wire payload (using definition IDs).
     """
+    with span("payload.build_wire") as payload_span:
+        wire = _build_wire_payload(request, column_names)
+        if payload_span.recording:
+            payload_span.set_attributes({"payload.template": wire.template, "payload.variables": len(wire.variables)})
+        return wire
+
+
+def _build_wire_payload(request: BaseModel, column_names = "") -> WirePayload:
     template_key = request.template_key()
     if template_key not in TEMPLATES:
         raise UnknownTemplateKey(f"Unknown template key: {template_key}")
@@ -1,10 +1,18 @@
+import asyncio
+import time
 from typing import Optional, Dict, Any, TypeVar, List
+import httpx
 from httpx import AsyncClient
 from pydantic import BaseModel
 from starlette.exceptions import HTTPException
 
 from src.models.save_job_response import  APIResponse
+from src.utils.circuit_breaker import CircuitOpenError, get_circuit_breaker
 from src.utils.config import API_CONFIG
+from src.utils.http_client import get_http_client
+from src.utils.metrics import endpoint_label, request_metrics
+from src.utils.retry import RetryPolicy, DEFAULT_RETRY_POLICY
+from src.utils.tracing import SPAN_KIND_CLIENT, http_trace_extensions, span
 
 from loguru import logger
 
@@ -25,11 +33,21 @@ class BaseRepository:
     HTTP_STATUS_CODE_GET = 201
 
     INTERNAL_SERVER_ERROR_STATUS_CODE = 500
+    BAD_GATEWAY_STATUS_CODE = 502
+    SERVICE_UNAVAILABLE_STATUS_CODE = 503
+    GATEWAY_TIMEOUT_STATUS_CODE = 504
     BAD_REQUEST_STATUS_CODE = 400
 
-    def __init__(self, client: AsyncClient):
-        self.client = client
+    def __init__(self, client: Optional[AsyncClient] = None, retry_policy: Optional[RetryPolicy] = None):
+        # Default to the shared, pooled client so connections are reused across jobs
+        self.client = client if client is not None else get_http_client()
         self.base_url = API_CONFIG["api_base_url"]
+        self.retry_policy = retry_policy or DEFAULT_RETRY_POLICY
+        self.timeout = httpx.Timeout(
+            API_CONFIG["timeout"],
+            connect=API_CONFIG["connect_timeout"],
+            read=API_CONFIG["read_timeout"],
+        )
 
     async def _make_request(
         self,
@@ -37,42 +55,177 @@ class BaseRepository:
         endpoint: str = None,
         data: Optional[Dict[str, Any]] = None,
         params: Optional[Dict[str, Any]] = None,
+        idempotency_key: Optional[str] = None,
+        retryable: Optional[bool] = None,
     ) -> Dict[str, Any]:
-        """Make HTTP request to the API. If full_url is provided, it is used directly."""
+        """
+        Make HTTP request to the API. If full_url is provided, it is used directly.
+
+        Failed attempts are retried according to ``self.retry_policy`` within the
+        total ``API_CONFIG["timeout"]`` budget. POSTs are only retried when they
+        carry an idempotency key or are explicitly marked ``retryable``; a POST
+        that never reached the server (connect error) is always safe to retry.
+        Every attempt goes through the endpoint's circuit breaker, which raises
+        ``CircuitOpenError`` instead of sending while the endpoint is failing.
+        """
 
         # If endpoint is a full URL (starts with http), use it as-is, otherwise concatenate
         if endpoint and endpoint.startswith("http"):
             url = endpoint
         else:
             url = f"{self.base_url}{endpoint if endpoint else ''}"
+        label = endpoint_label(url)
         logger.debug(f"Making {method.upper()} request to {url}")
 
-        if method.lower() == "post":
-            response = await self.client.post(url, json=data, params=params)
-        elif method.lower() == "get":
-            response = await self.client.get(url, params=params)
-        else:
+        if method.lower() not in (self.HTTP_METHOD_POST, self.HTTP_METHOD_GET):
             raise NotImplementedError(f"Method {method.upper()} is not implemented")
 
-        result = response.json()
+        headers = {"Idempotency-Key": idempotency_key} if idempotency_key else {}
+        if retryable is None:
+            retryable = method.lower() == self.HTTP_METHOD_GET or idempotency_key is not None
 
+        with span("icc.request", **{"http.method": method.upper(), "icc.endpoint": label}) as request_span:
+            return await self._request_with_retries(method, url, label, data, params, headers, retryable, request_span)
+
+    async def _request_with_retries(
+        self,
+        method: str,
+        url: str,
+        label: str,
+        data: Optional[Dict[str, Any]],
+        params: Optional[Dict[str, Any]],
+        headers: Dict[str, str],
+        retryable: bool,
+        request_span: Any,
+    ) -> Dict[str, Any]:
+        """Attempt loop of ``_make_request``; each attempt is its own ``icc.attempt`` span."""
+        breaker = get_circuit_breaker(label)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + API_CONFIG["timeout"]
+        attempt = 0
+
+        while True:
+            attempt += 1
+            remaining = deadline - loop.time()
+            probe = breaker.acquire()
+            started = time.perf_counter()
+            request_span.set_attribute("icc.attempts", attempt)
+            try:
+                with span("icc.attempt", kind=SPAN_KIND_CLIENT, **{"icc.attempt": attempt}) as attempt_span:
+                    response = await asyncio.wait_for(
+                        self._send(method, url, data, params, headers), timeout=max(remaining, 0.001)
+                    )
+                    attempt_span.set_attribute("http.status_code", response.status_code)
+            except (httpx.TransportError, asyncio.TimeoutError) as e:
+                breaker.record_failure(probe)
+                request_metrics.record_request(label, time.perf_counter() - started, error=True)
+                timed_out = isinstance(e, (httpx.TimeoutException, asyncio.TimeoutError))
+                never_sent = isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout))
+                if (retryable or never_sent) and await self._backoff(label, attempt, deadline):
+                    logger.warning(f"⚠️ {method.upper()} {label} failed ({type(e).__name__}), retrying (attempt {attempt + 1})")
+                    continue
+                status_code = self.GATEWAY_TIMEOUT_STATUS_CODE if timed_out else self.SERVICE_UNAVAILABLE_STATUS_CODE
+                error_msg = f"API request failed - {type(e).__name__}: {str(e) or 'request timed out'}"
+                logger.error(error_msg)
+                raise HTTPException(status_code=status_code, detail=error_msg) from e
+            except BaseException:
+                # Cancelled by the caller: free the slot without blaming the endpoint
+                breaker.release(probe)
+                raise
+
+            latency = time.perf_counter() - started
+            if response.status_code >= self.INTERNAL_SERVER_ERROR_STATUS_CODE:
+                breaker.record_failure(probe)
+            else:
+                breaker.record_success(latency, probe)
+            request_metrics.record_request(
+                label,
+                latency,
+                status_code=response.status_code,
+                error=response.status_code >= self.BAD_REQUEST_STATUS_CODE,
+            )
+            if retryable and self.retry_policy.should_retry_status(response.status_code, attempt):
+                retry_after = response.headers.get("Retry-After")
+                if await self._backoff(label, attempt, deadline, retry_after):
+                    logger.warning(f"⚠️ {method.upper()} {label} returned {response.status_code}, retrying (attempt {attempt + 1})")
+                    continue
+            break
+
+        # Check the status before parsing: error pages from proxies are often not JSON
         if response.status_code >= self.BAD_REQUEST_STATUS_CODE:
-            error_msg = f"API request failed - Status: {response.status_code}, Response: {result}"
+            detail = self._parse_body(response)
+            error_msg = f"API request failed - Status: {response.status_code}, Response: {detail}"
             logger.error(error_msg)
-            raise HTTPException(status_code=response.status_code, detail=result)
+            raise HTTPException(status_code=response.status_code, detail=detail)
+
+        result = self._parse_body(response)
+        if not isinstance(result, (dict, list)):
+            error_msg = f"API returned a non-JSON response - Status: {response.status_code}, Response: {result}"
+            logger.error(error_msg)
+            raise HTTPException(status_code=self.BAD_GATEWAY_STATUS_CODE, detail=error_msg)
 
         logger.debug(f"API request successful - Status: {response.status_code}")
         return result
 
+    async def _send(
+        self,
+        method: str,
+        url: str,
+        data: Optional[Dict[str, Any]],
+        params: Optional[Dict[str, Any]],
+        headers: Dict[str, str],
+    ) -> httpx.Response:
+        # Connect/TLS/TTFB timings for the current attempt span (None while tracing is off)
+        extensions = http_trace_extensions()
+        if method.lower() == self.HTTP_METHOD_POST:
+            return await self.client.post(
+                url, json=data, params=params, headers=headers, timeout=self.timeout, extensions=extensions
+            )
+        return await self.client.get(url, params=params, headers=headers, timeout=self.timeout, extensions=extensions)
+
+    async def _backoff(self, label: str, attempt: int, deadline: float, retry_after: Optional[str] = None) -> bool:
+        """Sleep before the next attempt. Returns False if no attempt is left or the budget would be exceeded."""
+        if not self.retry_policy.can_retry(attempt):
+            return False
+        delay = self.retry_policy.delay(attempt, retry_after)
+        if asyncio.get_running_loop().time() + delay >= deadline:
+            return False
+        request_metrics.record_retry(label)
+        await asyncio.sleep(delay)
+        return True
+
+    @staticmethod
+    def _parse_body(response: httpx.Response) -> Any:
+        try:
+            return response.json()
+        except ValueError:
+            return response.text[:500]
+
     # post request
-    async def post_request(self, endpoint: str, data: BaseModel, response_model: type[T]) -> APIResponse[T]:
+    async def post_request(
+        self,
+        endpoint: str,
+        data: BaseModel,
+        response_model: type[T],
+        idempotency_key: Optional[str] = None,
+        retryable: Optional[bool] = None,
+    ) -> APIResponse[T]:
         """Send a POST request to the given endpoint with the provided data."""
         logger.debug(f"Sending POST request to {endpoint}")
         try:
-            result = await self._make_request(method=self.HTTP_METHOD_POST, endpoint=endpoint, data=data.model_dump(exclude_none=True, by_alias=True))
+            result = await self._make_request(
+                method=self.HTTP_METHOD_POST,
+                endpoint=endpoint,
+                data=data.model_dump(exclude_none=True, by_alias=True),
+                idempotency_key=idempotency_key,
+                retryable=retryable,
+            )
             response = APIResponse.success_response(data=response_model(**result), status_code=self.HTTP_STATUS_CODE_CREATED)
             logger.debug(f"POST request successful at {endpoint}")
             return response
+        except CircuitOpenError as e:
+            logger.warning(f"⛔ POST request to {endpoint} rejected by circuit breaker - {str(e)}")
+            return APIResponse.error_response(error=str(e), status_code=self.SERVICE_UNAVAILABLE_STATUS_CODE)
         except HTTPException as e:
             logger.error(f"HTTP error while sending POST request to {endpoint} - Status: {e.status_code}, Detail: {e.detail}")
             return APIResponse.error_response(error=str(e.detail), status_code=e.status_code)
@@ -1,6 +1,17 @@
+import asyncio
+from typing import List, Optional, Sequence
+
+from src.models.natural_language import (
+    BaseLLMRequest,
+    ColumnSchema,
+    ReadSqlLLMRequest,
+    SendEmailLLMRequest,
+    WriteDataLLMRequest,
+)
 from src.models.wire import WirePayload
-from src.models.save_job_response import APIResponse, JobResponse
-from src.utils.config import API_CONFIG
+from src.models.save_job_response import APIResponse, BulkJobResult, JobResponse
+from src.utils.config import API_CONFIG, SQL_PROJECTION_CONFIG
+from src.utils.sql_parser import identifier_case_for, infer_select_columns
 from src.repositories.base_repository import BaseRepository
 from loguru import logger
 
@@ -18,9 +29,25 @@ class JobRepository(BaseRepository):
 
         logger.info(f"Creating write data job: {data.template}")
         endpoint = ""  # Empty string since base_url already contains the full path
-        response = await self.post_request(endpoint, wire, JobResponse)
+        response = await self.post_request(endpoint, wire, JobResponse, idempotency_key=data.idempotency_key())
         return response
 
+    @staticmethod
+    def _infer_columns_locally(data) -> Optional[List[str]]:
+        """
+        Column names read off an explicit select list, or None when only the
+        server can tell (``SELECT *``, unaliased expressions, unquoted names
+        on a connection whose identifier case is unknown, ...).
+        """
+        if not SQL_PROJECTION_CONFIG["enabled"]:
+            return None
+        var = data.variables[0]
+        identifier_case = identifier_case_for(var.connection, SQL_PROJECTION_CONFIG["identifier_case"])
+        column_names = infer_select_columns(var.query, identifier_case)
+        if column_names is not None:
+            logger.debug(f"Resolved columns locally, skipping utility/query: {column_names}")
+        return column_names
+
     @staticmethod
     async def read_sql_job(self, data) -> tuple[APIResponse[JobResponse], list[str]]:
         """
@@ -31,17 +58,19 @@ class JobRepository(BaseRepository):
                    - API response with job_id
                    - List of column names from the query
         """
-        query_payload = await QueryBuilder.build_read_sql_query_payload(data)
-        column_response = await QueryRepository.get_column_names(self, query_payload)
-        
-        # Extract column names from the response
-        column_names = column_response.data.object.columns if column_response.success else []
+        column_names = self._infer_columns_locally(data)
+        if column_names is None:
+            query_payload = await QueryBuilder.build_read_sql_query_payload(data)
+            column_response = await QueryRepository.get_column_names(self, query_payload)
+
+            # Extract column names from the response
+            column_names = column_response.data.object.columns if column_response.success else []
 
         wire = build_wire_payload(data, column_names=column_names)
 
         logger.info(f"Creating read SQL job: {data.template}")
         endpoint = ""  # Empty string since base_url already contains the full path
-        response = await self.post_request(endpoint, wire, JobResponse)
+        response = await self.post_request(endpoint, wire, JobResponse, idempotency_key=data.idempotency_key())
         
         logger.info(f"Read SQL job created. Job ID: {response.data.object_id if response.success else 'N/A'}, Columns: {column_names}")
         return response, column_names
@@ -52,7 +81,92 @@ class JobRepository(BaseRepository):
 
         logger.info(f"Creating send email job: {data.template}")
         endpoint = ""  # Empty string since base_url already contains the full path
-        response = await self.post_request(endpoint, wire, JobResponse)
+        response = await self.post_request(endpoint, wire, JobResponse, idempotency_key=data.idempotency_key())
         return response
 
+    @staticmethod
+    async def submit_many(self, requests: Sequence[BaseLLMRequest], concurrency: Optional[int] = None) -> List[BulkJobResult]:
+        """
+        Submit many read/write/email jobs concurrently.
+
+        At most ``concurrency`` jobs are in flight at once. A WriteDataLLMRequest
+        with an empty ``data_set`` is chained to the closest preceding
+        ReadSqlLLMRequest: it waits for that job and takes its object_id as
+        ``data_set`` and its columns (unless columns were given explicitly).
+
+        Args:
+            requests: ReadSqlLLMRequest, WriteDataLLMRequest and SendEmailLLMRequest items
+            concurrency: Maximum jobs in flight, defaults to API_CONFIG["bulk_concurrency"]
+
+        Returns:
+            List[BulkJobResult]: One result per request, in input order
+        """
+        semaphore = asyncio.Semaphore(concurrency or API_CONFIG["bulk_concurrency"])
+        tasks: List[asyncio.Task] = []
+        last_read: Optional[int] = None
+
+        for index, request in enumerate(requests):
+            request.ensure_id()
+            depends_on = None
+            if isinstance(request, WriteDataLLMRequest) and not request.variables[0].data_set:
+                depends_on = last_read
+                if depends_on is None:
+                    logger.warning(f"Bulk item {index}: write_data job has no data_set and no preceding read_sql job")
+            upstream = tasks[depends_on] if depends_on is not None else None
+            tasks.append(asyncio.create_task(
+                JobRepository._submit_one(self, index, request, semaphore, upstream, depends_on)
+            ))
+            if isinstance(request, ReadSqlLLMRequest):
+                last_read = index
+
+        results = await asyncio.gather(*tasks)
+        failed = sum(1 for result in results if not result.response.success)
+        logger.info(f"Bulk submission finished: {len(results) - failed} succeeded, {failed} failed")
+        return list(results)
+
+    @staticmethod
+    async def _submit_one(
+        self,
+        index: int,
+        request: BaseLLMRequest,
+        semaphore: asyncio.Semaphore,
+        upstream: Optional[asyncio.Task],
+        depends_on: Optional[int],
+    ) -> BulkJobResult:
+        template_key = request.template_key()
+
+        if upstream is not None:
+            # Wait outside the semaphore so dependents never hold a slot their read needs
+            read_result: BulkJobResult = await upstream
+            if not read_result.response.success:
+                error = f"Upstream read_sql job #{depends_on} failed: {read_result.response.error}"
+                return BulkJobResult(index=index, template_key=template_key, depends_on=depends_on,
+                                     response=APIResponse.error_response(error=error, status_code=self.BAD_REQUEST_STATUS_CODE))
+            # Chain on a copy: the caller's request object stays as submitted
+            request = request.model_copy(deep=True)
+            variables = request.variables[0]
+            variables.data_set = read_result.response.data.object_id
+            if not variables.columns:
+                variables.columns = [ColumnSchema(columnName=name) for name in read_result.columns or []]
+        elif isinstance(request, WriteDataLLMRequest) and not request.variables[0].data_set:
+            error = "write_data job has no data_set and no preceding read_sql job to chain to"
+            return BulkJobResult(index=index, template_key=template_key,
+                                 response=APIResponse.error_response(error=error, status_code=self.BAD_REQUEST_STATUS_CODE))
+
+        columns = None
+        async with semaphore:
+            try:
+                if isinstance(request, ReadSqlLLMRequest):
+                    response, columns = await JobRepository.read_sql_job(self, request)
+                elif isinstance(request, WriteDataLLMRequest):
+                    response = await JobRepository.write_data_job(self, request)
+                elif isinstance(request, SendEmailLLMRequest):
+                    response = await JobRepository.send_email_job(self, request)
+                else:
+                    raise TypeError(f"Unsupported request type: {type(request).__name__}")
+            except Exception as e:
+                logger.error(f"Bulk item {index} ({template_key}) failed - {type(e).__name__}: {str(e)}")
+                response = APIResponse.error_response(error=str(e), status_code=self.INTERNAL_SERVER_ERROR_STATUS_CODE)
 
+        return BulkJobResult(index=index, template_key=template_key, response=response,
+                             columns=columns, depends_on=depends_on)
@@ -1,9 +1,22 @@
-from src.utils.config import API_CONFIG
-from src.models.query import QueryPayload, QueryResponse
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from src.utils.cache import TTLCache
+from src.utils.config import API_CONFIG, COLUMN_CACHE_CONFIG
+from src.utils.sql_parser import sql_fingerprint
+from src.models.query import DataObjectSimplified, QueryPayload, QueryResponse
 from src.models.save_job_response import APIResponse
 from src.repositories.base_repository import BaseRepository
 
 
+# Column lists keyed by (connection, normalized SQL fingerprint)
+column_cache: TTLCache[Tuple[str, str], List[str]] = TTLCache(
+    maxsize=COLUMN_CACHE_CONFIG["max_entries"],
+    ttl=COLUMN_CACHE_CONFIG["ttl"],
+)
+
+
 class QueryRepository(BaseRepository):
 
     # Although this method called get, it actually sends a POST request with the query payload
@@ -11,6 +24,9 @@ class QueryRepository(BaseRepository):
     async def get_column_names(self, data: QueryPayload) -> APIResponse[QueryResponse]:
         """
         Get column names by analyzing a SQL query.
+
+        Results are served from ``column_cache`` when the same query (after
+        normalization) was analyzed on the same connection within the TTL.
         
         Args:
             data: QueryPayload with connection and SQL query
@@ -18,8 +34,44 @@ class QueryRepository(BaseRepository):
         Returns:
             APIResponse[QueryResponse]: Response containing column names
         """
+        key = (data.connectionId, sql_fingerprint(data.sql))
+        cached = column_cache.get(key)
+        if cached is not None:
+            logger.debug(f"Column cache hit for connection {data.connectionId}")
+            return APIResponse.success_response(
+                data=QueryResponse(object=DataObjectSimplified(columns=list(cached))),
+                status_code=self.HTTP_STATUS_CODE_OK,
+            )
+
         # Need to override base_url for query endpoint - use full URL
         endpoint = API_CONFIG['query_api_base_url']
-        response = await self.post_request(endpoint, data, QueryResponse)
+        # Query analysis has no side effects, so it is always safe to retry
+        response = await self.post_request(endpoint, data, QueryResponse, retryable=True)
+        if response.success:
+            column_cache.set(key, list(response.data.object.columns))
         return response
 
+    @staticmethod
+    def invalidate_column_cache(connection: Optional[str] = None, sql: Optional[str] = None) -> int:
+        """
+        Drop cached column lists, e.g. after a table's structure changed.
+
+        Args:
+            connection: Only drop entries for this connection (all connections if None)
+            sql: Only drop the entry for this query (requires ``connection``)
+
+        Returns:
+            int: Number of entries removed
+        """
+        if connection is not None and sql is not None:
+            return int(column_cache.invalidate((connection, sql_fingerprint(sql))))
+        if connection is not None:
+            return column_cache.invalidate_where(lambda key: key[0] == connection)
+        removed = len(column_cache)
+        column_cache.clear()
+        return removed
+
+    @staticmethod
+    def column_cache_stats() -> Dict[str, Any]:
+        """Return hit/miss metrics of the column-list cache."""
+        return column_cache.stats()
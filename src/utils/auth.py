@@ -1,44 +1,179 @@
 """
 Authentication utilities for API access.
+
+Access tokens are cached process-wide by ``TokenManager`` so that every job
+does not pay for a full password-grant round trip to Keycloak.
 """
-from typing import Optional
+import asyncio
+import time
+from typing import Optional, Dict, Any
 import httpx
 from src.utils.config import AUTH_CONFIG
+from src.utils.tracing import SPAN_KIND_CLIENT, current_span, http_trace_extensions, span
 from loguru import logger
 
 
+class TokenManager:
+    """
+    Process-wide cache for the OAuth access token.
+
+    The token is served from memory until it gets close to ``expires_in``.
+    Inside the refresh margin the cached token is still returned while a
+    refresh runs in the background; once inside the expiry leeway callers
+    wait for the refresh. Refreshes use the refresh_token grant when a
+    refresh token is still valid and fall back to the configured grant
+    (password by default). Concurrent callers share a single in-flight refresh.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        self._config = config if config is not None else AUTH_CONFIG
+        self._access_token: Optional[str] = None
+        self._refresh_token: Optional[str] = None
+        self._expires_at = 0.0
+        self._refresh_expires_at = 0.0
+        self._refresh_task: Optional[asyncio.Task] = None
+
+        self.hits = 0
+        self.misses = 0
+        self.background_refreshes = 0
+        self.refresh_grants = 0
+        self.password_grants = 0
+        self.failures = 0
+
+    def _has_credentials(self) -> bool:
+        return bool(self._config["username"] and self._config["password"])
+
+    async def get_token(self) -> Optional[str]:
+        """
+        Return a valid access token, fetching or refreshing it if needed.
+
+        Returns:
+            Optional[str]: Access token if authentication succeeds, None otherwise
+        """
+        if not self._has_credentials():
+            logger.warning("⚠️ No authentication credentials configured. API calls may fail.")
+            return None
+
+        remaining = self._expires_at - time.monotonic()
+
+        if self._access_token and remaining > self._config["expiry_leeway"]:
+            self.hits += 1
+            current_span().set_attribute("auth.cache_hit", True)
+            if remaining <= self._config["refresh_margin"]:
+                # Still valid: hand it out and refresh behind the caller's back
+                if self._start_refresh(background=True):
+                    logger.debug("🔄 Access token close to expiry, refreshing in background")
+            return self._access_token
+
+        self.misses += 1
+        current_span().set_attribute("auth.cache_hit", False)
+        self._start_refresh()
+        return await asyncio.shield(self._refresh_task)
+
+    def invalidate(self) -> None:
+        """Drop the cached access token (e.g. after the API rejected it with 401)."""
+        self._access_token = None
+        self._expires_at = 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache and refresh counters for monitoring."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "background_refreshes": self.background_refreshes,
+            "refresh_grants": self.refresh_grants,
+            "password_grants": self.password_grants,
+            "failures": self.failures,
+            "token_ttl": max(0.0, self._expires_at - time.monotonic()) if self._access_token else 0.0,
+        }
+
+    def _start_refresh(self, background: bool = False) -> bool:
+        """Start a refresh unless one is already running. Returns True if a new one was started."""
+        loop = asyncio.get_running_loop()
+        task = self._refresh_task
+        # A task from a closed/other event loop cannot be awaited here
+        if task is not None and not task.done() and task.get_loop() is loop:
+            return False
+
+        if background:
+            self.background_refreshes += 1
+        self._refresh_task = loop.create_task(self._fetch_token())
+        return True
+
+    async def _fetch_token(self) -> Optional[str]:
+        if self._refresh_token and time.monotonic() < self._refresh_expires_at - self._config["expiry_leeway"]:
+            token = await self._request_token({
+                "grant_type": "refresh_token",
+                "refresh_token": self._refresh_token,
+            })
+            if token:
+                self.refresh_grants += 1
+                return token
+            logger.warning("⚠️ Refresh token grant failed, falling back to full authentication")
+            self._refresh_token = None
+
+        token = await self._request_token({
+            "grant_type": self._config["grant_type"],
+            "username": self._config["username"],
+            "password": self._config["password"],
+        })
+        if token:
+            self.password_grants += 1
+        return token
+
+    async def _request_token(self, data: Dict[str, str]) -> Optional[str]:
+        data["client_id"] = self._config["client_id"]
+        if self._config["client_secret"]:
+            data["client_secret"] = self._config["client_secret"]
+
+        try:
+            with span("auth.token_request", kind=SPAN_KIND_CLIENT, **{"auth.grant_type": data["grant_type"]}) as token_span:
+                async with httpx.AsyncClient(verify=False) as client:  # verify=False for self-signed certs
+                    sent_at = time.monotonic()
+                    response = await client.post(self._config["token_endpoint"], data=data, extensions=http_trace_extensions())
+                token_span.set_attribute("http.status_code", response.status_code)
+
+                if response.status_code == 200:
+                    body = response.json()
+                    self._store(body, sent_at)
+                    logger.info(f"✅ Authentication successful ({data['grant_type']})")
+                    return self._access_token
+                else:
+                    self.failures += 1
+                    logger.error(f"❌ Authentication failed: {response.status_code} - {response.text}")
+                    return None
+        except Exception as e:
+            self.failures += 1
+            logger.error(f"❌ Authentication error: {str(e)}")
+            return None
+
+    def _store(self, body: Dict[str, Any], sent_at: float) -> None:
+        # Expiry is measured from when the request was sent, so it never overshoots
+        self._access_token = body.get("access_token")
+        self._expires_at = sent_at + float(body.get("expires_in") or self._config["default_expires_in"])
+        if body.get("refresh_token"):
+            self._refresh_token = body["refresh_token"]
+            self._refresh_expires_at = sent_at + float(body.get("refresh_expires_in") or self._config["default_expires_in"])
+
+
+# Process-wide instance shared by all toolkits and repositories
+token_manager = TokenManager()
+
+
 async def authenticate() -> Optional[str]:
     """
     Authenticate with Keycloak/OAuth and return access token.
-    
+
+    The token is served from the process-wide ``token_manager`` cache and only
+    requested from the token endpoint when it is missing or about to expire.
+
     Returns:
         Optional[str]: Access token if authentication succeeds, None otherwise
     """
-    if not AUTH_CONFIG["username"] or not AUTH_CONFIG["password"]:
-        logger.warning("⚠️ No authentication credentials configured. API calls may fail.")
-        return None
-    
-    data = {
-        "grant_type": AUTH_CONFIG["grant_type"],
-        "client_id": AUTH_CONFIG["client_id"],
-        "username": AUTH_CONFIG["username"],
-        "password": AUTH_CONFIG["password"],
-    }
-
-    if AUTH_CONFIG["client_secret"]:
-        data["client_secret"] = AUTH_CONFIG["client_secret"]
-
-    try:
-        async with httpx.AsyncClient(verify=False) as client:  # verify=False for self-signed certs
-            response = await client.post(AUTH_CONFIG["token_endpoint"], data=data)
-            
-            if response.status_code == 200:
-                token = response.json().get("access_token")
-                logger.info("✅ Authentication successful")
-                return token
-            else:
-                logger.error(f"❌ Authentication failed: {response.status_code} - {response.text}")
-                return None
-    except Exception as e:
-        logger.error(f"❌ Authentication error: {str(e)}")
-        return None
+    with span("auth.authenticate"):
+        return await token_manager.get_token()
+
+
+def get_auth_stats() -> Dict[str, Any]:
+    """Return hit/refresh counters of the process-wide token cache."""
+    return token_manager.stats()
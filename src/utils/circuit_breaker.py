@@ -0,0 +1,196 @@
+"""
+Per-endpoint circuit breakers and load shedding for ICC API requests.
+
+A breaker opens after ``failure_threshold`` consecutive failed or slow calls
+and rejects requests immediately while open. After ``recovery_timeout`` it
+lets a limited number of half-open probe requests through; a successful
+probe closes it again, a failed one re-opens it. Only the outcome of a probe
+moves a half-open breaker: requests admitted before it opened do not count.
+"""
+import time
+from enum import Enum
+from typing import Dict, Any, Optional
+
+from loguru import logger
+
+from src.utils.config import CIRCUIT_BREAKER_CONFIG
+
+
+class CircuitState(Enum):
+    """Breaker states."""
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request when the endpoint's breaker rejects it."""
+
+    def __init__(self, endpoint: str, retry_after: float, reason: str = "circuit open"):
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+        self.reason = reason
+        super().__init__(
+            f"ICC service '{endpoint}' is temporarily unavailable ({reason}). "
+            f"Please try again in {max(1, round(retry_after))}s."
+        )
+
+
+class CircuitBreaker:
+    """Circuit breaker with a concurrency cap for a single endpoint."""
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = CIRCUIT_BREAKER_CONFIG["failure_threshold"],
+        slow_call_threshold: float = CIRCUIT_BREAKER_CONFIG["slow_call_threshold"],
+        recovery_timeout: float = CIRCUIT_BREAKER_CONFIG["recovery_timeout"],
+        half_open_max_calls: int = CIRCUIT_BREAKER_CONFIG["half_open_max_calls"],
+        max_concurrent: int = CIRCUIT_BREAKER_CONFIG["max_concurrent"],
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.slow_call_threshold = slow_call_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.max_concurrent = max_concurrent
+
+        self.state = CircuitState.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.in_flight = 0
+        self.half_open_in_flight = 0
+        self.half_open_generation = 0
+
+        self.rejected = 0
+        self.shed = 0
+        self.times_opened = 0
+
+    def retry_after(self) -> float:
+        """Seconds until the breaker will admit a probe request (0 if not open)."""
+        if self.state != CircuitState.OPEN:
+            return 0.0
+        return max(0.0, self.opened_at + self.recovery_timeout - time.monotonic())
+
+    def is_open(self) -> bool:
+        """True while requests would be rejected without being sent."""
+        return self.state == CircuitState.OPEN and self.retry_after() > 0
+
+    def acquire(self) -> Optional[int]:
+        """
+        Reserve a slot for one request.
+
+        Returns:
+            Optional[int]: Probe ticket if the request is a half-open probe, else None.
+                Pass it back to ``record_success``/``record_failure``/``release``.
+
+        Raises:
+            CircuitOpenError: If the breaker is open or the endpoint is saturated
+        """
+        if self.state == CircuitState.OPEN:
+            if self.retry_after() > 0:
+                self.rejected += 1
+                raise CircuitOpenError(self.name, self.retry_after())
+            self._transition(CircuitState.HALF_OPEN)
+
+        if self.max_concurrent and self.in_flight >= self.max_concurrent:
+            self.shed += 1
+            raise CircuitOpenError(self.name, 1.0, reason="too many concurrent requests")
+
+        if self.state == CircuitState.HALF_OPEN:
+            if self.half_open_in_flight >= self.half_open_max_calls:
+                self.rejected += 1
+                raise CircuitOpenError(self.name, self.recovery_timeout, reason="recovery probe in progress")
+            self.half_open_in_flight += 1
+            self.in_flight += 1
+            return self.half_open_generation
+        self.in_flight += 1
+        return None
+
+    def record_success(self, latency: float, probe: Optional[int] = None) -> None:
+        """Release the slot of a request that got a non-5xx response."""
+        if self.slow_call_threshold and latency > self.slow_call_threshold:
+            logger.warning(f"🐢 {self.name} call took {latency:.1f}s (threshold {self.slow_call_threshold:.1f}s)")
+            self.record_failure(probe)
+            return
+        is_probe = self._is_current_probe(probe)
+        self.release(probe)
+        if self.state == CircuitState.HALF_OPEN:
+            if is_probe:
+                self._transition(CircuitState.CLOSED)
+        else:
+            self.consecutive_failures = 0
+
+    def record_failure(self, probe: Optional[int] = None) -> None:
+        """Release the slot of a request that failed (transport error, timeout, 5xx or too slow)."""
+        is_probe = self._is_current_probe(probe)
+        self.release(probe)
+        if self.state == CircuitState.HALF_OPEN:
+            if is_probe:
+                self._transition(CircuitState.OPEN)
+            return
+        self.consecutive_failures += 1
+        if self.consecutive_failures >= self.failure_threshold:
+            self._transition(CircuitState.OPEN)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current state and counters for monitoring."""
+        return {
+            "state": self.state.value,
+            "consecutive_failures": self.consecutive_failures,
+            "in_flight": self.in_flight,
+            "retry_after": self.retry_after(),
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+            "shed": self.shed,
+        }
+
+    def release(self, probe: Optional[int] = None) -> None:
+        """Free a reserved slot without recording an outcome (e.g. the caller was cancelled)."""
+        self.in_flight = max(0, self.in_flight - 1)
+        if self._is_current_probe(probe):
+            self.half_open_in_flight = max(0, self.half_open_in_flight - 1)
+
+    def _is_current_probe(self, probe: Optional[int]) -> bool:
+        """True for a probe of the current half-open period (not a leftover from an earlier one)."""
+        return probe is not None and self.state == CircuitState.HALF_OPEN and probe == self.half_open_generation
+
+    def _transition(self, state: CircuitState) -> None:
+        if state == self.state:
+            if state == CircuitState.OPEN:
+                self.opened_at = time.monotonic()
+            return
+        logger.warning(f"🔌 Circuit breaker '{self.name}': {self.state.value} → {state.value}")
+        self.state = state
+        self.half_open_in_flight = 0
+        if state == CircuitState.OPEN:
+            self.opened_at = time.monotonic()
+            self.times_opened += 1
+        elif state == CircuitState.HALF_OPEN:
+            self.half_open_generation += 1
+        elif state == CircuitState.CLOSED:
+            self.consecutive_failures = 0
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_circuit_breaker(endpoint: str) -> CircuitBreaker:
+    """Return the process-wide breaker for an endpoint label (e.g. 'job/save'), creating it if needed."""
+    breaker = _breakers.get(endpoint)
+    if breaker is None:
+        breaker = _breakers[endpoint] = CircuitBreaker(endpoint)
+    return breaker
+
+
+def get_circuit_breaker_states() -> Dict[str, Dict[str, Any]]:
+    """Return the state of every breaker, keyed by endpoint label."""
+    return {name: breaker.snapshot() for name, breaker in _breakers.items()}
+
+
+def open_circuit_error(endpoint: str) -> Optional[CircuitOpenError]:
+    """Return the error a request to ``endpoint`` would fail with right now, or None if it would be sent."""
+    breaker = _breakers.get(endpoint)
+    if breaker is not None and breaker.is_open():
+        return CircuitOpenError(endpoint, breaker.retry_after())
+    return None
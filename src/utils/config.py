@@ -1,9 +1,113 @@
 import os
 
+# LLM calls made by the router's agents
+LLM_CONFIG = {
+    "base_url": os.getenv("OLLAMA_BASE_URL", "http://localhost:11434"),
+    "timeout": float(os.getenv("LLM_TIMEOUT", "120")),  # seconds per generation
+}
+
+# Persistent NL→SQL generation cache (see src/ai/router/sql_cache.py)
+SQL_CACHE_CONFIG = {
+    "enabled": os.getenv("SQL_CACHE_ENABLED", "true").lower() == "true",
+    "path": os.getenv("SQL_CACHE_PATH", ".cache/sql_generations.sqlite3"),
+    "max_entries": int(os.getenv("SQL_CACHE_MAX_ENTRIES", "10000")),
+    "memory_entries": int(os.getenv("SQL_CACHE_MEMORY_ENTRIES", "1024")),
+    "ttl": float(os.getenv("SQL_CACHE_TTL", str(7 * 24 * 3600))),  # seconds
+}
+
+# Schema retrieval for the SQL prompt (see src/ai/router/schema_index.py)
+SCHEMA_INDEX_CONFIG = {
+    "top_k": int(os.getenv("SCHEMA_TOP_K", "5")),  # best-matching tables per utterance
+    "include_neighbours": os.getenv("SCHEMA_FK_NEIGHBOURS", "true").lower() == "true",
+    "max_tables": int(os.getenv("SCHEMA_MAX_TABLES", "12")),  # cap including FK neighbours, 0 disables
+}
+
+# Per-connection schema catalog (see src/ai/router/schema_catalog.py)
+SCHEMA_CATALOG_CONFIG = {
+    "source": os.getenv("SCHEMA_SOURCE", "static"),  # static (built-in demo schema) or icc (probe via utility/query)
+    "tables": [name.strip() for name in os.getenv("SCHEMA_TABLES", "").split(",") if name.strip()],  # icc: tables to probe
+    "cache_dir": os.getenv("SCHEMA_CACHE_DIR", ".cache/schema"),
+    "refresh_interval": float(os.getenv("SCHEMA_REFRESH_INTERVAL", "3600")),  # seconds between change checks
+    "table_ttl": float(os.getenv("SCHEMA_TABLE_TTL", "86400")),  # re-describe tables without change markers after this
+    "probe_concurrency": int(os.getenv("SCHEMA_PROBE_CONCURRENCY", "4")),
+}
+
+# Conversation session storage (see src/ai/router/memory_store.py)
+MEMORY_STORE_CONFIG = {
+    "backend": os.getenv("MEMORY_STORE_BACKEND", "sqlite"),  # sqlite or memory
+    "path": os.getenv("MEMORY_STORE_PATH", ".cache/sessions.sqlite3"),
+    "session_ttl": float(os.getenv("MEMORY_STORE_SESSION_TTL", str(7 * 24 * 3600))),  # idle seconds, 0 keeps forever
+    "write_behind": os.getenv("MEMORY_STORE_WRITE_BEHIND", "false").lower() == "true",
+    "flush_interval": float(os.getenv("MEMORY_STORE_FLUSH_INTERVAL", "0.5")),  # seconds
+    "turn_result_ttl": float(os.getenv("MEMORY_STORE_TURN_RESULT_TTL", "600")),  # seconds a finished, uncollected UI turn is kept
+    "turn_stale_after": float(os.getenv("MEMORY_STORE_TURN_STALE_AFTER", "900")),  # seconds before a running UI turn counts as lost
+}
+
+# HTTP API service (see src/api/server.py)
+API_SERVER_CONFIG = {
+    "host": os.getenv("API_SERVER_HOST", "0.0.0.0"),
+    "port": int(os.getenv("API_SERVER_PORT", "8000")),
+    "workers": int(os.getenv("API_SERVER_WORKERS", "1")),  # worker processes; use a shared memory store if > 1
+    "turn_timeout": float(os.getenv("API_SERVER_TURN_TIMEOUT", "180")),  # seconds per turn, 0 disables
+}
+
 API_CONFIG = {
     "api_base_url": os.getenv("API_BASE_URL", "https://172.16.22.13:8084/job/save"),
     "query_api_base_url": os.getenv("QUERY_API_BASE_URL", "https://172.16.22.13:8084/utility/query"),
-    "timeout": 30.0,
+    "timeout": float(os.getenv("API_TIMEOUT", "30.0")),  # total budget per request, retries included
+    "connect_timeout": float(os.getenv("API_CONNECT_TIMEOUT", "5.0")),
+    "read_timeout": float(os.getenv("API_READ_TIMEOUT", "20.0")),
+    "bulk_concurrency": int(os.getenv("BULK_JOB_CONCURRENCY", "8")),  # parallel jobs in JobRepository.submit_many
+}
+
+# Retry policy for ICC API requests (see src/utils/retry.py)
+RETRY_CONFIG = {
+    "max_attempts": int(os.getenv("API_RETRY_MAX_ATTEMPTS", "3")),
+    "base_delay": float(os.getenv("API_RETRY_BASE_DELAY", "0.5")),
+    "max_delay": float(os.getenv("API_RETRY_MAX_DELAY", "8.0")),
+    "max_retry_after": float(os.getenv("API_RETRY_MAX_RETRY_AFTER", "30.0")),
+    "retry_statuses": (429, 502, 503, 504),
+}
+
+# Cache of utility/query column lists, keyed by connection and normalized SQL
+COLUMN_CACHE_CONFIG = {
+    "max_entries": int(os.getenv("COLUMN_CACHE_MAX_ENTRIES", "512")),  # 0 disables the cache
+    "ttl": float(os.getenv("COLUMN_CACHE_TTL", "300")),  # seconds
+}
+
+# Resolve read_sql column names locally from explicit select lists instead of calling utility/query
+SQL_PROJECTION_CONFIG = {
+    "enabled": os.getenv("LOCAL_COLUMN_INFERENCE", "true").lower() == "true",
+    # How the database folds unquoted identifiers: upper, lower, preserve or auto (guess from connection name;
+    # if it names no known database, only fully quoted select lists are resolved locally)
+    "identifier_case": os.getenv("SQL_IDENTIFIER_CASE", "auto"),
+}
+
+# Circuit breaker per ICC endpoint (see src/utils/circuit_breaker.py)
+CIRCUIT_BREAKER_CONFIG = {
+    "failure_threshold": int(os.getenv("CB_FAILURE_THRESHOLD", "5")),  # consecutive failed or slow calls
+    "slow_call_threshold": float(os.getenv("CB_SLOW_CALL_THRESHOLD", "10.0")),  # seconds, 0 disables
+    "recovery_timeout": float(os.getenv("CB_RECOVERY_TIMEOUT", "30.0")),  # seconds before a half-open probe
+    "half_open_max_calls": int(os.getenv("CB_HALF_OPEN_MAX_CALLS", "1")),
+    "max_concurrent": int(os.getenv("CB_MAX_CONCURRENT", "50")),  # in-flight cap per endpoint, 0 disables
+}
+
+# Shared pooled HTTP client used by all repositories
+HTTP_CLIENT_CONFIG = {
+    "max_connections": int(os.getenv("HTTP_MAX_CONNECTIONS", "100")),
+    "max_keepalive_connections": int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20")),
+    "max_connections_per_host": int(os.getenv("HTTP_MAX_CONNECTIONS_PER_HOST", "20")),  # 0 disables the cap
+    "keepalive_expiry": float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30")),
+    "http2": os.getenv("HTTP2_ENABLED", "false").lower() == "true",  # requires the 'h2' package
+}
+
+# Per-turn tracing spans (see src/utils/tracing.py)
+TRACING_CONFIG = {
+    "enabled": os.getenv("TRACING_ENABLED", "false").lower() == "true",
+    "exporter": os.getenv("TRACING_EXPORTER", "jsonl"),  # jsonl | otlp
+    "path": os.getenv("TRACING_PATH", ".traces/spans.jsonl"),
+    "otlp_endpoint": os.getenv("TRACING_OTLP_ENDPOINT", "http://localhost:4318/v1/traces"),
+    "service_name": os.getenv("TRACING_SERVICE_NAME", "icc-router"),
 }
 
 # Authentication configuration (Keycloak or similar)
@@ -14,4 +118,9 @@ AUTH_CONFIG = {
     "client_secret": os.getenv("CLIENT_SECRET", ""),  # Optional
     "username": os.getenv("AUTH_USERNAME", ""),
     "password": os.getenv("AUTH_PASSWORD", ""),
+    # Token cache: refresh in the background once fewer than refresh_margin seconds remain,
+    # block callers once fewer than expiry_leeway seconds remain
+    "refresh_margin": float(os.getenv("AUTH_REFRESH_MARGIN", "60")),
+    "expiry_leeway": float(os.getenv("AUTH_EXPIRY_LEEWAY", "5")),
+    "default_expires_in": float(os.getenv("AUTH_DEFAULT_EXPIRES_IN", "300")),
 }
\ No newline at end of file
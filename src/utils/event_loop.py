@@ -0,0 +1,135 @@
+"""
+Long-lived background event loop for synchronous callers.
+
+Dash callbacks run on WSGI worker threads. Rather than spinning up an event
+loop per request (which discards pooled HTTP connections and any tasks bound
+to that loop), they submit coroutines to one loop running on a daemon thread
+for the life of the process.
+"""
+import asyncio
+import concurrent.futures
+import threading
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Coroutine, Dict, Optional
+from loguru import logger
+
+
+class BackgroundEventLoop:
+    """An asyncio event loop running forever on its own daemon thread."""
+
+    def __init__(self, name: str = "icc-event-loop"):
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> asyncio.AbstractEventLoop:
+        """Start the loop thread if it is not running yet and return the loop."""
+        with self._lock:
+            if self.running:
+                return self._loop
+            loop = asyncio.new_event_loop()
+            started = threading.Event()
+
+            def run() -> None:
+                asyncio.set_event_loop(loop)
+                loop.call_soon(started.set)
+                loop.run_forever()
+
+            self._loop = loop
+            self._thread = threading.Thread(target=run, name=self.name, daemon=True)
+            self._thread.start()
+            started.wait()
+            logger.debug(f"🔁 Started background event loop '{self.name}'")
+            return loop
+
+    def submit(self, coro: Coroutine[Any, Any, Any]) -> concurrent.futures.Future:
+        """Schedule a coroutine on the loop; returns a thread-safe future."""
+        loop = self.start()
+        return asyncio.run_coroutine_threadsafe(coro, loop)
+
+    def run(self, coro: Coroutine[Any, Any, Any], timeout: Optional[float] = None) -> Any:
+        """Run a coroutine on the loop and block the calling thread until it finishes."""
+        if self._loop is not None and threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError("BackgroundEventLoop.run() called from the loop thread, await the coroutine instead")
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+    def stop(self, cleanup: Optional[Callable[[], Awaitable[Any]]] = None, timeout: float = 10.0) -> None:
+        """
+        Stop the loop thread.
+
+        Args:
+            cleanup: Optional coroutine function run on the loop first (e.g. closing pooled clients)
+            timeout: Seconds to wait for cleanup and for the thread to exit
+        """
+        with self._lock:
+            if not self.running:
+                return
+            loop, thread = self._loop, self._thread
+            if cleanup is not None:
+                try:
+                    asyncio.run_coroutine_threadsafe(cleanup(), loop).result(timeout)
+                except Exception as e:
+                    logger.warning(f"⚠️ Background loop cleanup failed: {e}")
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout)
+            if not thread.is_alive():
+                loop.close()
+            self._loop, self._thread = None, None
+            logger.debug(f"🔁 Stopped background event loop '{self.name}'")
+
+
+class KeyedLocks:
+    """
+    asyncio locks created on demand per key (e.g. session id).
+
+    Holders of the same key run one at a time; different keys do not block
+    each other. A key's lock is dropped once nobody holds or waits for it, so
+    idle sessions cost nothing. Use from a single event loop.
+    """
+
+    def __init__(self):
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._users: Dict[str, int] = {}
+
+    def locked(self, key: str) -> bool:
+        """True if a holder currently has ``key``."""
+        lock = self._locks.get(key)
+        return lock is not None and lock.locked()
+
+    @asynccontextmanager
+    async def hold(self, key: str) -> AsyncIterator[None]:
+        """Wait for and hold the lock for ``key``."""
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+        self._users[key] = self._users.get(key, 0) + 1
+        try:
+            async with lock:
+                yield
+        finally:
+            self._users[key] -= 1
+            if not self._users[key]:
+                del self._users[key]
+                del self._locks[key]
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+
+_background_loop = BackgroundEventLoop()
+
+
+def get_background_loop() -> BackgroundEventLoop:
+    """Return the process-wide background loop (started lazily on first submit)."""
+    return _background_loop
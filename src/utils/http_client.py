@@ -0,0 +1,211 @@
+"""
+Shared, pooled HTTP client for ICC API access.
+
+One long-lived ``httpx.AsyncClient`` is kept per process so that repositories
+reuse TCP/TLS connections to the ICC server instead of opening a new client
+per job. Auth headers are injected per request from the token cache.
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Optional, Dict, AsyncIterator, Any
+import httpx
+from loguru import logger
+
+from src.utils.auth import authenticate, token_manager
+from src.utils.config import API_CONFIG, HTTP_CLIENT_CONFIG
+
+
+class TokenAuth(httpx.Auth):
+    """Attach the cached bearer token to every request, re-authenticating once on 401."""
+
+    async def async_auth_flow(self, request: httpx.Request):
+        token = await authenticate()
+        if token:
+            request.headers["Authorization"] = f"Bearer {token}"
+
+        response = yield request
+
+        if response.status_code == 401 and token:
+            logger.warning("⚠️ Access token rejected (401), re-authenticating")
+            token_manager.invalidate()
+            token = await authenticate()
+            if token:
+                request.headers["Authorization"] = f"Bearer {token}"
+                yield request
+
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    """Response stream that releases the per-host slot once the body is closed."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, semaphore: asyncio.Semaphore):
+        self._stream = stream
+        self._semaphore = semaphore
+        self._released = False
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            if not self._released:
+                self._released = True
+                self._semaphore.release()
+
+
+class HostLimitedTransport(httpx.AsyncBaseTransport):
+    """Transport wrapper capping concurrent in-flight requests per host."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, max_per_host: int):
+        self._transport = transport
+        self._max_per_host = max_per_host
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if not self._max_per_host:
+            return await self._transport.handle_async_request(request)
+
+        host = f"{request.url.scheme}://{request.url.netloc.decode('ascii')}"
+        semaphore = self._semaphores.get(host)
+        if semaphore is None:
+            semaphore = self._semaphores[host] = asyncio.Semaphore(self._max_per_host)
+        await semaphore.acquire()
+        try:
+            response = await self._transport.handle_async_request(request)
+        except BaseException:
+            semaphore.release()
+            raise
+
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_ReleasingStream(response.stream, semaphore),
+            extensions=response.extensions,
+        )
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def build_http_client(transport: Optional[httpx.AsyncBaseTransport] = None) -> httpx.AsyncClient:
+    """
+    Build a pooled AsyncClient configured from HTTP_CLIENT_CONFIG.
+
+    Args:
+        transport: Optional transport to use instead of the network (e.g. httpx.MockTransport)
+
+    Returns:
+        httpx.AsyncClient: Client with connection limits, keep-alive and token auth
+    """
+    http2 = HTTP_CLIENT_CONFIG["http2"]
+    if http2 and not _http2_available():
+        logger.warning("⚠️ HTTP/2 requested but the 'h2' package is not installed, using HTTP/1.1")
+        http2 = False
+
+    limits = httpx.Limits(
+        max_connections=HTTP_CLIENT_CONFIG["max_connections"],
+        max_keepalive_connections=HTTP_CLIENT_CONFIG["max_keepalive_connections"],
+        keepalive_expiry=HTTP_CLIENT_CONFIG["keepalive_expiry"],
+    )
+    if transport is None:
+        # verify=False for self-signed certs
+        transport = httpx.AsyncHTTPTransport(verify=False, http2=http2, limits=limits)
+
+    return httpx.AsyncClient(
+        transport=HostLimitedTransport(transport, HTTP_CLIENT_CONFIG["max_connections_per_host"]),
+        auth=TokenAuth(),
+        timeout=httpx.Timeout(
+            API_CONFIG["timeout"],
+            connect=API_CONFIG["connect_timeout"],
+            read=API_CONFIG["read_timeout"],
+        ),
+    )
+
+
+_client: Optional[httpx.AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+_client_transport: Optional[httpx.AsyncBaseTransport] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Return the process-wide pooled client, creating it lazily.
+
+    Pooled connections are bound to the event loop that opened them, so a new
+    client is built if called from a different loop than the current one and
+    the old client is closed on its own loop.
+    """
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+
+    if _client is not None and not _client.is_closed and _client_loop is loop:
+        return _client
+
+    if _client is not None and _client_loop is not loop:
+        logger.debug("🔌 Event loop changed, replacing pooled HTTP client")
+        _close_on_owner_loop(_client, _client_loop)
+
+    _client = build_http_client(_client_transport)
+    _client_loop = loop
+    logger.debug("🔌 Created pooled HTTP client")
+    return _client
+
+
+def _close_on_owner_loop(client: httpx.AsyncClient, loop: Optional[asyncio.AbstractEventLoop]) -> None:
+    """Close a client on the loop its connections belong to, or report the leak if that loop is gone."""
+    if client.is_closed:
+        return
+    if loop is not None and loop.is_running():
+        asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+        logger.debug("🔌 Closing pooled HTTP client on its own event loop")
+    else:
+        logger.warning("⚠️ Event loop of the pooled HTTP client has stopped; its connections are leaked until garbage collection")
+
+
+async def startup_http_client(transport: Optional[httpx.AsyncBaseTransport] = None) -> httpx.AsyncClient:
+    """
+    Startup hook: create the pooled client on the running loop.
+
+    Args:
+        transport: Optional transport override, kept for every client built afterwards
+    """
+    global _client_transport
+    if transport is not None:
+        _client_transport = transport
+        await shutdown_http_client()
+    return get_http_client()
+
+
+async def shutdown_http_client() -> None:
+    """Shutdown hook: close the pooled client and its connections."""
+    global _client, _client_loop
+    client, loop = _client, _client_loop
+    _client, _client_loop = None, None
+
+    if client is None or client.is_closed:
+        return
+    if loop is asyncio.get_running_loop():
+        await client.aclose()
+        logger.debug("🔌 Closed pooled HTTP client")
+    else:
+        _close_on_owner_loop(client, loop)
+
+
+@asynccontextmanager
+async def http_client_lifespan(app: Any = None) -> AsyncIterator[None]:
+    """ASGI lifespan handler that opens and closes the pooled client."""
+    await startup_http_client()
+    try:
+        yield
+    finally:
+        await shutdown_http_client()
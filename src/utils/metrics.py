@@ -0,0 +1,83 @@
+"""
+In-process request metrics, counted per ICC endpoint.
+"""
+from collections import defaultdict, deque
+from typing import Dict, Any, Optional, Deque
+from urllib.parse import urlparse
+
+
+def endpoint_label(url: str) -> str:
+    """Reduce a request URL to its endpoint path, e.g. 'job/save' or 'utility/query'."""
+    return urlparse(url).path.strip("/") or url
+
+
+def percentile(samples, pct: float) -> float:
+    """Nearest-rank percentile of a sequence of numbers (0.0 if empty)."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class EndpointStats:
+    """Counters and a bounded latency window for one endpoint."""
+
+    WINDOW_SIZE = 1024
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.status_codes: Dict[int, int] = defaultdict(int)
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.recent: Deque[float] = deque(maxlen=self.WINDOW_SIZE)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "retries": self.retries,
+            "status_codes": dict(self.status_codes),
+            "avg_latency": self.total_latency / self.requests if self.requests else 0.0,
+            "p50_latency": percentile(self.recent, 50),
+            "p95_latency": percentile(self.recent, 95),
+            "max_latency": self.max_latency,
+        }
+
+
+class RequestMetrics:
+    """Registry of EndpointStats keyed by endpoint label."""
+
+    def __init__(self):
+        self._endpoints: Dict[str, EndpointStats] = defaultdict(EndpointStats)
+
+    def record_request(self, endpoint: str, latency: float, status_code: Optional[int] = None, error: bool = False) -> None:
+        stats = self._endpoints[endpoint]
+        stats.requests += 1
+        stats.total_latency += latency
+        stats.max_latency = max(stats.max_latency, latency)
+        stats.recent.append(latency)
+        if status_code is not None:
+            stats.status_codes[status_code] += 1
+        if error:
+            stats.errors += 1
+
+    def record_retry(self, endpoint: str) -> None:
+        self._endpoints[endpoint].retries += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {endpoint: stats.snapshot() for endpoint, stats in self._endpoints.items()}
+
+    def reset(self) -> None:
+        self._endpoints.clear()
+
+
+# Process-wide registry used by BaseRepository
+request_metrics = RequestMetrics()
+
+
+def get_request_metrics() -> Dict[str, Dict[str, Any]]:
+    """Return per-endpoint request, retry and latency metrics."""
+    return request_metrics.snapshot()
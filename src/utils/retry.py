@@ -0,0 +1,70 @@
+"""
+Retry policy for ICC API requests: exponential backoff with jitter, honoring Retry-After.
+"""
+import random
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional, FrozenSet
+
+from src.utils.config import RETRY_CONFIG
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    How often and how long to wait before retrying a failed request.
+
+    Delays use "full jitter": a random value between 0 and the exponential
+    backoff ceiling, so concurrent clients do not retry in lockstep.
+    """
+    max_attempts: int = RETRY_CONFIG["max_attempts"]
+    base_delay: float = RETRY_CONFIG["base_delay"]
+    max_delay: float = RETRY_CONFIG["max_delay"]
+    max_retry_after: float = RETRY_CONFIG["max_retry_after"]
+    retry_statuses: FrozenSet[int] = field(default_factory=lambda: frozenset(RETRY_CONFIG["retry_statuses"]))
+
+    def should_retry_status(self, status_code: int, attempt: int) -> bool:
+        return attempt < self.max_attempts and status_code in self.retry_statuses
+
+    def can_retry(self, attempt: int) -> bool:
+        return attempt < self.max_attempts
+
+    def delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """
+        Seconds to wait before the next attempt.
+
+        Args:
+            attempt: Number of the attempt that just failed (1-based)
+            retry_after: Value of the Retry-After response header, if any
+
+        Returns:
+            float: Delay in seconds
+        """
+        server_delay = parse_retry_after(retry_after)
+        if server_delay is not None:
+            return min(server_delay, self.max_retry_after)
+
+        ceiling = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return random.uniform(0, ceiling)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given either as delay-seconds or as an HTTP date."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+DEFAULT_RETRY_POLICY = RetryPolicy()
@@ -0,0 +1,305 @@
+"""
+Lightweight SQL text utilities: tokenizing and normalization.
+
+This is not a full SQL parser. It understands just enough of the lexical
+structure (string literals, quoted identifiers, comments) to treat
+equivalent query texts as equal and to read the column names off an
+explicit select list.
+"""
+import hashlib
+import re
+from dataclasses import dataclass
+from typing import List, Optional
+
+_TOKEN_RE = re.compile(
+    r"""
+    (?P<ws>\s+)
+  | (?P<comment>--[^\n]*|/\*.*?\*/)
+  | (?P<string>'(?:[^']|'')*')
+  | (?P<quoted>"(?:[^"]|"")*"|`[^`]*`|\[[^\]]*\])
+  | (?P<number>\d+(?:\.\d*)?(?:[eE][+-]?\d+)?|\.\d+(?:[eE][+-]?\d+)?)
+  | (?P<word>[A-Za-z_][A-Za-z0-9_$#]*)
+  | (?P<op><>|!=|<=|>=|\|\||::|[-+*/%=<>(),.;:?@])
+  | (?P<other>.)
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+
+@dataclass(frozen=True)
+class Token:
+    """A lexical SQL token. ``kind`` is one of string, quoted, number, word, op, other."""
+    kind: str
+    text: str
+
+    @property
+    def upper(self) -> str:
+        return self.text.upper()
+
+
+def tokenize(sql: str) -> List[Token]:
+    """Split SQL into tokens, dropping whitespace and comments."""
+    tokens = []
+    for match in _TOKEN_RE.finditer(sql):
+        kind = match.lastgroup
+        if kind in ("ws", "comment"):
+            continue
+        tokens.append(Token(kind, match.group()))
+    return tokens
+
+
+def normalize_sql(sql: str) -> str:
+    """
+    Canonical form of a query: comments removed, whitespace collapsed, unquoted
+    text lower-cased and a trailing semicolon dropped. String literals and
+    quoted identifiers are kept verbatim.
+    """
+    parts = []
+    for token in tokenize(sql):
+        parts.append(token.text if token.kind in ("string", "quoted") else token.text.lower())
+    while parts and parts[-1] == ";":
+        parts.pop()
+    return " ".join(parts)
+
+
+def sql_fingerprint(sql: str) -> str:
+    """Short stable hash of the normalized query text."""
+    return hashlib.sha1(normalize_sql(sql).encode("utf-8")).hexdigest()
+
+
+# Keywords that can end a select-list expression, so they are never taken as an implicit alias
+_NON_ALIAS_WORDS = {
+    "END", "NULL", "TRUE", "FALSE", "DISTINCT", "ALL",
+    "YEAR", "MONTH", "DAY", "HOUR", "MINUTE", "SECOND",
+    "AND", "OR", "NOT", "IS", "IN", "LIKE", "BETWEEN", "THEN", "ELSE", "WHEN",
+}
+# Keywords that end the select list of the outermost SELECT
+_SELECT_LIST_END = {"FROM", "INTO", "UNION", "INTERSECT", "EXCEPT", "MINUS", "WHERE", "ORDER", "GROUP", "LIMIT", "FETCH"}
+
+DIALECT_ORACLE = "oracle"
+DIALECT_POSTGRES = "postgres"
+DIALECT_MSSQL = "mssql"
+DIALECT_MYSQL = "mysql"
+DIALECT_GENERIC = "generic"
+
+IDENTIFIER_CASE_UPPER = "upper"
+IDENTIFIER_CASE_LOWER = "lower"
+IDENTIFIER_CASE_PRESERVE = "preserve"
+
+
+def identifier_case_for(connection: str, configured: str = "auto") -> Optional[str]:
+    """
+    How the database folds unquoted identifiers in result column names.
+
+    Args:
+        connection: Connection identifier, used as a dialect hint when ``configured`` is "auto"
+        configured: "upper", "lower", "preserve" or "auto"
+
+    Returns:
+        Optional[str]: The identifier case, or None if "auto" cannot tell from the connection name
+    """
+    if configured != "auto":
+        return configured
+    name = (connection or "").lower()
+    if any(hint in name for hint in ("oracle", "db2", "snowflake")):
+        return IDENTIFIER_CASE_UPPER
+    if any(hint in name for hint in ("postgres", "pg_", "redshift")):
+        return IDENTIFIER_CASE_LOWER
+    if dialect_for(name) in (DIALECT_MSSQL, DIALECT_MYSQL):
+        return IDENTIFIER_CASE_PRESERVE
+    return None
+
+
+def dialect_for(connection: str) -> str:
+    """Guess the SQL dialect from a connection identifier (e.g. 'oracle_10' → oracle)."""
+    name = (connection or "").lower()
+    if "oracle" in name:
+        return DIALECT_ORACLE
+    if any(hint in name for hint in ("postgres", "pg_", "redshift")):
+        return DIALECT_POSTGRES
+    if any(hint in name for hint in ("mssql", "sqlserver", "sql_server", "azure_sql")):
+        return DIALECT_MSSQL
+    if any(hint in name for hint in ("mysql", "mariadb")):
+        return DIALECT_MYSQL
+    return DIALECT_GENERIC
+
+
+def _identifier_name(token: Token, identifier_case: str) -> str:
+    if token.kind == "quoted":
+        text = token.text[1:-1]
+        return text.replace('""', '"') if token.text.startswith('"') else text
+    if identifier_case == IDENTIFIER_CASE_UPPER:
+        return token.text.upper()
+    if identifier_case == IDENTIFIER_CASE_LOWER:
+        return token.text.lower()
+    return token.text
+
+
+def _skip_parens(tokens: List[Token], i: int) -> int:
+    """Given tokens[i] == '(', return the index just past its matching ')' (or -1)."""
+    depth = 0
+    while i < len(tokens):
+        if tokens[i].text == "(":
+            depth += 1
+        elif tokens[i].text == ")":
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    return -1
+
+
+def _skip_with_clause(tokens: List[Token], i: int) -> int:
+    """Skip ``WITH [RECURSIVE] name [(cols)] AS (...) [, ...]`` and return the index after it (or -1)."""
+    i += 1
+    if i < len(tokens) and tokens[i].upper == "RECURSIVE":
+        i += 1
+    while i < len(tokens):
+        i += 1  # CTE name
+        if i < len(tokens) and tokens[i].text == "(":
+            i = _skip_parens(tokens, i)
+            if i < 0:
+                return -1
+        if i >= len(tokens) or tokens[i].upper != "AS":
+            return -1
+        i += 1
+        if i >= len(tokens) or tokens[i].text != "(":
+            return -1
+        i = _skip_parens(tokens, i)
+        if i < 0 or i >= len(tokens):
+            return -1
+        if tokens[i].text != ",":
+            return i
+        i += 1
+    return -1
+
+
+def _select_items(tokens: List[Token]) -> Optional[List[List[Token]]]:
+    """Split the outermost select list into items, or None if there is no parsable one."""
+    i = 0
+    if tokens and tokens[0].upper == "WITH":
+        i = _skip_with_clause(tokens, 0)
+        if i < 0:
+            return None
+    if i >= len(tokens) or tokens[i].upper != "SELECT":
+        return None
+    i += 1
+
+    if i < len(tokens) and tokens[i].upper in ("DISTINCT", "ALL", "UNIQUE"):
+        i += 1
+    if i < len(tokens) and tokens[i].upper == "TOP":
+        i += 1
+        if i < len(tokens) and tokens[i].text == "(":
+            i = _skip_parens(tokens, i)
+            if i < 0:
+                return None
+        else:
+            i += 1
+        if i < len(tokens) and tokens[i].upper == "PERCENT":
+            i += 1
+
+    items: List[List[Token]] = [[]]
+    depth = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if depth == 0 and token.kind == "word" and token.upper in _SELECT_LIST_END:
+            break
+        if token.text == "(":
+            depth += 1
+        elif token.text == ")":
+            depth -= 1
+            if depth < 0:
+                return None
+        if depth == 0 and token.text == ",":
+            items.append([])
+        elif depth == 0 and token.text == ";":
+            break
+        else:
+            items[-1].append(token)
+        i += 1
+
+    if depth != 0 or any(not item for item in items):
+        return None
+    return items
+
+
+def _item_alias(item: List[Token], identifier_case: str) -> Optional[str]:
+    """Alias one select-list item defines (``expr AS name`` or ``expr name``), or None."""
+    last = item[-1]
+    is_name = last.kind == "quoted" or (last.kind == "word" and last.upper not in _NON_ALIAS_WORDS)
+
+    # expr AS alias
+    if len(item) >= 3 and item[-2].upper == "AS" and is_name:
+        return _identifier_name(last, identifier_case)
+
+    # expr alias (implicit alias directly after the end of an expression)
+    if len(item) >= 2 and is_name:
+        previous = item[-2]
+        if previous.text == ")" or previous.kind in ("word", "quoted", "number", "string"):
+            if previous.kind != "word" or previous.upper not in ("AS", "CASE", "WHEN", "THEN", "ELSE", "AND", "OR", "NOT", "IS", "IN", "LIKE"):
+                return _identifier_name(last, identifier_case)
+
+    return None
+
+
+def _item_name(item: List[Token], identifier_case: str) -> Optional[str]:
+    """Result column name of one select-list item, or None if the server would have to derive it."""
+    # Bare column, optionally qualified: col / t.col / schema.t.col
+    if len(item) % 2 == 1 and all(
+        (tok.kind in ("word", "quoted")) if idx % 2 == 0 else tok.text == "."
+        for idx, tok in enumerate(item)
+    ):
+        return _identifier_name(item[-1], identifier_case)
+    return _item_alias(item, identifier_case)
+
+
+def infer_select_columns(sql: str, identifier_case: Optional[str] = IDENTIFIER_CASE_PRESERVE) -> Optional[List[str]]:
+    """
+    Derive the result column names of a SELECT from its select list, without a database.
+
+    Aliases (``expr AS name`` and ``expr name``) and qualified columns
+    (``c.first_name``) are resolved. Anything the database would have to
+    resolve itself — ``*``, ``t.*``, unaliased expressions, duplicate names,
+    non-SELECT statements — makes the result ambiguous.
+
+    Args:
+        sql: Query text
+        identifier_case: How unquoted identifiers are folded (see ``identifier_case_for``);
+            None if unknown, in which case only quoted names can be resolved
+
+    Returns:
+        Optional[List[str]]: Column names in select-list order, or None if ambiguous
+    """
+    items = _select_items(tokenize(sql))
+    if items is None:
+        return None
+
+    names = []
+    for item in items:
+        # SELECT * / t.* - only the database knows what the star expands to
+        if item[-1].text == "*" and (len(item) == 1 or item[-2].text == "."):
+            return None
+        # Without a known case only quoted names are certain; the name is always the last token
+        if identifier_case is None and item[-1].kind != "quoted":
+            return None
+        name = _item_name(item, identifier_case)
+        if not name:
+            return None
+        names.append(name)
+
+    if len({name.upper() for name in names}) != len(names):
+        return None
+    return names
+
+
+def select_aliases(sql: str, identifier_case: str = IDENTIFIER_CASE_PRESERVE) -> List[str]:
+    """
+    Aliases the outermost select list defines (``expr AS name`` and ``expr name``).
+
+    Bare column references are not included, so a caller can tell a
+    reference to an alias (``ORDER BY total``) apart from a column that
+    must exist in a source table.
+    """
+    items = _select_items(tokenize(sql)) or []
+    aliases = [_item_alias(item, identifier_case) for item in items]
+    return [alias for alias in aliases if alias]
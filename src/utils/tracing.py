@@ -0,0 +1,403 @@
+"""
+Per-turn tracing: nested spans across the router, agents and repositories.
+
+Spans nest through a context variable, so work awaited inside a span (and
+asyncio tasks created inside it, such as a token refresh) becomes its
+children. Finished spans are handed to one exporter:
+
+    jsonl   one JSON object per span appended to TRACING_CONFIG["path"]
+    otlp    OTLP/HTTP JSON batches posted to TRACING_CONFIG["otlp_endpoint"]
+            (OpenTelemetry Collector, Jaeger, Tempo, ...) from a background thread
+
+Tracing is off unless TRACING_ENABLED=true. When it is off, ``span()``
+returns a shared no-op span after a single check, so instrumented code
+allocates and records nothing.
+
+    with span("llm.sql_agent", kind=SPAN_KIND_CLIENT, **{"llm.model": name}) as llm_span:
+        response = await llm.ainvoke(messages)
+        llm_span.set_attribute("llm.completion_tokens", count)
+"""
+import atexit
+import contextvars
+import json
+import os
+import queue
+import secrets
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+
+import httpx
+from loguru import logger
+
+from src.utils.config import TRACING_CONFIG
+
+# OTLP span kinds
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_CLIENT = 3
+
+STATUS_UNSET = "unset"
+STATUS_OK = "ok"
+STATUS_ERROR = "error"
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    """One timed operation; use as a context manager to make it the current span."""
+
+    __slots__ = (
+        "name", "trace_id", "span_id", "parent_id", "kind", "attributes", "events",
+        "status", "status_message", "start_ns", "end_ns", "_token",
+    )
+
+    recording = True
+
+    def __init__(self, name: str, parent: Optional["Span"], kind: int, attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = parent.trace_id if parent is not None else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent is not None else None
+        self.kind = kind
+        self.attributes = attributes
+        self.events: List[Dict[str, Any]] = []
+        self.status = STATUS_UNSET
+        self.status_message = ""
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self._token: Optional[contextvars.Token] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_attributes(self, attributes: Dict[str, Any]) -> None:
+        self.attributes.update(attributes)
+
+    def add_event(self, name: str, **attributes: Any) -> None:
+        self.events.append({"name": name, "time_unix_nano": time.time_ns(), "attributes": attributes})
+
+    def record_exception(self, error: BaseException) -> None:
+        self.status = STATUS_ERROR
+        self.status_message = f"{type(error).__name__}: {error}"
+        self.add_event("exception", **{"exception.type": type(error).__name__, "exception.message": str(error)})
+
+    def end(self) -> None:
+        if self.end_ns is not None:
+            return
+        self.end_ns = time.time_ns()
+        if _exporter is not None:
+            _exporter.export(self)
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        # GeneratorExit only means a streaming consumer stopped reading early
+        if exc is not None and not isinstance(exc, GeneratorExit):
+            self.record_exception(exc)
+        self.end()
+        if self._token is not None:
+            _current_span.reset(self._token)
+            self._token = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Flat record with OpenTelemetry field meanings (JSONL exporter)."""
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": self.end_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "status": self.status,
+            "status_message": self.status_message,
+            "attributes": self.attributes,
+            "events": self.events,
+        }
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """OTLP/JSON span."""
+        otlp: Dict[str, Any] = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": _otlp_attributes(self.attributes),
+            "events": [
+                {"name": e["name"], "timeUnixNano": str(e["time_unix_nano"]), "attributes": _otlp_attributes(e["attributes"])}
+                for e in self.events
+            ],
+            "status": {"code": {STATUS_UNSET: 0, STATUS_OK: 1, STATUS_ERROR: 2}[self.status], "message": self.status_message},
+        }
+        if self.parent_id:
+            otlp["parentSpanId"] = self.parent_id
+        return otlp
+
+
+class _NoopSpan:
+    """Stand-in returned while tracing is disabled; every method does nothing."""
+
+    __slots__ = ()
+
+    recording = False
+    duration_ms = 0.0
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_attributes(self, attributes: Dict[str, Any]) -> None:
+        pass
+
+    def add_event(self, name: str, **attributes: Any) -> None:
+        pass
+
+    def record_exception(self, error: BaseException) -> None:
+        pass
+
+    def end(self) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    if isinstance(value, (list, tuple)):
+        return {"arrayValue": {"values": [_otlp_value(v) for v in value]}}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items() if value is not None]
+
+
+class SpanExporter(ABC):
+    """Receives every finished span."""
+
+    @abstractmethod
+    def export(self, span: Span) -> None:
+        pass
+
+    def flush(self) -> None:
+        pass
+
+    def shutdown(self) -> None:
+        self.flush()
+
+
+class JsonlSpanExporter(SpanExporter):
+    """
+    Append spans as JSON lines to a file.
+
+    Lines are buffered and written when a root span (a whole turn) finishes
+    or the buffer fills, so a turn costs one small write instead of one per span.
+    """
+
+    def __init__(self, path: str, buffer_size: int = 256):
+        self.path = path
+        self.buffer_size = buffer_size
+        self._lines: List[str] = []
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), default=str, ensure_ascii=False)
+        with self._lock:
+            self._lines.append(line)
+            if span.parent_id is not None and len(self._lines) < self.buffer_size:
+                return
+            lines, self._lines = self._lines, []
+        self._write(lines)
+
+    def flush(self) -> None:
+        with self._lock:
+            lines, self._lines = self._lines, []
+        self._write(lines)
+
+    def _write(self, lines: List[str]) -> None:
+        if not lines:
+            return
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+        except OSError as e:
+            logger.warning(f"⚠️ Could not write {len(lines)} spans to {self.path}: {e}")
+
+
+class OtlpHttpSpanExporter(SpanExporter):
+    """
+    Send spans to an OTLP/HTTP endpoint as JSON, in batches, from a daemon thread.
+
+    Uses its own synchronous client so exporting never touches the event loop
+    or the pooled ICC client. Spans are dropped (and counted) if the queue is full.
+    """
+
+    def __init__(self, endpoint: str, service_name: str, batch_size: int = 256, interval: float = 2.0, max_queue: int = 10000):
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.batch_size = batch_size
+        self.interval = interval
+        self.dropped = 0
+        self._queue: "queue.Queue[Optional[Span]]" = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._run, name="otlp-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self, span: Span) -> None:
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def shutdown(self) -> None:
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+        if self.dropped:
+            logger.warning(f"⚠️ OTLP exporter dropped {self.dropped} spans (queue full)")
+
+    def _run(self) -> None:
+        with httpx.Client(timeout=5.0) as client:
+            batch: List[Span] = []
+            deadline = time.monotonic() + self.interval
+            stopping = False
+            while not stopping:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                    if item is None:
+                        stopping = True
+                    else:
+                        batch.append(item)
+                except queue.Empty:
+                    pass
+                if stopping or len(batch) >= self.batch_size or time.monotonic() >= deadline:
+                    self._send(client, batch)
+                    batch = []
+                    deadline = time.monotonic() + self.interval
+
+    def _send(self, client: httpx.Client, spans: List[Span]) -> None:
+        if not spans:
+            return
+        body = {"resourceSpans": [{
+            "resource": {"attributes": _otlp_attributes({"service.name": self.service_name})},
+            "scopeSpans": [{"scope": {"name": "src.utils.tracing"}, "spans": [s.to_otlp() for s in spans]}],
+        }]}
+        try:
+            response = client.post(self.endpoint, json=body)
+            if response.status_code >= 400:
+                logger.warning(f"⚠️ OTLP export of {len(spans)} spans failed: {response.status_code} {response.text[:200]}")
+        except httpx.HTTPError as e:
+            logger.warning(f"⚠️ OTLP export of {len(spans)} spans failed: {type(e).__name__}: {e}")
+
+
+_exporter: Optional[SpanExporter] = None
+
+
+def configure_tracing(config: Optional[Dict[str, Any]] = None, exporter: Optional[SpanExporter] = None) -> None:
+    """
+    (Re)configure tracing; replaces and shuts down the current exporter.
+
+    Args:
+        config: Settings shaped like TRACING_CONFIG (defaults to it)
+        exporter: Exporter to use instead of the one named in the config
+    """
+    global _exporter
+    config = config if config is not None else TRACING_CONFIG
+    if exporter is None and config["enabled"]:
+        if config["exporter"] == "otlp":
+            exporter = OtlpHttpSpanExporter(config["otlp_endpoint"], config["service_name"])
+        elif config["exporter"] == "jsonl":
+            exporter = JsonlSpanExporter(config["path"])
+        else:
+            raise ValueError(f"Unknown tracing exporter '{config['exporter']}' (expected 'jsonl' or 'otlp')")
+
+    previous, _exporter = _exporter, exporter
+    if previous is not None:
+        previous.shutdown()
+    if exporter is not None:
+        logger.info(f"🔭 Tracing enabled ({type(exporter).__name__})")
+
+
+def shutdown_tracing() -> None:
+    """Flush and stop the exporter; spans started afterwards are no-ops."""
+    configure_tracing(exporter=None, config={"enabled": False})
+
+
+def tracing_enabled() -> bool:
+    return _exporter is not None
+
+
+def span(name: str, kind: int = SPAN_KIND_INTERNAL, **attributes: Any):
+    """
+    Start a span as a child of the current one (or a new trace).
+
+    Returns the shared no-op span when tracing is disabled.
+    """
+    if _exporter is None:
+        return NOOP_SPAN
+    return Span(name, _current_span.get(), kind, attributes)
+
+
+def current_span():
+    """The innermost active span, or the no-op span."""
+    return _current_span.get() or NOOP_SPAN
+
+
+def http_trace_extensions() -> Optional[Dict[str, Any]]:
+    """
+    httpx request extensions that time connect, TLS and time to first byte
+    into the current span, or None when there is nothing to record into.
+
+    Only real network transports emit these events; reused pooled connections
+    skip connect and TLS, which shows up as ``http.connection_reused``.
+    """
+    target = _current_span.get()
+    if target is None:
+        return None
+    started: Dict[str, int] = {}
+
+    async def trace(event: str, info: Dict[str, Any]) -> None:
+        # event is e.g. "connection.connect_tcp.started" or "http11.receive_response_headers.complete"
+        step, _, phase = event.rpartition(".")
+        step = step.rpartition(".")[2]
+        now = time.perf_counter_ns()
+        if phase == "started":
+            started[step] = now
+            return
+        if phase != "complete":
+            return
+        if step == "connect_tcp" and "connect_tcp" in started:
+            target.set_attribute("http.connect_ms", (now - started["connect_tcp"]) / 1e6)
+        elif step == "start_tls" and "start_tls" in started:
+            target.set_attribute("http.tls_ms", (now - started["start_tls"]) / 1e6)
+        elif step == "receive_response_headers" and "send_request_headers" in started:
+            target.set_attribute("http.ttfb_ms", (now - started["send_request_headers"]) / 1e6)
+            target.set_attribute("http.connection_reused", "connect_tcp" not in started)
+
+    return {"trace": trace}
+
+
+if TRACING_CONFIG["enabled"]:
+    configure_tracing()
+atexit.register(shutdown_tracing)
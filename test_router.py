@@ -5,6 +5,7 @@ Run this to test the router flow before using the web interface.
 import asyncio
 import logging
 from src.ai.router import handle_turn, Memory
+from src.utils.http_client import shutdown_http_client
 
 # Configure logging
 logging.basicConfig(
@@ -49,6 +50,8 @@ async def test_conversation():
     memory, response = await handle_turn(memory, "done")
     print(f"AGENT: {response}\n")
     
+    await shutdown_http_client()
+
     print("="*60)
     print("✅ Test completed!")
     print(f"Final stage: {memory.stage.value}")
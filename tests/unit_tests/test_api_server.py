@@ -0,0 +1,89 @@
+import json
+
+import pytest
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from starlette.testclient import TestClient
+
+from src.ai.router import sql_agent as sql_agent_module
+from src.ai.router.memory import Memory, Stage
+from src.ai.router.memory_store import InMemoryMemoryStore
+from src.api import server
+
+SQL_REPLY = '{"sql": "SELECT first_name FROM customers", "reasoning": "names"}'
+
+
+class RacingStore(InMemoryMemoryStore):
+    """Store where another worker saves the session just before every save of ours."""
+
+    async def save(self, session_id, memory, expected_version, new_version=None):
+        await super().save(session_id, Memory(stage=Stage.DONE), expected_version)
+        return await super().save(session_id, memory, expected_version, new_version)
+
+
+@pytest.fixture
+def make_client(monkeypatch):
+    monkeypatch.setattr(sql_agent_module.sql_agent, "llm", FakeListChatModel(responses=[SQL_REPLY] * 10))
+    monkeypatch.setattr(sql_agent_module.sql_agent, "cache", None)
+
+    def make(store=None):
+        store = store or InMemoryMemoryStore()
+        monkeypatch.setattr(server, "build_memory_store", lambda: store)
+        return TestClient(server.create_app())
+
+    return make
+
+
+def sse_events(body: str) -> list:
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_turn_returns_json_with_timings(make_client) -> None:
+    with make_client() as client:
+        response = client.post("/sessions/s/turns", json={"message": "hi"})
+        assert response.status_code == 200
+        body = response.json()
+        assert (body["session_id"], body["stage"], body["version"]) == ("s", "need_query", 1)
+        assert "load;dur=" in response.headers["server-timing"]
+        assert response.headers["x-response-time"].endswith("ms")
+
+        response = client.post("/sessions/s/turns", json={"message": "get customer names", "connection": "oracle_10"})
+        assert response.status_code == 200
+        assert "SELECT first_name FROM customers" in response.json()["response"]
+        session = client.get("/sessions/s").json()
+        assert (session["version"], session["memory"]["connection"]) == (2, "oracle_10")
+
+
+def test_invalid_turn_body_is_rejected(make_client) -> None:
+    with make_client() as client:
+        assert client.post("/sessions/s/turns", content=b"not json").status_code == 400
+        response = client.post("/sessions/s/turns", json={"message": "  "})
+        assert (response.status_code, response.json()["error"]) == (400, "'message' must be a non-empty string")
+
+
+def test_turn_streams_tokens_then_final_event(make_client) -> None:
+    with make_client() as client:
+        client.post("/sessions/s/turns", json={"message": "hi"})
+        with client.stream(
+            "POST", "/sessions/s/turns", json={"message": "get customer names"}, headers={"Accept": "text/event-stream"}
+        ) as response:
+            assert response.headers["content-type"].startswith("text/event-stream")
+            events = sse_events("".join(response.iter_text()))
+
+    kinds = [kind for kind, _ in events]
+    assert kinds[-1] == "final" and set(kinds[:-1]) == {"token"}
+    assert "".join(data["text"] for _, data in events[:-1]) == SQL_REPLY
+    final = events[-1][1]
+    assert (final["version"], set(final["timings"])) == (2, {"load", "turn", "save"})
+
+
+def test_concurrent_update_is_a_conflict(make_client) -> None:
+    with make_client(RacingStore()) as client:
+        response = client.post("/sessions/s/turns", json={"message": "hi"})
+        assert response.status_code == 409
+        with client.stream("POST", "/sessions/t/turns?stream=true", json={"message": "hi"}) as streamed:
+            events = sse_events("".join(streamed.iter_text()))
+    assert events == [("error", {"status": 409, "error": "Session was updated concurrently, resend the message"})]
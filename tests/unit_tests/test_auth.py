@@ -0,0 +1,136 @@
+import asyncio
+from urllib.parse import parse_qs
+
+import httpx
+import pytest
+
+from src.utils.auth import TokenManager
+
+
+class TokenEndpoint:
+    """Fake Keycloak token endpoint served through httpx.MockTransport."""
+
+    def __init__(self, expires_in: float = 300, refresh_status: int = 200, delay: float = 0.01):
+        self.expires_in = expires_in
+        self.refresh_status = refresh_status
+        self.delay = delay
+        self.grants: list = []
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        grant = parse_qs(request.content.decode())["grant_type"][0]
+        self.grants.append(grant)
+        await asyncio.sleep(self.delay)
+        if grant == "refresh_token" and self.refresh_status != 200:
+            return httpx.Response(self.refresh_status, json={"error": "invalid_grant"})
+        return httpx.Response(200, json={
+            "access_token": f"token-{len(self.grants)}",
+            "expires_in": self.expires_in,
+            "refresh_token": f"refresh-{len(self.grants)}",
+            "refresh_expires_in": 1800,
+        })
+
+
+@pytest.fixture
+def endpoint(monkeypatch):
+    endpoint = TokenEndpoint()
+    real_client = httpx.AsyncClient
+    monkeypatch.setattr(
+        httpx, "AsyncClient", lambda **kwargs: real_client(transport=httpx.MockTransport(endpoint))
+    )
+    return endpoint
+
+
+def make_manager(**overrides) -> TokenManager:
+    config = {
+        "token_endpoint": "https://keycloak/token",
+        "grant_type": "password",
+        "client_id": "client",
+        "client_secret": "",
+        "username": "user",
+        "password": "secret",
+        "refresh_margin": 60,
+        "expiry_leeway": 5,
+        "default_expires_in": 300,
+    }
+    config.update(overrides)
+    return TokenManager(config)
+
+
+def test_token_is_cached(endpoint) -> None:
+    manager = make_manager()
+
+    async def scenario():
+        return [await manager.get_token() for _ in range(3)]
+
+    assert asyncio.run(scenario()) == ["token-1"] * 3
+    assert endpoint.grants == ["password"]
+    stats = manager.stats()
+    assert (stats["hits"], stats["misses"], stats["password_grants"]) == (2, 1, 1)
+
+
+def test_concurrent_callers_share_one_request(endpoint) -> None:
+    manager = make_manager()
+
+    async def scenario():
+        return await asyncio.gather(*(manager.get_token() for _ in range(10)))
+
+    assert set(asyncio.run(scenario())) == {"token-1"}
+    assert endpoint.grants == ["password"]
+
+
+def test_token_near_expiry_is_served_while_refreshing(endpoint) -> None:
+    endpoint.expires_in = 30  # inside the 60s refresh margin, outside the 5s leeway
+    manager = make_manager()
+
+    async def scenario():
+        await manager.get_token()
+        endpoint.expires_in = 300
+        assert await manager.get_token() == "token-1"  # served from cache...
+        await manager._refresh_task  # ...while the background refresh completes
+        return await manager.get_token()
+
+    assert asyncio.run(scenario()) == "token-2"
+    assert endpoint.grants == ["password", "refresh_token"]
+    assert manager.stats()["background_refreshes"] == 1
+
+
+def test_expired_token_is_refreshed_before_use(endpoint) -> None:
+    endpoint.expires_in = 1  # inside the leeway: callers must wait
+    manager = make_manager()
+
+    async def scenario():
+        return [await manager.get_token(), await manager.get_token()]
+
+    assert asyncio.run(scenario()) == ["token-1", "token-2"]
+    assert endpoint.grants == ["password", "refresh_token"]
+    assert manager.stats()["refresh_grants"] == 1
+
+
+def test_failed_refresh_grant_falls_back_to_password(endpoint) -> None:
+    endpoint.expires_in = 1
+    endpoint.refresh_status = 400
+    manager = make_manager()
+
+    async def scenario():
+        await manager.get_token()
+        return await manager.get_token()
+
+    assert asyncio.run(scenario()) == "token-3"
+    assert endpoint.grants == ["password", "refresh_token", "password"]
+    assert manager.stats()["password_grants"] == 2
+
+
+def test_invalidate_forces_a_new_token(endpoint) -> None:
+    manager = make_manager()
+
+    async def scenario():
+        await manager.get_token()
+        manager.invalidate()
+        return await manager.get_token()
+
+    assert asyncio.run(scenario()) == "token-2"
+
+
+def test_no_credentials_means_no_token(endpoint) -> None:
+    assert asyncio.run(make_manager(password="").get_token()) is None
+    assert endpoint.grants == []
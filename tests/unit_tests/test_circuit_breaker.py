@@ -0,0 +1,105 @@
+import time
+
+import pytest
+
+from src.utils.circuit_breaker import CircuitBreaker, CircuitOpenError, CircuitState
+
+
+def make_breaker(**kwargs) -> CircuitBreaker:
+    kwargs.setdefault("failure_threshold", 2)
+    kwargs.setdefault("slow_call_threshold", 0)
+    kwargs.setdefault("recovery_timeout", 0.05)
+    kwargs.setdefault("half_open_max_calls", 1)
+    kwargs.setdefault("max_concurrent", 0)
+    return CircuitBreaker("test", **kwargs)
+
+
+def trip(breaker: CircuitBreaker) -> None:
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure(breaker.acquire())
+    assert breaker.state == CircuitState.OPEN
+
+
+def test_opens_after_consecutive_failures_and_rejects() -> None:
+    breaker = make_breaker()
+    breaker.record_failure(breaker.acquire())
+    breaker.record_success(0.1, breaker.acquire())
+    breaker.record_failure(breaker.acquire())
+    assert breaker.state == CircuitState.CLOSED
+
+    breaker.record_failure(breaker.acquire())
+    assert breaker.state == CircuitState.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.acquire()
+    assert breaker.snapshot()["rejected"] == 1
+
+
+def test_successful_probe_closes() -> None:
+    breaker = make_breaker()
+    trip(breaker)
+    time.sleep(0.06)
+    probe = breaker.acquire()
+    assert probe is not None and breaker.state == CircuitState.HALF_OPEN
+    with pytest.raises(CircuitOpenError, match="probe in progress"):
+        breaker.acquire()
+    breaker.record_success(0.1, probe)
+    assert breaker.state == CircuitState.CLOSED
+    assert breaker.acquire() is None
+
+
+def test_failed_probe_reopens() -> None:
+    breaker = make_breaker()
+    trip(breaker)
+    time.sleep(0.06)
+    breaker.record_failure(breaker.acquire())
+    assert breaker.state == CircuitState.OPEN
+    assert breaker.snapshot()["times_opened"] == 2
+
+
+def test_straggler_does_not_move_half_open_breaker() -> None:
+    breaker = make_breaker()
+    straggler = breaker.acquire()  # admitted while closed, still running
+    trip(breaker)
+    time.sleep(0.06)
+    probe = breaker.acquire()
+
+    breaker.record_success(0.1, straggler)
+    assert breaker.state == CircuitState.HALF_OPEN
+    assert breaker.half_open_in_flight == 1
+    with pytest.raises(CircuitOpenError):
+        breaker.acquire()
+
+    breaker.record_success(0.1, probe)
+    assert breaker.state == CircuitState.CLOSED
+    assert breaker.in_flight == 0
+
+
+def test_probe_from_an_earlier_half_open_period_is_a_straggler() -> None:
+    breaker = make_breaker(half_open_max_calls=2)
+    trip(breaker)
+    time.sleep(0.06)
+    old_probe = breaker.acquire()
+    breaker.record_failure(breaker.acquire())  # the other probe fails: open again
+    time.sleep(0.06)
+    new_probe = breaker.acquire()
+
+    breaker.record_success(0.1, old_probe)
+    assert (breaker.state, breaker.half_open_in_flight) == (CircuitState.HALF_OPEN, 1)
+    breaker.release(new_probe)
+    assert breaker.half_open_in_flight == 0
+
+
+def test_slow_call_counts_as_failure() -> None:
+    breaker = make_breaker(failure_threshold=1, slow_call_threshold=0.5)
+    breaker.record_success(1.0, breaker.acquire())
+    assert breaker.state == CircuitState.OPEN
+
+
+def test_sheds_load_beyond_max_concurrent() -> None:
+    breaker = make_breaker(max_concurrent=1)
+    breaker.acquire()
+    with pytest.raises(CircuitOpenError, match="too many concurrent"):
+        breaker.acquire()
+    breaker.release()
+    breaker.acquire()
+    assert breaker.snapshot()["shed"] == 1
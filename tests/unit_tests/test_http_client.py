@@ -0,0 +1,98 @@
+import asyncio
+import threading
+
+import httpx
+import pytest
+from loguru import logger
+
+from src.utils import http_client
+from src.utils.http_client import HostLimitedTransport, get_http_client, shutdown_http_client
+
+
+@pytest.fixture
+def warnings():
+    messages: list = []
+    sink = logger.add(lambda message: messages.append(message.record["message"]), level="WARNING")
+    yield messages
+    logger.remove(sink)
+
+
+@pytest.fixture
+def background_loop():
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield loop
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+
+
+async def _new_client() -> httpx.AsyncClient:
+    return get_http_client()
+
+
+def client_on(loop: asyncio.AbstractEventLoop) -> httpx.AsyncClient:
+    return asyncio.run_coroutine_threadsafe(_new_client(), loop).result()
+
+
+def test_client_is_reused_within_a_loop() -> None:
+    async def scenario():
+        first = get_http_client()
+        assert get_http_client() is first
+        await shutdown_http_client()
+        assert first.is_closed
+
+    asyncio.run(scenario())
+
+
+def test_loop_change_closes_old_client_on_its_loop(background_loop) -> None:
+    old = client_on(background_loop)
+
+    async def scenario():
+        new = get_http_client()
+        assert new is not old
+        await asyncio.sleep(0.05)  # the close runs on the background loop
+        await shutdown_http_client()
+
+    asyncio.run(scenario())
+    assert old.is_closed
+
+
+def test_client_of_a_stopped_loop_is_reported(warnings) -> None:
+    old = asyncio.run(_new_client())
+    asyncio.run(shutdown_http_client())
+    assert not old.is_closed
+    assert any("leaked" in message for message in warnings)
+
+
+def test_shutdown_closes_client_owned_by_another_loop(background_loop) -> None:
+    old = client_on(background_loop)
+    asyncio.run(shutdown_http_client())
+    asyncio.run_coroutine_threadsafe(asyncio.sleep(0.05), background_loop).result()
+    assert old.is_closed
+    assert http_client._client is None
+
+
+def test_host_limit_caps_in_flight_requests() -> None:
+    in_flight, peak = 0, 0
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return httpx.Response(200, text="ok")
+
+    transport = HostLimitedTransport(httpx.MockTransport(handler), max_per_host=2)
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=transport) as client:
+            responses = await asyncio.gather(*(client.get(f"http://icc/{i}") for i in range(6)))
+            await client.get("http://other/")
+        assert all(response.text == "ok" for response in responses)
+
+    asyncio.run(scenario())
+    assert peak == 2
+    assert set(transport._semaphores) == {"http://icc", "http://other"}
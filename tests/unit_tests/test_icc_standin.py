@@ -0,0 +1,82 @@
+import random
+
+import pytest
+from starlette.testclient import TestClient
+
+from icc_standin import (
+    JOB,
+    QUERY,
+    TOKEN,
+    TOKEN_PATH,
+    EndpointProfile,
+    StandinConfig,
+    column_generator,
+    create_standin_app,
+    latency_sampler,
+)
+
+
+def quick_config(**profiles) -> StandinConfig:
+    defaults = {name: EndpointProfile(latency="none") for name in (JOB, QUERY, TOKEN)}
+    defaults.update(profiles)
+    return StandinConfig(profiles=defaults, seed=1)
+
+
+def test_latency_specs() -> None:
+    rng = random.Random(1)
+    assert latency_sampler("fixed:50", rng)() == 0.05
+    assert latency_sampler("none", rng)() == 0.0
+    assert all(0.02 <= latency_sampler("uniform:20,80", rng)() <= 0.08 for _ in range(50))
+    with pytest.raises(ValueError):
+        latency_sampler("fixed", rng)
+
+
+def test_column_specs() -> None:
+    rng = random.Random(1)
+    assert column_generator("from-sql", rng)("SELECT first_name, total AS t FROM x") == ["FIRST_NAME", "T"]
+    assert column_generator("from-sql:2", rng)("SELECT * FROM x") == ["COL_1", "COL_2"]
+    assert column_generator("fixed:3", rng)("SELECT a FROM x") == ["COL_1", "COL_2", "COL_3"]
+    with pytest.raises(ValueError):
+        column_generator("lots", rng)
+
+
+def test_endpoints_answer_the_agent_contracts() -> None:
+    with TestClient(create_standin_app(quick_config())) as client:
+        job = client.post("/job/save", json={"template": "x"}).json()
+        assert set(job) == {"object", "errorCode", "errorMessage"}
+        query = client.post("/utility/query", json={"sql": "SELECT country FROM customers"}).json()
+        assert query == {"object": {"columns": ["COUNTRY"]}}
+        assert client.post("/utility/query", json={}).status_code == 400
+        token = client.post(TOKEN_PATH, content=b"grant_type=password").json()
+        assert token["token_type"] == "Bearer" and token["access_token"]
+
+        stats = client.get("/_standin/stats").json()["endpoints"]
+        assert stats[QUERY]["status_codes"] == {"200": 1, "400": 1}
+
+
+def test_rate_limit_answers_429_with_retry_after() -> None:
+    config = quick_config(job=EndpointProfile(latency="none", rate_limit=1, burst=2))
+    with TestClient(create_standin_app(config)) as client:
+        statuses = [client.post("/job/save", json={}).status_code for _ in range(3)]
+        assert statuses == [200, 200, 429]
+        limited = client.post("/job/save", json={})
+        assert (limited.status_code, limited.headers["Retry-After"]) == (429, "1")
+
+
+def test_error_injection() -> None:
+    config = quick_config(query=EndpointProfile(latency="none", error_rate=1.0, error_status=502))
+    with TestClient(create_standin_app(config)) as client:
+        response = client.post("/utility/query", json={"sql": "SELECT 1"})
+        assert (response.status_code, response.json()["errorCode"]) == (502, "INJECTED")
+
+
+def test_require_auth_accepts_only_issued_tokens() -> None:
+    config = quick_config()
+    config.require_auth = True
+    with TestClient(create_standin_app(config)) as client:
+        assert client.post("/job/save", json={}).status_code == 401
+        token = client.post("/token", content=b"grant_type=password").json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        assert client.post("/job/save", json={}, headers=headers).status_code == 200
+        client.post("/_standin/reset")
+        assert client.get("/_standin/stats").json()["endpoints"][JOB]["requests"] == 0
@@ -0,0 +1,43 @@
+import asyncio
+import itertools
+import json
+
+import httpx
+
+from src.models.natural_language import (
+    ReadSqlLLMRequest,
+    ReadSqlVariables,
+    WriteDataLLMRequest,
+    WriteDataVariables,
+)
+from src.repositories.job_repository import JobRepository
+
+
+def make_repository(sent: list) -> JobRepository:
+    ids = itertools.count(1)
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        sent.append(json.loads(request.content))
+        return httpx.Response(200, json={"object": f"job-{next(ids)}", "errorCode": None, "errorMessage": None})
+
+    return JobRepository(httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+
+
+def test_chained_write_leaves_caller_request_untouched() -> None:
+    read = ReadSqlLLMRequest(variables=[ReadSqlVariables(query="SELECT first_name FROM customers", connection="oracle_10")])
+    write = WriteDataLLMRequest(variables=[WriteDataVariables(
+        only_dataset_columns=True, connection="oracle_10", data_set="", drop_or_truncate="none",
+        columns=[], table="CUSTOMER_NAMES",
+    )])
+    sent: list = []
+    repository = make_repository(sent)
+
+    results = asyncio.run(JobRepository.submit_many(repository, [read, write]))
+    assert [result.response.success for result in results] == [True, True]
+    assert (results[1].depends_on, results[0].columns) == (0, ["FIRST_NAME"])
+    assert len(sent) == 2
+
+    # The submitted payload was chained, the caller's request was not
+    assert write.variables[0].data_set == ""
+    assert write.variables[0].columns == []
+    assert write.id is not None
@@ -0,0 +1,82 @@
+import json
+
+import pytest
+
+from src.ai.router.memory import SNAPSHOT_MAGIC, Memory, Stage, decode_snapshot, is_snapshot
+
+
+def full_memory() -> Memory:
+    memory = Memory(
+        stage=Stage.NEED_WRITE_OR_EMAIL,
+        last_sql="SELECT * FROM customers WHERE country = 'USA'",
+        last_job_id="job-42",
+        last_preview={"rows": [[1, "Ann"]], "truncated": False},
+        gathered_params={"table": "SALES", "connection": "oracle_prod"},
+        pending_tool="write_data",
+        pending_slot="drop_or_truncate",
+        connection="oracle_19",
+    )
+    memory.set_columns(["CUSTOMER_ID", "FIRST_NAME", "ÜMLAUT"])
+    return memory
+
+
+def test_snapshot_round_trip() -> None:
+    memory = full_memory()
+    data = memory.to_snapshot()
+    assert is_snapshot(data)
+    assert Memory.from_snapshot(data) == memory
+
+
+def test_snapshot_round_trip_of_empty_memory() -> None:
+    assert Memory.from_snapshot(Memory().to_snapshot()) == Memory()
+
+
+def test_empty_column_list_is_kept() -> None:
+    memory = Memory()
+    memory.set_columns([])
+    assert Memory.from_snapshot(memory.to_snapshot()).last_columns == ()
+
+
+def test_large_snapshot_is_compressed() -> None:
+    memory = Memory()
+    memory.set_columns([f"COLUMN_{i}" for i in range(500)])
+    data = memory.to_snapshot()
+    assert data[3] == 1  # zlib codec
+    assert Memory.from_snapshot(data).last_columns == memory.last_columns
+
+
+def test_columns_are_interned_and_shared() -> None:
+    first, second = Memory(), Memory()
+    first.set_columns(["A", "B"])
+    second.set_columns(["A", "B"])
+    assert first.last_columns is second.last_columns
+
+
+def test_dict_round_trip() -> None:
+    memory = full_memory()
+    data = json.loads(json.dumps(memory.to_dict()))
+    assert Memory.from_dict(data) == memory
+
+
+def test_unknown_version_is_rejected() -> None:
+    data = bytearray(Memory().to_snapshot())
+    data[2] = 99
+    with pytest.raises(ValueError, match="version 99"):
+        decode_snapshot(bytes(data))
+
+
+def test_unknown_codec_is_rejected() -> None:
+    data = bytearray(Memory().to_snapshot())
+    data[3] = 7
+    with pytest.raises(ValueError, match="codec 7"):
+        decode_snapshot(bytes(data))
+
+
+def test_corrupt_snapshots_are_rejected() -> None:
+    data = full_memory().to_snapshot()
+    with pytest.raises(ValueError):
+        decode_snapshot(data[:-5])
+    with pytest.raises(ValueError):
+        decode_snapshot(b'{"stage": "start"}')
+    with pytest.raises(ValueError):
+        decode_snapshot(SNAPSHOT_MAGIC + bytes((1, 1)) + b"not zlib")
@@ -0,0 +1,160 @@
+import asyncio
+import json
+
+import pytest
+
+from src.ai.router.memory import Memory, Stage
+from src.ai.router.memory_store import (
+    InMemoryMemoryStore,
+    SQLiteMemoryStore,
+    VersionConflictError,
+    WriteBehindMemoryStore,
+)
+
+
+class SlowStore(InMemoryMemoryStore):
+    """Inner store whose saves take a while, so flushes overlap."""
+
+    def __init__(self, delay: float = 0.02):
+        super().__init__()
+        self.delay = delay
+        self.saves = 0
+
+    async def save(self, session_id, memory, expected_version, new_version=None):
+        self.saves += 1
+        await asyncio.sleep(self.delay)
+        return await super().save(session_id, memory, expected_version, new_version)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "sqlite":
+        return SQLiteMemoryStore(path=str(tmp_path / "sessions.sqlite3"))
+    return InMemoryMemoryStore()
+
+
+def test_create_load_and_update(store) -> None:
+    async def scenario():
+        assert await store.load("s") is None
+        assert await store.save("s", Memory(stage=Stage.NEED_QUERY), expected_version=0) == 1
+        stored = await store.load("s")
+        assert (stored.version, stored.memory.stage) == (1, Stage.NEED_QUERY)
+        assert await store.save("s", Memory(stage=Stage.HAVE_SQL), expected_version=1) == 2
+        assert (await store.load("s")).memory.stage == Stage.HAVE_SQL
+        await store.delete("s")
+        assert (await store.load_or_create("s")).version == 0
+
+    asyncio.run(scenario())
+
+
+def test_stale_version_is_rejected(store) -> None:
+    async def scenario():
+        await store.save("s", Memory(), expected_version=0)
+        await store.save("s", Memory(stage=Stage.HAVE_SQL), expected_version=1)
+        with pytest.raises(VersionConflictError) as conflict:
+            await store.save("s", Memory(stage=Stage.DONE), expected_version=1)
+        assert (conflict.value.expected_version, conflict.value.actual_version) == (1, 2)
+        with pytest.raises(VersionConflictError):
+            await store.save("s", Memory(), expected_version=0)
+        assert (await store.load("s")).memory.stage == Stage.HAVE_SQL
+
+    asyncio.run(scenario())
+
+
+def test_loaded_memory_is_a_private_copy(store) -> None:
+    async def scenario():
+        await store.save("s", Memory(), expected_version=0)
+        stored = await store.load("s")
+        stored.memory.gathered_params["table"] = "SALES"
+        assert (await store.load("s")).memory.gathered_params == {}
+
+    asyncio.run(scenario())
+
+
+def test_sqlite_reads_json_rows(tmp_path) -> None:
+    store = SQLiteMemoryStore(path=str(tmp_path / "sessions.sqlite3"))
+    legacy = json.dumps(Memory(stage=Stage.SHOW_RESULTS, last_sql="SELECT 1").to_dict()).encode()
+    store._conn.execute("INSERT INTO sessions VALUES ('old', 3, ?, 0)", (legacy,))
+    store._conn.commit()
+    stored = asyncio.run(store.load("old"))
+    assert (stored.version, stored.memory.stage, stored.memory.last_sql) == (3, Stage.SHOW_RESULTS, "SELECT 1")
+
+
+def test_write_behind_serves_pending_writes_and_coalesces() -> None:
+    inner = SlowStore()
+    store = WriteBehindMemoryStore(inner, flush_interval=60)
+
+    async def scenario():
+        assert await store.save("s", Memory(stage=Stage.NEED_QUERY), expected_version=0) == 1
+        assert await store.save("s", Memory(stage=Stage.HAVE_SQL), expected_version=1) == 2
+        assert (await store.load("s")).memory.stage == Stage.HAVE_SQL
+        assert await inner.load("s") is None
+        await store.flush()
+        stored = await inner.load("s")
+        assert (stored.version, stored.memory.stage) == (2, Stage.HAVE_SQL)
+        await store.close()
+
+    asyncio.run(scenario())
+    assert inner.saves == 1
+    assert store.stats() == {"pending": 0, "flushed": 1, "coalesced": 1, "conflicts": 0}
+
+
+def test_write_behind_rejects_stale_version() -> None:
+    store = WriteBehindMemoryStore(InMemoryMemoryStore(), flush_interval=60)
+
+    async def scenario():
+        await store.save("s", Memory(), expected_version=0)
+        with pytest.raises(VersionConflictError):
+            await store.save("s", Memory(), expected_version=0)
+        await store.close()
+
+    asyncio.run(scenario())
+
+
+def test_write_behind_drops_write_that_lost_to_another_worker() -> None:
+    inner = InMemoryMemoryStore()
+    store = WriteBehindMemoryStore(inner, flush_interval=60)
+
+    async def scenario():
+        await store.save("s", Memory(stage=Stage.HAVE_SQL), expected_version=0)
+        await inner.save("s", Memory(stage=Stage.DONE), expected_version=0)  # another worker
+        await store.flush()
+        assert (await store.load("s")).memory.stage == Stage.DONE
+        await store.close()
+
+    asyncio.run(scenario())
+    assert store.stats()["conflicts"] == 1
+
+
+def test_concurrent_flushes_write_each_entry_once() -> None:
+    inner = SlowStore()
+    store = WriteBehindMemoryStore(inner, flush_interval=0.005)
+
+    async def scenario():
+        for session_id in ("a", "b"):
+            await store.save(session_id, Memory(), expected_version=0)
+        await asyncio.sleep(0.01)  # background flusher is now mid-flush
+        await asyncio.gather(store.flush(), store.flush(), store.close())
+
+    asyncio.run(scenario())
+    assert inner.saves == 2
+    assert store.stats() == {"pending": 0, "flushed": 2, "coalesced": 0, "conflicts": 0}
+
+
+def test_save_during_flush_is_written_by_the_next_flush() -> None:
+    inner = SlowStore(delay=0.05)
+    store = WriteBehindMemoryStore(inner, flush_interval=60)
+
+    async def scenario():
+        await store.save("s", Memory(stage=Stage.NEED_QUERY), expected_version=0)
+        flush = asyncio.create_task(store.flush())
+        await asyncio.sleep(0.01)
+        await store.save("s", Memory(stage=Stage.HAVE_SQL), expected_version=1)
+        await flush
+        assert (await inner.load("s")).version == 1
+        await store.close()
+        stored = await inner.load("s")
+        assert (stored.version, stored.memory.stage) == (2, Stage.HAVE_SQL)
+
+    asyncio.run(scenario())
+    assert store.stats()["conflicts"] == 0
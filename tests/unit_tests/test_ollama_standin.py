@@ -0,0 +1,88 @@
+import asyncio
+import json
+
+import httpx
+from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_ollama import ChatOllama
+from starlette.testclient import TestClient
+
+from ollama_standin import (
+    OllamaStandinConfig,
+    ScriptRule,
+    StreamingASGITransport,
+    create_ollama_standin_app,
+    split_tokens,
+)
+
+
+def quick_config(**settings) -> OllamaStandinConfig:
+    settings.setdefault("ttft", "none")
+    settings.setdefault("tps", 0)
+    return OllamaStandinConfig(**settings)
+
+
+def chat_body(system: str, user: str, **extra) -> dict:
+    return {"model": "m", "messages": [{"role": "system", "content": system}, {"role": "user", "content": user}], **extra}
+
+
+def test_split_tokens_keeps_the_text() -> None:
+    text = '{"sql": "SELECT a, b FROM t"}'
+    tokens = split_tokens(text)
+    assert "".join(tokens) == text and len(tokens) > 5
+
+
+def test_first_matching_rule_answers() -> None:
+    rules = [
+        ScriptRule(response="orders", system="SQL", match="order"),
+        ScriptRule(response="qwen", model="qwen3:*"),
+        ScriptRule(response="any sql", system="SQL"),
+    ]
+    with TestClient(create_ollama_standin_app(quick_config(rules=rules, default_response="none"))) as client:
+        def answer(system, user, model="m"):
+            body = {**chat_body(system, user, stream=False), "model": model}
+            return client.post("/api/chat", json=body).json()["message"]["content"]
+
+        assert answer("SQL query generator", "all orders") == "orders"
+        assert answer("job agent", "hi", model="qwen3:4b") == "qwen"
+        assert answer("SQL query generator", "customers") == "any sql"
+        assert answer("job agent", "hi") == "none"
+        assert client.get("/_standin/stats").json()["rule_hits"] == {"rule_0": 1, "rule_1": 1, "rule_2": 1, "default": 1}
+
+
+def test_chat_streams_ndjson_with_durations() -> None:
+    rules = [ScriptRule(response="SELECT 1 FROM dual")]
+    with TestClient(create_ollama_standin_app(quick_config(rules=rules))) as client:
+        response = client.post("/api/chat", json=chat_body("s", "u"))
+        lines = [json.loads(line) for line in response.text.splitlines()]
+
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert "".join(line["message"]["content"] for line in lines) == "SELECT 1 FROM dual"
+    assert [line["done"] for line in lines] == [False] * (len(lines) - 1) + [True]
+    assert lines[-1]["eval_count"] == len(lines) - 1
+
+
+def test_parallel_caps_concurrent_generations() -> None:
+    app = create_ollama_standin_app(quick_config(ttft="fixed:20", parallel=2))
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://ollama") as client:
+            await asyncio.gather(*(client.post("/api/chat", json=chat_body("s", "u", stream=False)) for _ in range(5)))
+
+    asyncio.run(scenario())
+    stats = app.state.standin.stats()
+    assert (stats["requests"], stats["max_in_flight"], stats["in_flight"]) == (5, 2, 0)
+
+
+def test_chat_ollama_streams_through_the_standin() -> None:
+    app = create_ollama_standin_app(quick_config(tps=200))
+    llm = ChatOllama(
+        model="standin", base_url="http://ollama", async_client_kwargs={"transport": StreamingASGITransport(app)}
+    )
+
+    async def scenario():
+        messages = [SystemMessage(content="You are a SQL query generator."), HumanMessage(content="customers")]
+        return [chunk.content async for chunk in llm.astream(messages)]
+
+    chunks = asyncio.run(scenario())
+    assert len([chunk for chunk in chunks if chunk]) > 5
+    assert json.loads("".join(chunks))["sql"].startswith("SELECT c.first_name")
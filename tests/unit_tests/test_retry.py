@@ -0,0 +1,87 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from typing import Optional
+
+import httpx
+import pytest
+from starlette.exceptions import HTTPException
+
+from src.repositories.base_repository import BaseRepository
+from src.utils.retry import RetryPolicy, parse_retry_after
+
+
+def test_parse_retry_after_seconds() -> None:
+    assert parse_retry_after("2") == 2.0
+    assert parse_retry_after(" 0.5 ") == 0.5
+    assert parse_retry_after("-3") == 0.0
+
+
+def test_parse_retry_after_http_date() -> None:
+    retry_at = datetime.now(timezone.utc) + timedelta(seconds=30)
+    assert 25 <= parse_retry_after(format_datetime(retry_at, usegmt=True)) <= 30
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+
+def test_parse_retry_after_rejects_garbage() -> None:
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("") is None
+    assert parse_retry_after("soon") is None
+
+
+def test_should_retry_only_listed_statuses_within_attempts() -> None:
+    policy = RetryPolicy(max_attempts=3, retry_statuses=frozenset({429, 503}))
+    assert policy.should_retry_status(503, attempt=1)
+    assert policy.should_retry_status(429, attempt=2)
+    assert not policy.should_retry_status(503, attempt=3)
+    assert not policy.should_retry_status(500, attempt=1)
+    assert policy.can_retry(2) and not policy.can_retry(3)
+
+
+def test_delay_uses_capped_full_jitter() -> None:
+    policy = RetryPolicy(base_delay=0.1, max_delay=0.3)
+    for attempt, ceiling in ((1, 0.1), (2, 0.2), (3, 0.3), (10, 0.3)):
+        delays = [policy.delay(attempt) for _ in range(200)]
+        assert all(0 <= delay <= ceiling for delay in delays)
+        assert max(delays) > ceiling / 2  # jittered over the whole range, not pinned to 0
+
+
+def test_delay_honors_retry_after_up_to_a_cap() -> None:
+    policy = RetryPolicy(base_delay=0.1, max_retry_after=10)
+    assert policy.delay(1, "4") == 4.0
+    assert policy.delay(1, "120") == 10
+    assert policy.delay(1, "soon") <= 0.1
+
+
+def flaky_repository(statuses: list, headers: Optional[dict] = None) -> tuple:
+    calls: list = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.headers.get("Idempotency-Key"))
+        status = statuses.pop(0) if statuses else 200
+        return httpx.Response(status, json={"ok": status == 200}, headers=headers if status != 200 else None)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return BaseRepository(client, retry_policy=RetryPolicy(max_attempts=3, base_delay=0.01)), calls
+
+
+def test_idempotent_post_is_retried() -> None:
+    repository, calls = flaky_repository([503, 429], headers={"Retry-After": "0"})
+    result = asyncio.run(repository._make_request("post", "http://icc/retry/idempotent", {}, idempotency_key="k"))
+    assert result == {"ok": True}
+    assert calls == ["k", "k", "k"]
+
+
+def test_post_without_idempotency_key_is_not_retried() -> None:
+    repository, calls = flaky_repository([503])
+    with pytest.raises(HTTPException) as failure:
+        asyncio.run(repository._make_request("post", "http://icc/retry/plain", {}))
+    assert failure.value.status_code == 503
+    assert len(calls) == 1
+
+
+def test_retries_stop_after_max_attempts() -> None:
+    repository, calls = flaky_repository([503, 503, 503, 503])
+    with pytest.raises(HTTPException):
+        asyncio.run(repository._make_request("get", "http://icc/retry/get"))
+    assert len(calls) == 3
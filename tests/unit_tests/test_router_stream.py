@@ -0,0 +1,39 @@
+import asyncio
+
+import pytest
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from src.ai.router import Memory, Stage, handle_turn_stream
+from src.ai.router import sql_agent as sql_agent_module
+
+SQL_REPLY = '{"sql": "SELECT first_name FROM customers", "reasoning": "names"}'
+
+
+@pytest.fixture(autouse=True)
+def fake_llm(monkeypatch):
+    monkeypatch.setattr(sql_agent_module.sql_agent, "llm", FakeListChatModel(responses=[SQL_REPLY] * 5))
+    monkeypatch.setattr(sql_agent_module.sql_agent, "cache", None)
+
+
+def collect(memory: Memory, utterance: str) -> list:
+    async def scenario():
+        return [event async for event in handle_turn_stream(memory, utterance)]
+
+    return asyncio.run(scenario())
+
+
+def test_sql_generation_streams_tokens_before_the_final_event() -> None:
+    events = collect(Memory(stage=Stage.NEED_QUERY, connection="oracle_10"), "get customer names")
+    tokens, final = events[:-1], events[-1]
+    assert len(tokens) > 1 and all(event.kind == "token" for event in tokens)
+    assert "".join(event.text for event in tokens) == SQL_REPLY
+    assert final.kind == "final"
+    assert final.memory.last_sql == "SELECT first_name FROM customers"
+    assert "SELECT first_name FROM customers" in final.text
+
+
+def test_stage_without_generation_yields_only_the_final_event() -> None:
+    events = collect(Memory(), "hi")
+    assert [event.kind for event in events] == ["final"]
+    assert events[0].memory.stage == Stage.NEED_QUERY
+
@@ -0,0 +1,115 @@
+import asyncio
+
+from src.ai.router.schema_catalog import DEFAULT_SCHEMA, SchemaCatalog, StaticSchemaSource
+from src.models.schema import ColumnInfo, TableInfo
+
+
+class CountingSource(StaticSchemaSource):
+    """Static source that counts calls and answers slowly, so refreshes overlap."""
+
+    def __init__(self, tables=DEFAULT_SCHEMA, markers: bool = True, delay: float = 0.01):
+        super().__init__(tables)
+        self.markers = markers
+        self.delay = delay
+        self.lists = 0
+        self.describes = 0
+
+    async def list_tables(self, connection):
+        self.lists += 1
+        await asyncio.sleep(self.delay)
+        markers = await super().list_tables(connection)
+        return markers if self.markers else {name: None for name in markers}
+
+    async def describe_table(self, connection, table):
+        self.describes += 1
+        await asyncio.sleep(self.delay)
+        return await super().describe_table(connection, table)
+
+
+def make_catalog(tmp_path, source, **kwargs) -> SchemaCatalog:
+    kwargs.setdefault("refresh_interval", 3600)
+    kwargs.setdefault("table_ttl", 3600)
+    return SchemaCatalog(source=source, cache_dir=str(tmp_path), **kwargs)
+
+
+def test_first_lookup_describes_every_table(tmp_path) -> None:
+    source = CountingSource()
+    catalog = make_catalog(tmp_path, source)
+    index = asyncio.run(catalog.get_index("oracle_10"))
+    assert len(index) == len(DEFAULT_SCHEMA)
+    assert source.describes == len(DEFAULT_SCHEMA)
+    assert catalog.get_table("oracle_10", "CUSTOMERS").name == "customers"
+
+
+def test_concurrent_lookups_share_one_refresh(tmp_path) -> None:
+    source = CountingSource()
+    catalog = make_catalog(tmp_path, source)
+
+    async def scenario():
+        return await asyncio.gather(*(catalog.get_index("oracle_10") for _ in range(5)))
+
+    indexes = asyncio.run(scenario())
+    assert source.lists == 1
+    assert source.describes == len(DEFAULT_SCHEMA)
+    assert all(index is indexes[0] for index in indexes)
+
+
+def test_incremental_refresh_only_describes_changed_tables(tmp_path) -> None:
+    source = CountingSource()
+    catalog = make_catalog(tmp_path, source)
+    asyncio.run(catalog.refresh("oracle_10"))
+    old_index = catalog.cached_index("oracle_10")
+
+    products = source.tables["products"]
+    source.tables["products"] = products.model_copy(update={"columns": products.columns + [ColumnInfo(name="sku")]})
+    del source.tables["order_items"]
+    source.tables["suppliers"] = TableInfo(name="suppliers", columns=[ColumnInfo(name="supplier_id")])
+    source.describes = 0
+
+    result = asyncio.run(catalog.refresh("oracle_10"))
+    assert (result.added, result.changed, result.removed, result.unchanged, result.failed) == (1, 1, 1, 2, 0)
+    assert source.describes == 2
+    assert catalog.cached_index("oracle_10") is not old_index
+    assert "sku" in [column.name for column in catalog.get_table("oracle_10", "products").columns]
+
+
+def test_markerless_tables_are_described_again_after_ttl(tmp_path) -> None:
+    source = CountingSource(markers=False)
+    catalog = make_catalog(tmp_path, source, table_ttl=3600)
+    asyncio.run(catalog.refresh("oracle_10"))
+    assert asyncio.run(catalog.refresh("oracle_10")).unchanged == len(DEFAULT_SCHEMA)
+
+    catalog.table_ttl = 0
+    assert asyncio.run(catalog.refresh("oracle_10")).changed == len(DEFAULT_SCHEMA)
+
+
+def test_failed_describe_keeps_other_tables(tmp_path) -> None:
+    class FailingSource(CountingSource):
+        async def describe_table(self, connection, table):
+            if table == "orders":
+                raise RuntimeError("boom")
+            return await super().describe_table(connection, table)
+
+    catalog = make_catalog(tmp_path, FailingSource())
+    result = asyncio.run(catalog.refresh("oracle_10"))
+    assert (result.added, result.failed) == (len(DEFAULT_SCHEMA) - 1, 1)
+    assert catalog.get_table("oracle_10", "orders") is None
+
+
+def test_catalog_survives_restart(tmp_path) -> None:
+    asyncio.run(make_catalog(tmp_path, CountingSource()).refresh("oracle_10"))
+
+    source = CountingSource()
+    reopened = make_catalog(tmp_path, source)
+    assert [table.name for table in asyncio.run(reopened.atables("oracle_10"))] == [t.name for t in DEFAULT_SCHEMA]
+    asyncio.run(reopened.get_index("oracle_10"))
+    assert source.lists == 0  # checked recently, per the cache file
+    assert reopened.get_table("oracle_10", "orders").columns[1].references == "customers.customer_id"
+
+
+def test_unreadable_cache_is_ignored(tmp_path) -> None:
+    catalog = make_catalog(tmp_path, CountingSource())
+    with open(catalog._cache_path("oracle_10"), "wb") as f:
+        f.write(b"not gzip")
+    assert catalog.tables("oracle_10") == []
+    assert len(asyncio.run(catalog.get_index("oracle_10"))) == len(DEFAULT_SCHEMA)
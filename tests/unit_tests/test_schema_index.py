@@ -0,0 +1,55 @@
+from src.ai.router.schema_catalog import DEFAULT_SCHEMA
+from src.ai.router.schema_index import SchemaIndex, identifier_words, render_schema
+from src.models.schema import ColumnInfo, TableInfo
+
+
+def names(tables) -> list:
+    return [table.name for table in tables]
+
+
+def test_identifier_words() -> None:
+    assert identifier_words("CUST_MASTER") == ["cust", "master"]
+    assert identifier_words("orderItems") == ["order", "item"]
+    assert identifier_words("Show all categories from 2024") == ["category"]
+
+
+def test_search_ranks_matching_table_first() -> None:
+    index = SchemaIndex(DEFAULT_SCHEMA)
+    assert index.search("customers from USA")[0][0].name == "customers"
+    assert index.search("products low on stock")[0][0].name == "products"
+    assert index.search("zzz qqq") == []
+
+
+def test_trigrams_match_abbreviated_names() -> None:
+    tables = [
+        TableInfo(name="CUST_MASTER", columns=[ColumnInfo(name="CUST_ID"), ColumnInfo(name="CUST_NAME")]),
+        TableInfo(name="INVENTORY", columns=[ColumnInfo(name="ITEM_ID"), ColumnInfo(name="QTY")]),
+    ]
+    assert SchemaIndex(tables).search("customer names")[0][0].name == "CUST_MASTER"
+
+
+def test_select_adds_foreign_key_neighbours() -> None:
+    index = SchemaIndex(DEFAULT_SCHEMA)
+    assert names(index.select("order items quantity", top_k=1)) == ["order_items", "orders", "products"]
+    assert names(index.select("order items quantity", top_k=1, include_neighbours=False)) == ["order_items"]
+    assert names(index.select("order items quantity", top_k=1, max_tables=2)) == ["order_items", "orders"]
+
+
+def test_select_falls_back_to_first_tables() -> None:
+    index = SchemaIndex(DEFAULT_SCHEMA)
+    assert names(index.select("zzz", top_k=2, include_neighbours=False)) == ["customers", "orders"]
+
+
+def test_fingerprint_follows_schema() -> None:
+    changed = DEFAULT_SCHEMA[:-1]
+    assert SchemaIndex(DEFAULT_SCHEMA).fingerprint == SchemaIndex(list(DEFAULT_SCHEMA)).fingerprint
+    assert SchemaIndex(DEFAULT_SCHEMA).fingerprint != SchemaIndex(changed).fingerprint
+
+
+def test_render_schema() -> None:
+    assert render_schema(DEFAULT_SCHEMA[1:2]).splitlines()[:4] == [
+        "Table: orders",
+        "Columns:",
+        "  - order_id (INT, Primary Key)",
+        "  - customer_id (INT, Foreign Key → customers.customer_id)",
+    ]
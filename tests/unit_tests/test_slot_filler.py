@@ -0,0 +1,84 @@
+from src.ai.router.memory import Memory
+from src.ai.router.slot_filler import SlotFiller
+
+
+def test_write_data_slots_from_one_sentence() -> None:
+    result = SlotFiller().extract("write_data", "write to table SALES_2024 on oracle_prod and truncate it")
+    assert result.params == {"table": "SALES_2024", "connection": "oracle_prod", "drop_or_truncate": "truncate"}
+    assert not result.ambiguous
+
+
+def test_connection_needs_a_cue() -> None:
+    result = SlotFiller().extract("write_data", "write to sales on Monday")
+    assert result.params == {"table": "sales"}
+
+    cued = SlotFiller().extract("write_data", "save into dbo.sales on the warehouse database")
+    assert cued.params == {"table": "dbo.sales", "connection": "warehouse"}
+
+    explicit = SlotFiller().extract("write_data", "write to sales using connection prod_dw")
+    assert explicit.params["connection"] == "prod_dw"
+
+
+def test_conjunction_after_connection_is_not_a_name() -> None:
+    result = SlotFiller().extract("write_data", "write to sales on the prod connection and truncate")
+    assert result.params == {"table": "sales", "connection": "prod", "drop_or_truncate": "truncate"}
+
+
+def test_conflicting_modes_are_ambiguous() -> None:
+    result = SlotFiller().extract("write_data", "drop or truncate, I am not sure")
+    assert "drop_or_truncate" not in result.params
+    assert result.ambiguous == {"drop_or_truncate"}
+
+
+def test_send_email_slots() -> None:
+    result = SlotFiller().extract(
+        "send_email", 'mail a@b.com cc c@d.com, subject: "Q3 numbers" and body: see attached'
+    )
+    assert result.params == {"to": "a@b.com", "cc": "c@d.com", "subject": "Q3 numbers", "text": "see attached"}
+
+    ambiguous = SlotFiller().extract("send_email", "a@b.com and x@y.com")
+    assert ambiguous.params == {}
+    assert ambiguous.ambiguous == {"to"}
+
+
+def test_bare_reply_fills_only_the_asked_slot() -> None:
+    filler = SlotFiller()
+    assert filler.extract("write_data", "SALES_2024", asked_slot="table").params == {"table": "SALES_2024"}
+    assert filler.extract("write_data", "prod_dw", asked_slot="connection").params == {"connection": "prod_dw"}
+    # Without a known question a bare word is left to the model
+    assert filler.extract("write_data", "SALES_2024").params == {}
+
+
+def test_bare_yes_no_and_cancel_are_never_values() -> None:
+    filler = SlotFiller()
+    for reply in ("yes", "No", "ok", "cancel", " okay "):
+        assert filler.extract("write_data", reply, asked_slot="table").params == {}, reply
+
+
+def test_fill_uses_the_slot_recorded_in_memory() -> None:
+    filler = SlotFiller()
+    memory = Memory(gathered_params={"table": "SALES"}, pending_tool="write_data", pending_slot="connection")
+
+    filler.fill(memory, "write_data", "yes")
+    assert memory.gathered_params == {"table": "SALES"}
+
+    filler.fill(memory, "write_data", "oracle_prod")
+    assert memory.gathered_params == {"table": "SALES", "connection": "oracle_prod"}
+    assert filler.missing_slots(memory, "write_data") == ["drop_or_truncate"]
+
+
+def test_fill_ignores_a_stale_asked_slot() -> None:
+    filler = SlotFiller()
+    memory = Memory(gathered_params={"table": "SALES"}, pending_slot="table")
+    filler.fill(memory, "write_data", "OTHER")
+    assert memory.gathered_params == {"table": "SALES"}
+
+
+def test_stats_count_attempts_and_fills() -> None:
+    filler = SlotFiller()
+    memory = Memory(pending_slot="table")
+    filler.fill(memory, "write_data", "SALES")
+    stats = filler.stats()["write_data"]
+    assert stats["table"]["attempts"] == 1
+    assert stats["table"]["filled"] == 1
+    assert stats["connection"]["filled"] == 0
@@ -0,0 +1,107 @@
+import asyncio
+import time
+
+from src.ai.router.schema_catalog import schema_catalog
+from src.ai.router.sql_agent import SQLAgent
+from src.ai.router.sql_cache import SQLGenerationCache, normalize_utterance, prompt_version
+
+
+def make_cache(tmp_path, **kwargs) -> SQLGenerationCache:
+    return SQLGenerationCache(path=str(tmp_path / "sql.sqlite3"), **kwargs)
+
+
+def test_normalize_utterance() -> None:
+    assert normalize_utterance("  Get   Customers from USA?! ") == "get customers from usa"
+
+
+def test_prompt_version_depends_on_every_part() -> None:
+    assert prompt_version("prompt", "schema", "oracle_10") == prompt_version("prompt", "schema", "oracle_10")
+    assert prompt_version("prompt", "schema", "oracle_10") != prompt_version("prompt", "schema", "mssql")
+    assert prompt_version("ab", "c") != prompt_version("a", "bc")
+
+
+def test_miss_then_memory_hit(tmp_path) -> None:
+    cache = make_cache(tmp_path)
+    assert cache.get("m", "v1", "get customers") is None
+    cache.put("m", "v1", "get customers", "SELECT * FROM customers", "all rows")
+    assert cache.get("m", "v1", "Get customers.") == ("SELECT * FROM customers", "all rows")
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["disk_hits"]) == (1, 1, 0)
+
+
+def test_disk_hit_survives_restart(tmp_path) -> None:
+    cache = make_cache(tmp_path)
+    cache.put("m", "v1", "get customers", "SELECT * FROM customers")
+    cache.close()
+
+    reopened = make_cache(tmp_path)
+    assert reopened.get("m", "v1", "get customers") == ("SELECT * FROM customers", "")
+    assert reopened.stats()["disk_hits"] == 1
+    # Promoted to the memory level
+    assert reopened.get("m", "v1", "get customers") == ("SELECT * FROM customers", "")
+    assert reopened.stats()["disk_hits"] == 1
+
+
+def test_other_model_or_version_misses(tmp_path) -> None:
+    cache = make_cache(tmp_path)
+    cache.put("m", "v1", "get customers", "SELECT * FROM customers")
+    assert cache.get("m", "v2", "get customers") is None
+    assert cache.get("other", "v1", "get customers") is None
+
+
+def test_invalidate_keeps_current_version(tmp_path) -> None:
+    cache = make_cache(tmp_path)
+    cache.put("m", "v1", "a", "SELECT 1")
+    cache.put("m", "v2", "b", "SELECT 2")
+    assert cache.invalidate(keep_version="v2") == 1
+    assert cache.get("m", "v1", "a") is None
+    assert cache.get("m", "v2", "b") == ("SELECT 2", "")
+
+
+def test_delete(tmp_path) -> None:
+    cache = make_cache(tmp_path)
+    cache.put("m", "v1", "a", "SELECT 1")
+    cache.delete("m", "v1", "a")
+    assert cache.get("m", "v1", "a") is None
+    assert cache.stats()["persisted_entries"] == 0
+
+
+def test_expired_entries_miss(tmp_path) -> None:
+    cache = make_cache(tmp_path, ttl=0.05)
+    cache.put("m", "v1", "a", "SELECT 1")
+    time.sleep(0.1)
+    assert cache.get("m", "v1", "a") is None
+    assert cache.stats()["persisted_entries"] == 0
+
+
+def test_prune_keeps_most_recently_used(tmp_path) -> None:
+    cache = make_cache(tmp_path, max_entries=2)
+    for i in range(3):
+        cache.put("m", "v1", f"q{i}", f"SELECT {i}")
+        time.sleep(0.01)
+    cache.prune()
+    assert cache.stats()["persisted_entries"] == 2
+    cache._memory.clear()
+    assert cache.get("m", "v1", "q0") is None
+    assert cache.get("m", "v1", "q2") == ("SELECT 2", "")
+
+
+def test_async_variants_share_both_levels(tmp_path) -> None:
+    cache = make_cache(tmp_path)
+
+    async def scenario():
+        assert await cache.aget("m", "v1", "a") is None
+        await cache.aput("m", "v1", "a", "SELECT 1", "one")
+        assert cache.get("m", "v1", "a") == ("SELECT 1", "one")
+        cache._memory.clear()
+        assert await cache.aget("m", "v1", "a") == ("SELECT 1", "one")
+        await cache.adelete("m", "v1", "a")
+        assert await cache.aget("m", "v1", "a") is None
+
+    asyncio.run(scenario())
+    assert cache.stats()["disk_hits"] == 1
+
+
+def test_agent_version_differs_per_connection() -> None:
+    index = schema_catalog.cached_index("oracle_10")
+    assert SQLAgent.prompt_version(index, "oracle_10") != SQLAgent.prompt_version(index, "mssql_reporting")
@@ -0,0 +1,58 @@
+from src.utils.sql_parser import (
+    IDENTIFIER_CASE_LOWER,
+    IDENTIFIER_CASE_PRESERVE,
+    IDENTIFIER_CASE_UPPER,
+    identifier_case_for,
+    infer_select_columns,
+    select_aliases,
+)
+
+
+def test_identifier_case_from_connection_name() -> None:
+    assert identifier_case_for("oracle_10") == IDENTIFIER_CASE_UPPER
+    assert identifier_case_for("snowflake_dw") == IDENTIFIER_CASE_UPPER
+    assert identifier_case_for("postgres_main") == IDENTIFIER_CASE_LOWER
+    assert identifier_case_for("mssql_reporting") == IDENTIFIER_CASE_PRESERVE
+    assert identifier_case_for("mysql_shop") == IDENTIFIER_CASE_PRESERVE
+
+
+def test_identifier_case_unknown_for_unhinted_connection() -> None:
+    assert identifier_case_for("warehouse") is None
+    assert identifier_case_for("") is None
+
+
+def test_configured_identifier_case_wins() -> None:
+    assert identifier_case_for("warehouse", "upper") == IDENTIFIER_CASE_UPPER
+    assert identifier_case_for("oracle_10", "preserve") == IDENTIFIER_CASE_PRESERVE
+
+
+def test_infer_columns_folds_unquoted_names() -> None:
+    sql = 'SELECT c.first_name, o.total_amount AS total, COUNT(*) n, "MixedCase" FROM customers c'
+    assert infer_select_columns(sql, IDENTIFIER_CASE_UPPER) == ["FIRST_NAME", "TOTAL", "N", "MixedCase"]
+    assert infer_select_columns(sql, IDENTIFIER_CASE_LOWER) == ["first_name", "total", "n", "MixedCase"]
+    assert infer_select_columns(sql, IDENTIFIER_CASE_PRESERVE) == ["first_name", "total", "n", "MixedCase"]
+
+
+def test_infer_columns_with_unknown_case_needs_quoted_names() -> None:
+    assert infer_select_columns("SELECT a, b FROM t", None) is None
+    assert infer_select_columns('SELECT "a", b AS "Total" FROM t', None) == ["a", "Total"]
+
+
+def test_infer_columns_gives_up_when_the_server_must_decide() -> None:
+    for sql in (
+        "SELECT * FROM customers",
+        "SELECT c.* FROM customers c",
+        "SELECT COUNT(*) FROM customers",
+        "SELECT a, A FROM t",
+        "UPDATE t SET a = 1",
+    ):
+        assert infer_select_columns(sql, IDENTIFIER_CASE_UPPER) is None, sql
+
+
+def test_infer_columns_skips_with_clause_and_top() -> None:
+    sql = "WITH recent AS (SELECT * FROM orders) SELECT TOP 5 DISTINCT order_id FROM recent"
+    assert infer_select_columns(sql, IDENTIFIER_CASE_PRESERVE) == ["order_id"]
+
+
+def test_select_aliases_excludes_bare_columns() -> None:
+    assert select_aliases("SELECT first_name, c.country, SUM(x) AS total, y n FROM t c") == ["total", "n"]
@@ -0,0 +1,127 @@
+from src.ai.router.sql_validator import limit_rows, oracle_version, validate_sql
+from src.models.schema import ColumnInfo, TableInfo
+
+CUSTOMERS = TableInfo(
+    name="customers",
+    columns=[ColumnInfo(name=name) for name in ("customer_id", "first_name", "last_name", "country")],
+)
+ORDERS = TableInfo(
+    name="orders",
+    columns=[ColumnInfo(name=name) for name in ("order_id", "customer_id", "order_date", "total_amount")],
+)
+TABLES = [CUSTOMERS, ORDERS]
+
+
+def test_valid_query_has_no_issues() -> None:
+    result = validate_sql(
+        "SELECT c.first_name, SUM(o.total_amount) AS total FROM customers c "
+        "JOIN orders o ON c.customer_id = o.customer_id GROUP BY c.first_name",
+        TABLES,
+        "postgres_main",
+    )
+    assert result.ok, result.issues
+    assert result.tables == ["customers", "orders"]
+
+
+def test_oracle_version_from_connection_name() -> None:
+    assert oracle_version("oracle_10") == 10
+    assert oracle_version("ORACLE-19") == 19
+    assert oracle_version("oracle") is None
+    assert oracle_version("postgres_main") is None
+
+
+def test_limit_is_rejected_on_old_oracle_with_rownum_hint() -> None:
+    result = validate_sql("SELECT * FROM customers LIMIT 10", TABLES, "oracle_10")
+    assert len(result.issues) == 1
+    assert "ROWNUM" in result.issues[0]
+
+
+def test_limit_is_rejected_on_new_oracle_with_fetch_first_hint() -> None:
+    result = validate_sql("SELECT * FROM customers LIMIT 10", TABLES, "oracle_19")
+    assert len(result.issues) == 1
+    assert "FETCH FIRST" in result.issues[0]
+
+
+def test_limit_is_rejected_on_mssql_with_top_hint() -> None:
+    result = validate_sql("SELECT * FROM customers LIMIT 10", TABLES, "mssql_reporting")
+    assert len(result.issues) == 1
+    assert "TOP" in result.issues[0]
+
+
+def test_limit_is_accepted_on_postgres_and_mysql() -> None:
+    assert validate_sql("SELECT * FROM customers LIMIT 10", TABLES, "postgres_main").ok
+    assert validate_sql("SELECT * FROM customers LIMIT 10", TABLES, "mysql_shop").ok
+
+
+def test_fetch_first_is_rejected_before_oracle_12() -> None:
+    result = validate_sql("SELECT * FROM customers FETCH FIRST 10 ROWS ONLY", TABLES, "oracle_10")
+    assert any("ROWNUM" in issue for issue in result.issues)
+    assert validate_sql("SELECT * FROM customers FETCH FIRST 10 ROWS ONLY", TABLES, "oracle_12").ok
+
+
+def test_select_top_is_rejected_outside_mssql() -> None:
+    result = validate_sql("SELECT TOP 10 * FROM customers", TABLES, "oracle_19")
+    assert any("TOP" in issue for issue in result.issues)
+    assert validate_sql("SELECT TOP 10 * FROM customers", TABLES, "mssql_reporting").ok
+
+
+def test_limit_rows_matches_each_dialect() -> None:
+    base = "SELECT * FROM orders WHERE order_date = CURRENT_DATE"
+    assert limit_rows(base, 10, "oracle_10") == f"{base} AND ROWNUM <= 10"
+    assert limit_rows("SELECT * FROM customers", 10, "oracle_10") == "SELECT * FROM customers WHERE ROWNUM <= 10"
+    assert limit_rows(base, 10, "oracle_19") == f"{base} FETCH FIRST 10 ROWS ONLY"
+    assert limit_rows(base, 10, "mssql_reporting") == "SELECT TOP 10 * FROM orders WHERE order_date = CURRENT_DATE"
+    assert limit_rows(base, 10, "postgres_main") == f"{base} LIMIT 10"
+
+
+def test_limit_rows_output_passes_validation() -> None:
+    for connection in ("oracle_10", "oracle_19", "mssql_reporting", "postgres_main", "mysql_shop", ""):
+        sql = limit_rows("SELECT * FROM customers", 10, connection)
+        assert validate_sql(sql, TABLES, connection).ok, (connection, sql)
+
+
+def test_trim_keywords_are_not_columns() -> None:
+    for sql in (
+        "SELECT TRIM(BOTH ' ' FROM first_name) FROM customers",
+        "SELECT TRIM(LEADING '0' FROM country) AS country FROM customers",
+        "SELECT TRIM(TRAILING ' ' FROM last_name) FROM customers",
+    ):
+        result = validate_sql(sql, TABLES, "oracle_10")
+        assert result.ok, (sql, result.issues)
+        assert result.tables == ["customers"]
+
+
+def test_unknown_table_and_column_are_reported() -> None:
+    assert validate_sql("SELECT * FROM invoices", TABLES).issues == ["Unknown table 'invoices'."]
+    assert validate_sql("SELECT * FROM customers WHERE nickname = 'x'", TABLES).issues == ["Unknown column 'nickname'."]
+    assert validate_sql("SELECT c.nickname FROM customers c", TABLES).issues == ["Unknown column 'c.nickname'."]
+
+
+def test_syntax_problems_are_reported() -> None:
+    assert validate_sql("DELETE FROM customers", TABLES).issues[0].startswith("The query must be a SELECT")
+    assert "Parentheses are not balanced." in validate_sql("SELECT COUNT(* FROM customers", TABLES).issues
+    assert "Only a single statement is allowed." in validate_sql("SELECT 1 FROM dual; SELECT 2 FROM dual", []).issues
+
+
+def test_bare_hallucinated_select_column_is_reported() -> None:
+    result = validate_sql("SELECT customer_name, country FROM customers", TABLES, "oracle_10")
+    assert result.issues == ["Unknown column 'customer_name'."]
+
+
+def test_select_list_aliases_can_be_referenced() -> None:
+    for sql in (
+        "SELECT first_name fname FROM customers ORDER BY fname",
+        "SELECT country, COUNT(*) AS n FROM customers GROUP BY country ORDER BY n DESC",
+    ):
+        assert validate_sql(sql, TABLES, "oracle_10").ok, sql
+
+
+def test_clause_keyword_without_operand_is_reported() -> None:
+    for sql, keyword in (
+        ("SELECT * FROM customers WHERE", "WHERE"),
+        ("SELECT * FROM customers WHERE ORDER BY country", "WHERE"),
+        ("SELECT country FROM customers GROUP BY", "BY"),
+        ("SELECT * FROM customers WHERE country = 'USA' AND;", "AND"),
+    ):
+        assert f"'{keyword}' is not followed by anything." in validate_sql(sql, TABLES).issues, sql
+    assert validate_sql("SELECT * FROM customers WHERE country IS NOT NULL;", TABLES).ok
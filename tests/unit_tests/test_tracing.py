@@ -0,0 +1,104 @@
+import asyncio
+import json
+
+import pytest
+
+from src.utils.tracing import (
+    NOOP_SPAN,
+    STATUS_ERROR,
+    JsonlSpanExporter,
+    SpanExporter,
+    configure_tracing,
+    current_span,
+    shutdown_tracing,
+    span,
+    tracing_enabled,
+)
+
+
+class ListExporter(SpanExporter):
+    """Keeps finished spans in memory."""
+
+    def __init__(self):
+        self.spans = []
+
+    def export(self, span) -> None:
+        self.spans.append(span)
+
+
+@pytest.fixture
+def exporter():
+    exporter = ListExporter()
+    configure_tracing(exporter=exporter)
+    yield exporter
+    shutdown_tracing()
+
+
+def test_exporter_must_implement_export() -> None:
+    with pytest.raises(TypeError):
+        SpanExporter()
+
+
+def test_disabled_tracing_returns_the_noop_span() -> None:
+    shutdown_tracing()
+    assert not tracing_enabled()
+    with span("turn", user="x") as turn:
+        assert turn is NOOP_SPAN
+        turn.set_attribute("ignored", 1)
+        assert current_span() is NOOP_SPAN
+
+
+def test_spans_nest_through_awaits_and_tasks(exporter) -> None:
+    async def child():
+        with span("child"):
+            await asyncio.sleep(0)
+
+    async def scenario():
+        with span("turn", session="s") as turn:
+            assert current_span() is turn
+            await child()
+            await asyncio.create_task(child())
+        assert current_span() is NOOP_SPAN
+
+    asyncio.run(scenario())
+    first, second, turn = exporter.spans
+    assert [s.name for s in exporter.spans] == ["child", "child", "turn"]
+    assert turn.parent_id is None and turn.attributes == {"session": "s"}
+    for child_span in (first, second):
+        assert (child_span.trace_id, child_span.parent_id) == (turn.trace_id, turn.span_id)
+
+
+def test_separate_roots_start_separate_traces(exporter) -> None:
+    with span("a"):
+        pass
+    with span("b"):
+        pass
+    assert exporter.spans[0].trace_id != exporter.spans[1].trace_id
+
+
+def test_exception_marks_span_as_failed(exporter) -> None:
+    with pytest.raises(ValueError):
+        with span("turn"):
+            raise ValueError("bad input")
+    (turn,) = exporter.spans
+    assert turn.status == STATUS_ERROR
+    assert turn.status_message == "ValueError: bad input"
+    assert turn.events[0]["name"] == "exception"
+
+
+def test_jsonl_exporter_writes_a_turn_when_its_root_span_ends(tmp_path) -> None:
+    path = tmp_path / "traces" / "spans.jsonl"
+    configure_tracing(exporter=JsonlSpanExporter(str(path)))
+    try:
+        with span("turn"):
+            with span("llm.sql_agent", **{"llm.model": "m"}):
+                pass
+            assert not path.exists()  # buffered until the turn ends
+    finally:
+        shutdown_tracing()
+
+    records = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert [record["name"] for record in records] == ["llm.sql_agent", "turn"]
+    assert records[0]["parent_span_id"] == records[1]["span_id"]
+    assert records[0]["attributes"] == {"llm.model": "m"}
+    assert records[1]["duration_ms"] >= records[0]["duration_ms"]
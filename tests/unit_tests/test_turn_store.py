@@ -0,0 +1,80 @@
+import time
+
+import pytest
+
+from src.ai.router.turn_store import InMemoryTurnStore, SQLiteTurnStore
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_store(request, tmp_path):
+    def make(**kwargs):
+        if request.param == "sqlite":
+            return SQLiteTurnStore(path=str(tmp_path / "sessions.sqlite3"), **kwargs)
+        return InMemoryTurnStore(**kwargs)
+    return make
+
+
+def test_one_running_turn_per_session(make_store) -> None:
+    store = make_store()
+    turn_id = store.start("s")
+    assert turn_id is not None
+    assert store.start("s") is None
+    assert store.start("other") is not None
+
+    store.update_text("s", turn_id, "SELECT")
+    state = store.get("s")
+    assert (state.turn_id, state.text, state.done) == (turn_id, "SELECT", False)
+
+
+def test_finished_turn_is_taken_once(make_store) -> None:
+    store = make_store()
+    turn_id = store.start("s")
+    assert not store.take("s", turn_id)  # still running
+
+    store.finish("s", turn_id, {"response": "done", "stage": "have_sql"})
+    state = store.get("s")
+    assert state.done and state.result == {"response": "done", "stage": "have_sql"}
+    assert store.take("s", turn_id)
+    assert not store.take("s", turn_id)
+    assert store.get("s") is None
+
+
+def test_finished_turn_is_replaced_by_a_new_one(make_store) -> None:
+    store = make_store()
+    first = store.start("s")
+    store.finish("s", first, {"response": "abandoned"})
+    second = store.start("s")
+    assert second not in (None, first)
+
+    # The old turn can no longer touch the session
+    store.update_text("s", first, "stale")
+    store.finish("s", first, {"response": "stale"})
+    state = store.get("s")
+    assert (state.turn_id, state.text, state.done) == (second, "", False)
+
+
+def test_uncollected_results_expire(make_store) -> None:
+    store = make_store(result_ttl=0.05)
+    turn_id = store.start("s")
+    store.finish("s", turn_id, {"response": "nobody polled"})
+    time.sleep(0.1)
+    assert store.get("s") is None
+
+
+def test_lost_running_turns_expire(make_store) -> None:
+    store = make_store(stale_after=0.05)
+    store.start("s")
+    time.sleep(0.1)
+    assert store.start("s") is not None
+
+
+def test_sqlite_turns_are_shared_between_processes(tmp_path) -> None:
+    path = str(tmp_path / "sessions.sqlite3")
+    worker_a, worker_b = SQLiteTurnStore(path=path), SQLiteTurnStore(path=path)
+    turn_id = worker_a.start("s")
+    assert worker_b.start("s") is None
+    worker_a.update_text("s", turn_id, "partial")
+    assert worker_b.get("s").text == "partial"
+    worker_a.finish("s", turn_id, {"response": "ok"})
+    assert worker_b.take("s", turn_id)
+    assert not worker_a.take("s", turn_id)